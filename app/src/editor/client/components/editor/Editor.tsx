@@ -49,16 +49,21 @@ function Editor({
 
   const [errorModalMessage, setErrorModalMessage] = useState<string>("");
   const [loading, setLoading] = useState<boolean>(false);
+  const [profile, setProfile] = useState<boolean>(false);
+  // identifies the run to getRunProgress while it executes
+  const [runId, setRunId] = useState<string>("");
 
   async function run() {
     try {
-      setInitialState();
+      const id = setInitialState();
       handlePreRunValidations();
 
       const { strategyResult, statistics, debugOutput, stderr, warnings } =
         await runStrategy({
           formInputs: formInputs,
           code: codeToDisplay,
+          profile: profile,
+          runId: id,
         });
 
       handleDebugOutput(debugOutput, stderr);
@@ -99,7 +104,7 @@ function Editor({
   }
 
   // Helper Functions
-  function setInitialState() {
+  function setInitialState(): string {
     // if (!hasSaved && strategyResult) {
     //     throw new Error("Have not saved currently loaded result.")
     // }
@@ -109,6 +114,10 @@ function Editor({
     setStats(null);
     setErrorModalMessage("");
     setLoading(true);
+
+    const id = crypto.randomUUID();
+    setRunId(id);
+    return id;
   }
 
   function handlePreRunValidations() {
@@ -127,10 +136,12 @@ function Editor({
       <InputForm
         formInputs={formInputs}
         setFormInputs={setFormInputs}
+        profile={profile}
+        setProfile={setProfile}
         run={run}
       />
 
-      {loading && <LongLoadingScreen />}
+      {loading && <LongLoadingScreen runId={runId} />}
 
       {errorModalMessage && (
         <ErrorModal
@@ -14,6 +14,8 @@ import { intVals, eodFreqs } from "../../../../shared/sharedTypes";
 interface InputFormSubcomponentProps {
   formInputs: FormInput;
   setFormInputs: React.Dispatch<React.SetStateAction<FormInput>>;
+  profile: boolean;
+  setProfile: (value: boolean) => void;
   run: () => Promise<void>;
 }
 
@@ -33,6 +35,8 @@ const INPUT_FORM_HEIGHT = "inputFormHeight";
 function InputForm({
   formInputs,
   setFormInputs,
+  profile,
+  setProfile,
   run,
 }: InputFormSubcomponentProps) {
   const [expanded, setExpanded] = useState<boolean>(true);
@@ -396,6 +400,20 @@ function InputForm({
                       <div className="font-extralight">s</div>
                     </div>
                   </div>
+                  <div className="flex items-center justify-between gap-3">
+                    <div className="tracking-tight text-xs font-light">
+                      Profile Strategy
+                    </div>
+                    <div className="flex items-center gap-x-1">
+                      <input
+                        type="checkbox"
+                        className="text-xs text-gray-600 rounded-md border border-gray-200 shadow-md focus:outline-none focus:border-transparent focus:shadow-none duration-200 ease-in-out hover:shadow-none"
+                        checked={profile}
+                        onChange={(e) => setProfile(e.target.checked)}
+                        name="profile"
+                      />
+                    </div>
+                  </div>
                 </div>
                 <div className="space-y-1 border-2 border-white bg-slate-200 rounded-md p-2 dark:bg-boxdark-2">
                   <div className="flex py-2 items-center justify-between gap-3">
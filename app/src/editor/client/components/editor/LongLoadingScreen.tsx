@@ -1,4 +1,6 @@
 import { useState, useEffect } from "react";
+import { useQuery, getRunProgress } from "wasp/client/operations";
+import { RunProgress } from "../../../../shared/sharedTypes";
 
 const messages = [
   "",
@@ -12,8 +14,36 @@ const messages = [
   "Crunching numbers and finding alpha... 🔎",
 ];
 
-function LongLoadingScreen() {
+// What the harness last reported, e.g. "0:42 · walk_forward 1,200 / 3,000"
+function describe(progress: RunProgress): string {
+  if (progress.state === "queued") return "Waiting for a free worker...";
+
+  const parts: string[] = [];
+  if (progress.elapsed !== null) {
+    const seconds = Math.floor(progress.elapsed);
+    const minutes = Math.floor(seconds / 60);
+    parts.push(`${minutes}:${String(seconds % 60).padStart(2, "0")}`);
+  }
+  if (progress.done !== null) {
+    const total =
+      progress.total !== null ? ` / ${progress.total.toLocaleString()}` : "";
+    parts.push(
+      `${progress.message ?? "done"} ${progress.done.toLocaleString()}${total}`,
+    );
+  } else if (progress.message) {
+    parts.push(progress.message);
+  }
+  return parts.join(" · ");
+}
+
+// runId: the run to show heartbeats of, polled while this is shown
+function LongLoadingScreen({ runId }: { runId?: string }) {
   const [messageIndex, setMessageIndex] = useState(0);
+  const { data: progress } = useQuery(
+    getRunProgress,
+    { runId: runId ?? "" },
+    { enabled: !!runId, refetchInterval: 1000 },
+  );
 
   useEffect(() => {
     const interval = setInterval(() => {
@@ -38,6 +68,19 @@ function LongLoadingScreen() {
       <div className="mt-5 text-white z-10 text-xl font-light tracking-tight transition-opacity animate-bounce duration-500 animate-fadeInOut">
         {messages[messageIndex]}
       </div>
+
+      {/* Heartbeats from the running strategy */}
+      {progress && (
+        <div className="mt-3 text-white z-10 text-sm font-light tracking-tight">
+          {describe(progress)}
+          {progress.stopping && (
+            <div className="text-amber-300">
+              Close to the time limit: stopping early, the result may be
+              partial.
+            </div>
+          )}
+        </div>
+      )}
     </div>
   );
 }
@@ -1,4 +1,8 @@
-import { type Stat } from "../../../../shared/sharedTypes";
+import {
+  type Robustness,
+  type RobustnessMetric,
+  type Stat,
+} from "../../../../shared/sharedTypes";
 
 function MainStatistics({ stats }: { stats: Stat }) {
   return (
@@ -35,10 +39,57 @@ function MainStatistics({ stats }: { stats: Stat }) {
       <br />
       <Stat text="sharpe ratio" stat={stats.sharpeRatio} digits={3} />
       <Stat text="sortino ratio" stat={stats.sortinoRatio} digits={3} />
+      {stats.robustness && <RobustnessStats robustness={stats.robustness} />}
     </div>
   );
 }
 
+const robustnessRows: {
+  text: string;
+  metric: RobustnessMetric;
+  digits: number;
+  suffix?: string;
+}[] = [
+  { text: "sharpe ratio", metric: "sharpeRatio", digits: 3 },
+  { text: "sortino ratio", metric: "sortinoRatio", digits: 3 },
+  { text: "max drawdown", metric: "maxDrawdown", digits: 1, suffix: "%" },
+  { text: "CAGR", metric: "cagr", digits: 1, suffix: "%" },
+];
+
+// Bootstrap interval of each statistic, and how often a randomly timed copy
+// of the strategy did at least as well
+function RobustnessStats({ robustness }: { robustness: Robustness }) {
+  const [low, , high] = robustness.percentiles;
+  const format = (value: number | null | undefined, digits: number) =>
+    typeof value === "number" ? value.toFixed(digits) : "-";
+
+  return (
+    <>
+      <br />
+      <div
+        className="p-1 text-xs font-semibold"
+        title={`${robustness.paths} block-bootstrap paths (blocks of ${robustness.blockLength} bars) and ${robustness.paths} randomly shifted copies of the signal`}
+      >
+        robustness ({low}-{high}th percentile, random-timing p)
+      </div>
+      {robustnessRows.map(({ text, metric, digits, suffix }) => {
+        const interval = robustness.bootstrap[metric];
+        return (
+          <Stat
+            key={metric}
+            text={text}
+            stat={
+              interval
+                ? `${format(interval[0], digits)} to ${format(interval[2], digits)}${suffix ?? ""}, p=${format(robustness.pValue[metric], 2)}`
+                : null
+            }
+          />
+        );
+      })}
+    </>
+  );
+}
+
 interface StatItemProps {
   text: string;
   stat: number | string | null | undefined;
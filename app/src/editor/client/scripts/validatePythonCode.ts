@@ -17,11 +17,18 @@ function validatePythonCode(code: string): void {
       "Function 'strategy' is not defined or improperly named. " + errorHelper
     );
   } else {
-    // Check 3: Validate that 'mystrategy' has exactly one parameter named 'data'
-    const params = functionMatch[1].trim();
-    if (params !== "data") {
+    // Check 3: Validate that 'mystrategy' takes 'data' first; any other
+    // parameters (tuned by parameter sweeps) need default values
+    const [first, ...rest] = functionMatch[1]
+      .split(",")
+      .map((param) => param.trim())
+      .filter((param) => param.length > 0);
+    if (
+      first !== "data" ||
+      !rest.every((param) => param.includes("=") || param.startsWith("*"))
+    ) {
       throw new Error(
-        "Function 'strategy' must have exactly one parameter named 'data'. " +
+        "Function 'strategy' must have one parameter named 'data' (any others need default values). " +
           errorHelper
       );
     }
@@ -0,0 +1,243 @@
+import {
+  BatchResult,
+  BatchRow,
+  BatchWindow,
+  FormInput,
+  RunProgress,
+} from "../../shared/sharedTypes";
+import CodeExecutor from "./CodeExecutor";
+import ScriptBuilder, { BatchSliceInput } from "./ScriptBuilder";
+import STDParser from "./STDParser";
+import StockDataConnection from "./StockDataConnection";
+import SandboxArchive from "./SandboxArchive";
+import { HttpError } from "wasp/server";
+
+/*
+    Runs one strategy over several symbols and/or date windows. Every
+    (symbol, window) slice is fetched concurrently, a few at a time, and all
+    of them are evaluated in a single executor submission; the result is a
+    statistics row per slice. A slice whose data can't be fetched gets an
+    error row rather than failing the whole batch.
+*/
+
+type Slice = { symbol: string; window: BatchWindow; formInputs: FormInput };
+
+class BatchPipeline {
+  private static readonly maxSlices: number = parseInt(
+    process.env.BATCH_MAX_SLICES || "50",
+  );
+  private static readonly fetchConcurrency: number = Math.max(
+    1,
+    parseInt(process.env.BATCH_FETCH_CONCURRENCY || "4"),
+  );
+
+  private formInputs: FormInput;
+  private code: string;
+  private symbols: string[];
+  private windows: BatchWindow[];
+  private onProgress?: (progress: RunProgress) => void;
+  private userId: string | null;
+
+  constructor(
+    formInputs: FormInput,
+    code: string,
+    symbols?: string[],
+    windows?: BatchWindow[],
+    onProgress?: (progress: RunProgress) => void,
+    userId: string | null = null,
+  ) {
+    this.formInputs = formInputs;
+    this.code = code;
+    this.onProgress = onProgress;
+    this.userId = userId;
+    this.symbols = symbols?.length ? symbols : [formInputs.symbol];
+    this.windows = windows?.length
+      ? windows
+      : [
+          {
+            startDate: formInputs.startDate,
+            endDate: formInputs.endDate,
+            warmupDate: formInputs.useWarmupDate
+              ? formInputs.warmupDate
+              : undefined,
+          },
+        ];
+  }
+
+  // The form inputs of every symbol/window slice, once the batch is valid.
+  public sliceInputs(): FormInput[] {
+    return this.slices().map((slice) => slice.formInputs);
+  }
+
+  public async run(): Promise<BatchResult> {
+    const slices = this.slices();
+
+    const rows: BatchRow[] = slices.map(({ symbol, window }) => ({
+      symbol,
+      startDate: window.startDate,
+      endDate: window.endDate,
+      statistics: null,
+      error: null,
+    }));
+    const warnings: string[] = [];
+
+    // no S&P comparison here: only statistics come back, so SPY is not fetched
+    const fetched = await BatchPipeline.mapWithConcurrency(
+      slices,
+      BatchPipeline.fetchConcurrency,
+      async ({ symbol, formInputs }, i) => {
+        try {
+          const quote = await new StockDataConnection(formInputs).get(symbol);
+          for (const warning of quote.warnings) {
+            warnings.push(`${BatchPipeline.label(rows[i])}: ${warning}`);
+          }
+          return quote;
+        } catch (error: any) {
+          rows[i].error = error?.message || "Could not fetch data.";
+          return null;
+        }
+      },
+    );
+
+    const submitted: number[] = [];
+    const sliceInputs: BatchSliceInput[] = [];
+    fetched.forEach((quote, i) => {
+      if (!quote) return;
+      submitted.push(i);
+      sliceInputs.push({
+        quote: quote.normalizedQuote,
+        startDate: quote.shortenedNormalizedQuote.timestamp[0],
+        pricing: {
+          close: quote.shortenedNormalizedQuote.close,
+          timestamp: quote.shortenedNormalizedQuote.timestamp,
+        },
+      });
+    });
+
+    if (sliceInputs.length === 0) {
+      return { rows, workers: 0, debugOutput: "", stderr: "", warnings };
+    }
+
+    const key =
+      Math.random().toString(36).substring(2, 8) +
+      Math.random().toString(36).substring(2, 8);
+    const archive = new SandboxArchive();
+    const fullUserCode = ScriptBuilder.buildBatch(
+      this.code,
+      sliceInputs,
+      key,
+      archive,
+      this.formInputs.costPerTrade,
+      CodeExecutor.memoryLimit,
+      this.userId,
+    );
+
+    const { stdout_raw, stderr_raw, usage } = await new CodeExecutor(
+      fullUserCode,
+      this.formInputs.timeout,
+      archive.toBase64(),
+      this.onProgress,
+    ).execute();
+    const { stdout: debugOutput, stderr, batch, stages, modelCache } =
+      new STDParser(stdout_raw, stderr_raw, key).parseBatch();
+    const stdout = CodeExecutor.withStageDiagnostics(
+      debugOutput,
+      stages,
+      usage,
+      modelCache,
+    );
+
+    if (batch) {
+      batch.slices.forEach(({ statistics, error }, j) => {
+        rows[submitted[j]].statistics = statistics;
+        rows[submitted[j]].error = error;
+      });
+    }
+
+    return {
+      rows,
+      workers: batch?.workers ?? 0,
+      debugOutput: stdout,
+      stderr,
+      warnings: [...new Set(warnings)],
+    };
+  }
+
+  private slices(): Slice[] {
+    this.validate();
+    return this.symbols.flatMap((symbol) =>
+      this.windows.map((window) => ({
+        symbol,
+        window,
+        formInputs: {
+          ...this.formInputs,
+          symbol,
+          startDate: window.startDate,
+          endDate: window.endDate,
+          useWarmupDate: !!window.warmupDate,
+          warmupDate: window.warmupDate ?? "",
+        },
+      })),
+    );
+  }
+
+  private validate(): void {
+    if (
+      !this.symbols.every(
+        (symbol) => typeof symbol === "string" && symbol.trim().length > 0,
+      )
+    ) {
+      throw new HttpError(400, "Every symbol in a batch must be non-empty.");
+    }
+    for (const { startDate, endDate, warmupDate } of this.windows) {
+      const start = new Date(startDate).getTime();
+      const end = new Date(endDate).getTime();
+      if (isNaN(start) || isNaN(end) || start >= end) {
+        throw new HttpError(
+          400,
+          `The window ${startDate} to ${endDate} must start before it ends.`,
+        );
+      }
+      if (warmupDate && !(new Date(warmupDate).getTime() < start)) {
+        throw new HttpError(
+          400,
+          `The warmup date ${warmupDate} must come before ${startDate}.`,
+        );
+      }
+    }
+
+    const slices = this.symbols.length * this.windows.length;
+    if (slices > BatchPipeline.maxSlices) {
+      throw new HttpError(
+        400,
+        `This batch has ${slices} symbol/window combinations; the limit is ${BatchPipeline.maxSlices}.`,
+      );
+    }
+  }
+
+  private static label(row: BatchRow): string {
+    return `${row.symbol} (${row.startDate} to ${row.endDate})`;
+  }
+
+  // Promise.all over items, with at most `limit` calls in flight.
+  private static async mapWithConcurrency<T, R>(
+    items: T[],
+    limit: number,
+    fn: (item: T, index: number) => Promise<R>,
+  ): Promise<R[]> {
+    const results: R[] = new Array(items.length);
+    let next = 0;
+    const worker = async () => {
+      while (next < items.length) {
+        const index = next++;
+        results[index] = await fn(items[index], index);
+      }
+    };
+    await Promise.all(
+      Array.from({ length: Math.min(limit, items.length) }, worker),
+    );
+    return results;
+  }
+}
+
+export default BatchPipeline;
@@ -1,91 +1,144 @@
 import { HttpError } from "wasp/server";
-import { Buffer } from "buffer";
+import { Executor } from "./executors/types";
+import {
+  CPU_TIME_LIMIT,
+  MAX_THREADS,
+  MEMORY_LIMIT_KB,
+  WALL_TIME_LIMIT,
+} from "./executors/limits";
+import Judge0Executor from "./executors/Judge0Executor";
+import WorkerPool from "./executors/WorkerPool";
+import SubprocessExecutor from "./executors/SubprocessExecutor";
+import { HarnessStage, ModelCacheStats } from "./STDParser";
+import { RunProgress } from "../../shared/sharedTypes";
+
+// What the backend measured for the whole submission.
+export type ExecutionUsage = {
+  memory: number | null; // KB
+  time: string | null; // CPU seconds
+};
 
 class CodeExecutor {
   private code: string;
   private timeout: number;
-  private readonly memoryLimit: number = 1024000;
-  private readonly maxThreads: number = 256;
-
-  constructor(code: string, timeout: number) {
+  private additionalFiles?: string;
+  private onProgress?: (progress: RunProgress) => void;
+  public static readonly memoryLimit: number = MEMORY_LIMIT_KB;
+  private readonly maxThreads: number = MAX_THREADS;
+  private readonly cpuTimeLimit: number = CPU_TIME_LIMIT; // this.timeout
+  private readonly wallTimeLimit: number = WALL_TIME_LIMIT; // this.timeout
+  private static readonly delim: string =
+    "\n════════════════ Diagnostics ════════════════";
+
+  // additionalFiles is a base64 zip that Judge0 unpacks next to the script;
+  // onProgress gets the run's heartbeats, where the backend relays them
+  constructor(
+    code: string,
+    timeout: number,
+    additionalFiles?: string,
+    onProgress?: (progress: RunProgress) => void,
+  ) {
     this.code = code;
     this.timeout = timeout;
+    this.additionalFiles = additionalFiles;
+    this.onProgress = onProgress;
   }
 
   public async execute() {
-    const { stdout, stderr } = await this.sendToJudge();
+    const { stdout, stderr, usage } = await this.sendToExecutor();
     return {
       stdout_raw: stdout,
       stderr_raw: stderr,
+      usage,
     };
   }
 
-  private async sendToJudge() {
-    const url =
-      "https://judge0-extra-ce.p.rapidapi.com/submissions?base64_encoded=true&wait=true&fields=*";
-    const options = {
-      method: "POST",
-      headers: {
-        "x-rapidapi-key": process.env.JUDGE_API_KEY_RAPID_API as string,
-        "x-rapidapi-host": "judge0-extra-ce.p.rapidapi.com",
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        language_id: 31, // Python for ML (base image)
-        source_code: Buffer.from(this.code).toString("base64"), // Encode source code
-        cpu_time_limit: 59, // this.timeout,
-        wall_time_limit: 89, // this.timeout,
-        memory_limit: this.memoryLimit, // increase to 1GB
-        max_processes_and_or_threads: this.maxThreads,
-      }),
-    };
-
-    const response = await fetch(url, options);
-    if (!response.ok) {
-      // TODO, put in better error message after processing response.json()
-      throw new HttpError(
-        503,
-        `Code Execution Failed:\n\nStatus ${response.status} - ${response.statusText}`,
-      );
+  // Per-stage table of a profiled run (HARNESS_PROFILE) and the model
+  // cache's hit ratio, appended to the debug output under the same
+  // Diagnostics heading as execution errors.
+  public static withStageDiagnostics(
+    debugOutput: string,
+    stages: HarnessStage[] | null,
+    usage: ExecutionUsage,
+    modelCache: ModelCacheStats | null = null,
+  ): string {
+    const sections: string[] = [];
+
+    if (stages && stages.length > 0) {
+      const withMemory = stages.some((stage) => stage.peakBytes !== undefined);
+      const width = Math.max(5, ...stages.map(({ stage }) => stage.length));
+      const header = `${"Stage".padEnd(width)}   Wall (s)    CPU (s)${withMemory ? "   Peak (KB)" : ""}`;
+      const lines = stages.map(({ stage, wall, cpu, peakBytes }) => {
+        const peak = withMemory
+          ? Math.round((peakBytes ?? 0) / 1024).toString().padStart(12)
+          : "";
+        return `${stage.padEnd(width)} ${wall.toFixed(4).padStart(10)} ${cpu.toFixed(4).padStart(10)}${peak}`;
+      });
+
+      let table = `${header}\n${lines.join("\n")}`;
+      if (usage.memory && usage.time) {
+        table += `\n\nMemory Usage : ${usage.memory} KB
+Time Elapsed : ${usage.time} s`;
+      }
+      sections.push(table);
     }
+    if (modelCache) sections.push(CodeExecutor.modelCacheLine(modelCache));
+    if (sections.length === 0) return debugOutput;
 
-    const fullResult = await response.json();
-    let { stdout, stderr, message, memory, wall_time, time, status } =
-      fullResult as Judge0Result;
-    const { id, description } = status;
+    const report = `${CodeExecutor.delim.trimStart()}\n${sections.join("\n\n")}`;
+    return debugOutput ? `${debugOutput}\n\n${report}` : report;
+  }
 
-    // for some reason this doesn't work unless I set the null values to '' (???)
-    if (!stdout) {
-      stdout = "";
-    } else {
-      stdout = Buffer.from(stdout, "base64").toString("utf-8");
+  private static modelCacheLine(stats: ModelCacheStats): string {
+    if (!stats.enabled) {
+      return `Model Cache  : off on this executor (${stats.uncached} uncached fits)`;
     }
-    if (!stderr) {
-      stderr = "";
-    } else {
-      stderr = Buffer.from(stderr, "base64").toString("utf-8");
+    const lookups = stats.hits + stats.misses;
+    const ratio = lookups ? Math.round((100 * stats.hits) / lookups) : 0;
+    return `Model Cache  : ${stats.hits} of ${lookups} fits reused (${ratio}% hit ratio), ${stats.stores} stored, ${stats.evictions} evicted`;
+  }
+
+  // CODE_EXECUTOR picks the backend: "judge0" (default), "local" or "pool"
+  private static executor(): Executor {
+    switch (process.env.CODE_EXECUTOR) {
+      case "local":
+        return new SubprocessExecutor();
+      case "pool":
+        return WorkerPool.shared();
+      default:
+        return new Judge0Executor();
     }
+  }
 
-    if (message) {
-      const decodedMessage = Buffer.from(fullResult.message, "base64").toString(
-        "utf-8",
-      );
-      const delim = "\n════════════════ Diagnostics ════════════════";
+  private async sendToExecutor() {
+    const result = await CodeExecutor.executor().run({
+      code: this.code,
+      additionalFiles: this.additionalFiles,
+      cpuTimeLimit: this.cpuTimeLimit,
+      wallTimeLimit: this.wallTimeLimit,
+      memoryLimit: CodeExecutor.memoryLimit, // increase to 1GB
+      maxThreads: this.maxThreads,
+      onProgress: this.onProgress,
+    });
+    let { stdout, stderr } = result;
+    const { message, memory, time, status } = result;
+    const { description } = status;
 
-      stderr += `\n${decodedMessage.trim()}.\n`;
+    if (message) {
+      stderr += `\n${message.trim()}.\n`;
 
       if (memory && time) {
-        stderr += `${delim}
+        stderr += `${CodeExecutor.delim}
 Memory Usage : ${memory} KB
 Time Elapsed : ${time} s
 Message      : ${description}`;
       }
 
-      if (memory >= this.memoryLimit) {
+      if (memory && memory >= CodeExecutor.memoryLimit) {
         stderr += `\n\n⚠️  Note: Memory usage exceeded the 1GB limit.`;
       }
 
-      if (parseFloat(time) > this.timeout) {
+      if (time && parseFloat(time) > this.timeout) {
         stderr += `\n\n⏱️  Tip: Execution time of ${time}s exceeded the limit of ${this.timeout}s. You can increase this in the advanced options. Do note we are currently experiencing a memory timing issue that cuts off even simple strategies, and we're working on a fix.`;
       }
     }
@@ -97,53 +150,8 @@ Message      : ${description}`;
       );
     }
 
-    return { stdout, stderr };
+    return { stdout, stderr, usage: { memory, time } };
   }
 }
 
 export default CodeExecutor;
-
-export type Judge0Result = {
-  source_code: string;
-  language_id: number;
-  stdin: string | null;
-  expected_output: string | null;
-  stdout: string | null;
-  status_id: number;
-  created_at: string; // ISO timestamp
-  finished_at: string; // ISO timestamp
-  time: string; // CPU time (seconds, as string)
-  memory: number; // in KB
-  stderr: string | null;
-  token: string;
-  number_of_runs: number;
-  cpu_time_limit: string; // seconds
-  cpu_extra_time: string; // seconds
-  wall_time_limit: string; // seconds
-  memory_limit: number; // KB
-  stack_limit: number; // KB
-  max_processes_and_or_threads: number;
-  enable_per_process_and_thread_time_limit: boolean;
-  enable_per_process_and_thread_memory_limit: boolean;
-  max_file_size: number; // KB
-  compile_output: string | null;
-  exit_code: number | null;
-  exit_signal: number | null;
-  message: string | null; // Base64-encoded
-  wall_time: string; // actual runtime in seconds
-  compiler_options: string | null;
-  command_line_arguments: string | null;
-  redirect_stderr_to_stdout: boolean;
-  callback_url: string | null;
-  additional_files: any[] | null;
-  enable_network: boolean;
-  post_execution_filesystem: string | null; // Base64 ZIP of filesystem
-  status: {
-    id: number;
-    description: string;
-  };
-  language: {
-    id: number;
-    name: string;
-  };
-};
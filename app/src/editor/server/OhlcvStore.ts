@@ -0,0 +1,281 @@
+import { promises as fs } from "fs";
+import os from "os";
+import path from "path";
+
+/*
+    Local columnar store of fetched quote history, one directory per
+    interval/symbol: a float64 .bin file per numeric column, the bar dates
+    as JSON, and meta.json with the date range the files cover.
+
+    A request is served from the stored bars plus only the ranges they don't
+    cover yet. Trailing-edge rules:
+      - bars newer than OHLCV_SETTLE_HOURS are unsettled (the provider may
+        still correct them): they are reused for OHLCV_TRAILING_TTL_MINUTES,
+        then refetched;
+      - an entry not re-validated for OHLCV_MAX_AGE_HOURS is refetched from
+        its last settled bar on. Adjusted prices are rewritten retroactively
+        after splits and dividends, so if that bar changed, the whole entry
+        is dropped and fetched again.
+*/
+
+export type QuoteRows = Record<string, any>[];
+export type ColumnData = Record<string, any[]>;
+export type RangeFetcher = (start: string, end: string) => Promise<QuoteRows>;
+
+type StoreMeta = {
+  from: string; // YYYY-MM-DD, inclusive: the range fetched so far
+  to: string;
+  settledTo: string; // bars after this may still change
+  columns: string[];
+  length: number;
+  validatedAt: number;
+};
+
+type StoreEntry = { meta: StoreMeta; columns: ColumnData };
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+class OhlcvStore {
+  private static readonly settleMs: number =
+    parseFloat(process.env.OHLCV_SETTLE_HOURS || "36") * 60 * 60 * 1000;
+  private static readonly maxAgeMs: number =
+    parseFloat(process.env.OHLCV_MAX_AGE_HOURS || "24") * 60 * 60 * 1000;
+  private static readonly trailingTtlMs: number =
+    parseFloat(process.env.OHLCV_TRAILING_TTL_MINUTES || "60") * 60 * 1000;
+
+  // one update at a time per entry; concurrent requests wait and then read it
+  private static readonly pending: Map<string, Promise<unknown>> = new Map();
+
+  constructor(
+    private readonly dir: string = process.env.OHLCV_CACHE_DIR ||
+      path.join(os.tmpdir(), "ubacktest-ohlcv"),
+  ) {}
+
+  public static enabled(): boolean {
+    return process.env.OHLCV_CACHE !== "off";
+  }
+
+  // Only plain ticker symbols get a directory.
+  public static storable(symbol: string): boolean {
+    return /^[A-Za-z0-9][A-Za-z0-9.\-]{0,15}$/.test(symbol);
+  }
+
+  public async get(
+    symbol: string,
+    interval: string,
+    start: string,
+    end: string,
+    fetchRange: RangeFetcher,
+  ): Promise<ColumnData> {
+    const entryDir = path.join(this.dir, interval, symbol.toUpperCase());
+    const previous = OhlcvStore.pending.get(entryDir) ?? Promise.resolve();
+    const current = previous
+      .catch(() => undefined)
+      .then(() =>
+        this.update(entryDir, OhlcvStore.day(start), OhlcvStore.day(end), fetchRange),
+      );
+    OhlcvStore.pending.set(entryDir, current);
+    try {
+      return await current;
+    } finally {
+      if (OhlcvStore.pending.get(entryDir) === current) {
+        OhlcvStore.pending.delete(entryDir);
+      }
+    }
+  }
+
+  private async update(
+    entryDir: string,
+    start: string,
+    end: string,
+    fetchRange: RangeFetcher,
+  ): Promise<ColumnData> {
+    const now = Date.now();
+    const entry = await this.load(entryDir);
+
+    if (entry) {
+      const { meta, columns } = entry;
+      const age = now - meta.validatedAt;
+      const needsTail =
+        end > meta.to ||
+        age > OhlcvStore.maxAgeMs ||
+        (end > meta.settledTo && age > OhlcvStore.trailingTtlMs);
+      const settled = OhlcvStore.slice(columns, meta.from, meta.settledTo);
+      const anchor: string | undefined = settled.date?.[settled.date.length - 1];
+
+      if (!needsTail || anchor) {
+        const [head, tail] = await Promise.all([
+          start < meta.from
+            ? fetchRange(start, OhlcvStore.shift(meta.from, -1)).then(
+                OhlcvStore.toColumns,
+              )
+            : null,
+          needsTail
+            ? fetchRange(OhlcvStore.day(anchor!), end > meta.to ? end : meta.to).then(
+                OhlcvStore.toColumns,
+              )
+            : null,
+        ]);
+
+        // an unchanged anchor bar means the stored history still holds
+        if (!tail || OhlcvStore.sameBar(settled, tail, anchor!, meta.columns)) {
+          const merged = OhlcvStore.concat(
+            [
+              head,
+              tail ? settled : columns,
+              tail ? OhlcvStore.after(tail, anchor!) : null,
+            ].filter((part): part is ColumnData => !!part),
+            meta.columns,
+          );
+          if (head || tail) {
+            await this.save(entryDir, merged, {
+              from: start < meta.from ? start : meta.from,
+              to: end > meta.to ? end : meta.to,
+              settledTo: tail ? OhlcvStore.settledEdge(now) : meta.settledTo,
+              validatedAt: tail ? now : meta.validatedAt,
+            });
+          }
+          return OhlcvStore.slice(merged, start, end);
+        }
+      }
+    }
+
+    // nothing usable stored (or history was rewritten): fetch it all
+    const fresh = OhlcvStore.toColumns(await fetchRange(start, end));
+    await this.save(entryDir, fresh, {
+      from: start,
+      to: end,
+      settledTo: OhlcvStore.settledEdge(now),
+      validatedAt: now,
+    });
+    return fresh;
+  }
+
+  private async load(entryDir: string): Promise<StoreEntry | null> {
+    try {
+      const meta: StoreMeta = JSON.parse(
+        await fs.readFile(path.join(entryDir, "meta.json"), "utf-8"),
+      );
+      const columns: ColumnData = {
+        date: JSON.parse(await fs.readFile(path.join(entryDir, "date.json"), "utf-8")),
+      };
+      for (const column of meta.columns) {
+        const buffer = await fs.readFile(path.join(entryDir, `${column}.bin`));
+        const copy = buffer.buffer.slice(
+          buffer.byteOffset,
+          buffer.byteOffset + buffer.byteLength,
+        );
+        columns[column] = Array.from(new Float64Array(copy));
+      }
+      if (Object.values(columns).some((values) => values.length !== meta.length)) {
+        return null;
+      }
+      return { meta, columns };
+    } catch {
+      return null;
+    }
+  }
+
+  private async save(
+    entryDir: string,
+    columns: ColumnData,
+    range: Pick<StoreMeta, "from" | "to" | "settledTo" | "validatedAt">,
+  ): Promise<void> {
+    if (!Array.isArray(columns.date) || columns.date.length === 0) return;
+
+    const numeric = Object.keys(columns).filter(
+      (column) =>
+        column !== "date" &&
+        columns[column].every((value) => typeof value === "number"),
+    );
+    const meta: StoreMeta = {
+      ...range,
+      settledTo: range.settledTo < range.to ? range.settledTo : range.to,
+      columns: numeric,
+      length: columns.date.length,
+    };
+
+    try {
+      // written side by side, then swapped in, so readers never see a mix
+      const staging = `${entryDir}.${process.pid}.${Date.now()}`;
+      await fs.mkdir(staging, { recursive: true });
+      await fs.writeFile(path.join(staging, "date.json"), JSON.stringify(columns.date));
+      for (const column of numeric) {
+        const values = Float64Array.from(columns[column]);
+        await fs.writeFile(path.join(staging, `${column}.bin`), Buffer.from(values.buffer));
+      }
+      await fs.writeFile(path.join(staging, "meta.json"), JSON.stringify(meta));
+      await fs.rm(entryDir, { recursive: true, force: true });
+      await fs.rename(staging, entryDir);
+    } catch (error: any) {
+      // the store is only an optimization
+      console.warn(`Could not store quote history in ${entryDir}: ${error?.message}`);
+    }
+  }
+
+  private static sameBar(
+    stored: ColumnData,
+    tail: ColumnData,
+    date: string,
+    numeric: string[],
+  ): boolean {
+    const i = stored.date.indexOf(date);
+    const j = (tail.date ?? []).indexOf(date);
+    if (i === -1 || j === -1) return false;
+    return numeric.every((column) => tail[column]?.[j] === stored[column][i]);
+  }
+
+  private static settledEdge(now: number): string {
+    return OhlcvStore.day(new Date(now - OhlcvStore.settleMs).toISOString());
+  }
+
+  public static toColumns(rows: QuoteRows): ColumnData {
+    const columns: ColumnData = {};
+    if (!Array.isArray(rows) || rows.length === 0) return columns;
+
+    const keys = Object.keys(rows[0]);
+    for (const key of keys) columns[key] = new Array(rows.length);
+    for (let i = 0; i < rows.length; i++) {
+      const row = rows[i];
+      for (const key of keys) columns[key][i] = row[key];
+    }
+    return columns;
+  }
+
+  private static concat(parts: ColumnData[], numeric: string[]): ColumnData {
+    const columns: ColumnData = {};
+    for (const column of ["date", ...numeric]) {
+      columns[column] = parts.flatMap((part) => part[column] ?? []);
+    }
+    return columns;
+  }
+
+  private static after(columns: ColumnData, date: string): ColumnData {
+    const index = (columns.date ?? []).findIndex((value) => value > date);
+    const from = index === -1 ? (columns.date ?? []).length : index;
+    return Object.fromEntries(
+      Object.entries(columns).map(([column, values]) => [column, values.slice(from)]),
+    );
+  }
+
+  private static slice(columns: ColumnData, start: string, end: string): ColumnData {
+    const dates: string[] = columns.date ?? [];
+    let from = 0;
+    while (from < dates.length && OhlcvStore.day(dates[from]) < start) from++;
+    let to = from;
+    while (to < dates.length && OhlcvStore.day(dates[to]) <= end) to++;
+    return Object.fromEntries(
+      Object.entries(columns).map(([column, values]) => [column, values.slice(from, to)]),
+    );
+  }
+
+  private static day(date: string): string {
+    return new Date(date).toISOString().slice(0, 10);
+  }
+
+  private static shift(day: string, days: number): string {
+    return new Date(new Date(day).getTime() + days * DAY_MS).toISOString().slice(0, 10);
+  }
+}
+
+export default OhlcvStore;
@@ -171,10 +171,10 @@ class PortfolioCalculator {
       numberOfTrades !== 0
         ? (100 * numberOfProfitableTrades) / numberOfTrades
         : 0;
+    // peak is the running maximum over the whole series by now (spreading
+    // the series into Math.max overflows the stack on long quotes)
     const maxGain =
-      (100 *
-        (Math.max(...this.strategyResult.portfolio) -
-          this.strategyResult.portfolio[0])) /
+      (100 * (peak - this.strategyResult.portfolio[0])) /
       this.strategyResult.portfolio[0];
     const returns = this.strategyResult.returns.slice(1); // dont include the first 0% return
 
@@ -0,0 +1,102 @@
+import { Buffer } from "buffer";
+import { PythonData } from "../../shared/sharedTypes";
+import SandboxArchive from "./SandboxArchive";
+
+/*
+    Packs a quote into raw little-endian column files so the harness can
+    memory-map them straight into df_init instead of parsing a JSON literal.
+
+    Prices are float64, volume is int64 when every value is a whole number
+    (matching what pandas infers from the JSON path), and timestamps are
+    fixed-width ASCII so numpy can view them as an 'S<width>' array.
+*/
+
+export type ColumnSpec = {
+  file: string;
+  dtype: string;
+  length: number;
+};
+
+const COLUMNS: (keyof PythonData)[] = [
+  "timestamp",
+  "open",
+  "high",
+  "low",
+  "close",
+  "volume",
+];
+
+class QuoteEncoder {
+  public static encode(
+    archive: SandboxArchive,
+    data: PythonData,
+    dir: string = "data",
+  ): Record<string, ColumnSpec> {
+    const columns = Object.fromEntries(
+      COLUMNS.map((column) => [column, data[column] as (number | string)[]]),
+    );
+    return QuoteEncoder.encodeColumns(archive, columns, dir);
+  }
+
+  public static encodeColumns(
+    archive: SandboxArchive,
+    columns: Record<string, (number | string)[]>,
+    dir: string,
+  ): Record<string, ColumnSpec> {
+    const manifest: Record<string, ColumnSpec> = {};
+
+    for (const [column, values] of Object.entries(columns)) {
+      const file = `${dir}/${column}.bin`;
+
+      let buffer: Buffer;
+      let dtype: string;
+      if (values.length > 0 && typeof values[0] === "string") {
+        ({ buffer, dtype } = QuoteEncoder.encodeStrings(values as string[]));
+      } else if ((values as number[]).every(Number.isSafeInteger)) {
+        buffer = QuoteEncoder.encodeInts(values as number[]);
+        dtype = "<i8";
+      } else {
+        buffer = QuoteEncoder.encodeFloats(values as number[]);
+        dtype = "<f8";
+      }
+
+      archive.add(file, buffer);
+      manifest[column] = { file, dtype, length: values.length };
+    }
+
+    return manifest;
+  }
+
+  private static encodeFloats(values: number[]): Buffer {
+    const buffer = Buffer.alloc(values.length * 8);
+    for (let i = 0; i < values.length; i++) {
+      buffer.writeDoubleLE(values[i], i * 8);
+    }
+    return buffer;
+  }
+
+  private static encodeInts(values: number[]): Buffer {
+    const buffer = Buffer.alloc(values.length * 8);
+    for (let i = 0; i < values.length; i++) {
+      buffer.writeBigInt64LE(BigInt(values[i]), i * 8);
+    }
+    return buffer;
+  }
+
+  private static encodeStrings(values: string[]): {
+    buffer: Buffer;
+    dtype: string;
+  } {
+    const width = values.reduce(
+      (max, v) => Math.max(max, Buffer.byteLength(v)),
+      1,
+    );
+    const buffer = Buffer.alloc(values.length * width); // zero padded
+    for (let i = 0; i < values.length; i++) {
+      buffer.write(values[i], i * width, "utf-8");
+    }
+    return { buffer, dtype: `S${width}` };
+  }
+}
+
+export default QuoteEncoder;
@@ -0,0 +1,313 @@
+import { createHash } from "crypto";
+import {
+  BacktestResult,
+  FormInput,
+  PythonData,
+} from "../../shared/sharedTypes";
+
+/*
+    In-memory cache of finished backtests, keyed by a hash of the normalized
+    code, the form inputs and a fingerprint of the quote the strategy ran on
+    (so a data correction is a different key). Identical runs that arrive
+    while one is executing wait for it instead of starting their own.
+
+    Only strategies that look deterministic are cached, and only runs that
+    finished without an error. Entries are evicted least-recently-used once
+    RESULT_CACHE_MAX_MB is exceeded, and expire after
+    RESULT_CACHE_TTL_MINUTES.
+*/
+
+export type ResultCacheStats = {
+  hits: number;
+  misses: number;
+  coalesced: number;
+  uncacheable: number;
+  evictions: number;
+  entries: number;
+  bytes: number;
+  maxBytes: number;
+};
+
+type CacheEntry = { result: BacktestResult; bytes: number; expires: number };
+
+// Clock, network and OS entropy: a rerun differs whatever the code seeds.
+const UNCACHEABLE = [
+  /\b(time\.(time|time_ns|perf_counter|monotonic)|datetime\.(now|utcnow|today)|date\.today|Timestamp\.(now|today)|os\.urandom)\b/,
+  /^\s*(import|from)\s+(secrets|uuid|requests|urllib|urllib3|httpx|http|socket)\b/m,
+  /\b(requests|urllib|socket|secrets|uuid)\./,
+];
+
+// numpy's generator classes, which are checked where they are created.
+const NUMPY_GENERATORS = [
+  "default_rng",
+  "RandomState",
+  "Generator",
+  "PCG64",
+  "PCG64DXSM",
+  "MT19937",
+  "Philox",
+  "SFC64",
+  "SeedSequence",
+];
+
+// Every generator needs a literal seed of its own where it is created; a
+// seed elsewhere in the code does not excuse one created without.
+const UNSEEDED_GENERATOR =
+  /\b(default_rng|RandomState|PCG64|PCG64DXSM|MT19937|Philox|SFC64|SeedSequence|Random)\(\s*(?!\d|seed\s*=\s*\d)/;
+
+// numpy's global RNG, through np.random, any other alias of numpy.random,
+// or functions imported from it.
+function usesNumpyGlobal(code: string): boolean {
+  const generator = NUMPY_GENERATORS.join("|");
+  return (
+    new RegExp(`\\b\\w+\\.random\\.(?!seed\\(|(${generator})\\()`).test(code) ||
+    /^\s*import\s+numpy\.random\b/m.test(code) ||
+    /^\s*from\s+numpy\s+import\s+[^\n]*\brandom\b/m.test(code) ||
+    importedNames(code, "numpy\\.random").some(
+      ({ name }) => !NUMPY_GENERATORS.includes(name),
+    )
+  );
+}
+
+// sklearn modules whose estimators draw no random numbers by default, and
+// the estimators in them that do.
+const DETERMINISTIC_SKLEARN =
+  /^sklearn\.(preprocessing|metrics|linear_model|neighbors|pipeline|compose|impute|svm)\b/;
+const RANDOMIZED_SKLEARN = /^(SGD|Perceptron|PassiveAggressive|LinearSV)/;
+
+// Every call of a randomized sklearn estimator or splitter passes a literal
+// random_state of its own. sklearn used through a module name (import
+// sklearn, from sklearn import ensemble, import *) cannot be followed.
+function sklearnSeeded(code: string): boolean {
+  if (/^\s*import\s+sklearn\b/m.test(code)) return false;
+  return importedNames(code, "sklearn(?:\\.\\w+)*").every(
+    ({ module, name, local }) => {
+      if (
+        DETERMINISTIC_SKLEARN.test(module) &&
+        !RANDOMIZED_SKLEARN.test(name)
+      ) {
+        return true;
+      }
+      if (module === "sklearn" || name === "*") return false;
+      const calls = [...code.matchAll(new RegExp(`\\b${local}\\(`, "g"))];
+      return calls.every(({ index }) =>
+        /\brandom_state\s*=\s*\d/.test(
+          callArguments(code, (index ?? 0) + local.length),
+        ),
+      );
+    },
+  );
+}
+
+// Global random number generators, each excused only by a literal seed of
+// its own family.
+const RANDOM_SOURCES: {
+  uses: (code: string) => boolean;
+  seeded: (code: string) => boolean;
+}[] = [
+  {
+    uses: usesNumpyGlobal,
+    seeded: (code) => /\b(np|numpy)\.random\.seed\(\s*\d/.test(code),
+  },
+  {
+    uses: (code) => /^\s*(import|from)\s+random\b/m.test(code),
+    seeded: (code) => /(?<![\w.])random\.seed\(\s*\d/.test(code),
+  },
+  {
+    uses: (code) => /^\s*(import|from)\s+torch\b/m.test(code),
+    seeded: (code) => /\bmanual_seed\(\s*\d/.test(code),
+  },
+  {
+    uses: (code) => /^\s*(import|from)\s+(tensorflow|keras)\b/m.test(code),
+    seeded: (code) => /\b(set_seed|set_random_seed)\(\s*\d/.test(code),
+  },
+  {
+    uses: (code) => /\bsklearn\b/.test(code),
+    seeded: sklearnSeeded,
+  },
+];
+
+// Names bound by `from <module> import a, b as c` lines (parenthesized
+// lists may span lines): the module, the imported name and its local name.
+function importedNames(code: string, modulePattern: string) {
+  const names: { module: string; name: string; local: string }[] = [];
+  const imports = new RegExp(
+    `^\\s*from\\s+(${modulePattern})\\s+import\\s+(\\([^)]*\\)|[^\\n]*)`,
+    "gm",
+  );
+  for (const [, module, list] of code.matchAll(imports)) {
+    for (const item of list.replace(/[()\\\n]/g, " ").split(",")) {
+      const [name, alias] = item.trim().split(/\s+as\s+/);
+      if (name) names.push({ module, name, local: alias ?? name });
+    }
+  }
+  return names;
+}
+
+// The text between the parenthesis at code[open] and its match.
+function callArguments(code: string, open: number): string {
+  let depth = 0;
+  for (let i = open; i < code.length; i++) {
+    if (code[i] === "(") depth++;
+    else if (code[i] === ")" && --depth === 0) return code.slice(open + 1, i);
+  }
+  return code.slice(open + 1);
+}
+
+class ResultCache {
+  public static readonly shared: ResultCache = new ResultCache(
+    parseFloat(process.env.RESULT_CACHE_MAX_MB || "64") * 1024 * 1024,
+    parseFloat(process.env.RESULT_CACHE_TTL_MINUTES || "60") * 60 * 1000,
+  );
+
+  private entries: Map<string, CacheEntry> = new Map(); // oldest use first
+  private inFlight: Map<string, Promise<BacktestResult>> = new Map();
+  private bytes: number = 0;
+  private counters = {
+    hits: 0,
+    misses: 0,
+    coalesced: 0,
+    uncacheable: 0,
+    evictions: 0,
+  };
+
+  constructor(
+    private readonly maxBytes: number,
+    private readonly ttl: number,
+  ) {}
+
+  // Profiled runs (HARNESS_PROFILE) always execute, so their stage timings
+  // are fresh.
+  public static enabled(): boolean {
+    return process.env.RESULT_CACHE !== "off" && !process.env.HARNESS_PROFILE;
+  }
+
+  public static isDeterministic(code: string): boolean {
+    if (UNCACHEABLE.some((pattern) => pattern.test(code))) return false;
+    if (UNSEEDED_GENERATOR.test(code)) return false;
+    return RANDOM_SOURCES.every(
+      ({ uses, seeded }) => !uses(code) || seeded(code),
+    );
+  }
+
+  public static key(
+    code: string,
+    formInputs: FormInput,
+    quote: PythonData,
+  ): string {
+    const normalizedCode = code
+      .replace(/\r\n?/g, "\n")
+      .split("\n")
+      .map((line) => line.trimEnd())
+      .join("\n")
+      .trim();
+    const inputs = {
+      ...formInputs,
+      symbol: formInputs.symbol.toUpperCase(),
+      warmupDate: formInputs.useWarmupDate ? formInputs.warmupDate : "",
+    };
+    const sortedInputs = Object.fromEntries(
+      Object.entries(inputs).sort(([a], [b]) => a.localeCompare(b)),
+    );
+
+    return createHash("sha256")
+      .update(normalizedCode)
+      .update("\0")
+      .update(JSON.stringify(sortedInputs))
+      .update("\0")
+      .update(ResultCache.fingerprint(quote))
+      .digest("hex");
+  }
+
+  // Identifies the exact bars a backtest ran on.
+  public static fingerprint(quote: PythonData): string {
+    const hash = createHash("sha256");
+    for (const column of [
+      "timestamp",
+      "open",
+      "high",
+      "low",
+      "close",
+      "volume",
+    ] as const) {
+      hash.update(JSON.stringify(quote[column])).update("\0");
+    }
+    return hash.digest("hex");
+  }
+
+  public async getOrRun(
+    key: string,
+    run: () => Promise<BacktestResult>,
+  ): Promise<BacktestResult> {
+    const cached = this.get(key);
+    if (cached) {
+      this.counters.hits++;
+      return cached;
+    }
+
+    const pending = this.inFlight.get(key);
+    if (pending) {
+      this.counters.coalesced++;
+      return pending;
+    }
+
+    this.counters.misses++;
+    const execution = run()
+      .then((result) => {
+        // a partial run would finish given another chance
+        if (!result.stderr && !result.partial) this.set(key, result);
+        return result;
+      })
+      .finally(() => this.inFlight.delete(key));
+    this.inFlight.set(key, execution);
+    return execution;
+  }
+
+  public countUncacheable(): void {
+    this.counters.uncacheable++;
+  }
+
+  public stats(): ResultCacheStats {
+    return {
+      ...this.counters,
+      entries: this.entries.size,
+      bytes: this.bytes,
+      maxBytes: this.maxBytes,
+    };
+  }
+
+  private get(key: string): BacktestResult | null {
+    const entry = this.entries.get(key);
+    if (!entry) return null;
+
+    this.entries.delete(key);
+    if (entry.expires < Date.now()) {
+      this.bytes -= entry.bytes;
+      return null;
+    }
+    this.entries.set(key, entry); // now the most recently used
+    return entry.result;
+  }
+
+  private set(key: string, result: BacktestResult): void {
+    const bytes = Buffer.byteLength(JSON.stringify(result));
+    if (bytes > this.maxBytes) return;
+
+    const previous = this.entries.get(key);
+    if (previous) {
+      this.entries.delete(key);
+      this.bytes -= previous.bytes;
+    }
+    this.entries.set(key, { result, bytes, expires: Date.now() + this.ttl });
+    this.bytes += bytes;
+
+    for (const [oldestKey, oldest] of this.entries) {
+      if (this.bytes <= this.maxBytes) break;
+      this.entries.delete(oldestKey);
+      this.bytes -= oldest.bytes;
+      this.counters.evictions++;
+    }
+  }
+}
+
+export default ResultCache;
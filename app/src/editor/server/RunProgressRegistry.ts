@@ -0,0 +1,77 @@
+import { type User } from "wasp/entities";
+import { RunProgress } from "../../shared/sharedTypes";
+
+/*
+    The latest heartbeat of every run in progress, for getRunProgress to
+    hand to the client polling it. Runs are keyed by user and a run id the
+    client picks, and dropped when they finish or RUN_PROGRESS_TTL_SECONDS
+    after their last heartbeat. In memory, like ResultCache: a client only
+    sees runs of the server instance it talks to.
+*/
+
+type Entry = { progress: RunProgress; expires: number };
+
+class RunProgressRegistry {
+  public static readonly shared: RunProgressRegistry = new RunProgressRegistry(
+    parseFloat(process.env.RUN_PROGRESS_TTL_SECONDS || "120") * 1000,
+  );
+
+  private entries: Map<string, Entry> = new Map();
+
+  constructor(private readonly ttl: number) {}
+
+  public get(userId: User["id"], runId: string): RunProgress | null {
+    const key = RunProgressRegistry.key(userId, runId);
+    const entry = this.entries.get(key);
+    if (!entry) return null;
+    if (entry.expires < Date.now()) {
+      this.entries.delete(key);
+      return null;
+    }
+    return entry.progress;
+  }
+
+  // wraps a run so its progress is reported under runId, and forgotten
+  // once it settles
+  public async track<T>(
+    userId: User["id"],
+    runId: string | undefined,
+    run: (onProgress?: (progress: RunProgress) => void) => Promise<T>,
+  ): Promise<T> {
+    try {
+      return await run(this.reporter(userId, runId));
+    } finally {
+      this.finish(userId, runId);
+    }
+  }
+
+  // onProgress for one run, or undefined when the client did not ask
+  private reporter(
+    userId: User["id"],
+    runId: string | undefined,
+  ): ((progress: RunProgress) => void) | undefined {
+    if (!runId) return undefined;
+    const key = RunProgressRegistry.key(userId, runId);
+    return (progress) => {
+      this.sweep();
+      this.entries.set(key, { progress, expires: Date.now() + this.ttl });
+    };
+  }
+
+  private finish(userId: User["id"], runId: string | undefined): void {
+    if (runId) this.entries.delete(RunProgressRegistry.key(userId, runId));
+  }
+
+  private sweep(): void {
+    const now = Date.now();
+    for (const [key, entry] of this.entries) {
+      if (entry.expires < now) this.entries.delete(key);
+    }
+  }
+
+  private static key(userId: User["id"], runId: string): string {
+    return `${userId}:${runId}`;
+  }
+}
+
+export default RunProgressRegistry;
@@ -1,5 +1,43 @@
 import { HttpError } from "wasp/server";
-import { UserDefinedData } from "../../shared/sharedTypes";
+import {
+  PartialRun,
+  Robustness,
+  Stat,
+  StrategyResult,
+  SweepBest,
+  SweepRow,
+  UserDefinedData,
+} from "../../shared/sharedTypes";
+
+// The portfolio series the harness computes after the strategy runs.
+export type PortfolioSeries = Pick<
+  StrategyResult,
+  | "returns"
+  | "portfolio"
+  | "portfolioWithCosts"
+  | "cash"
+  | "equity"
+  | "cashWithCosts"
+  | "equityWithCosts"
+>;
+
+// One harness stage, as measured by ubacktest/profiling.py (seconds, bytes).
+export type HarnessStage = {
+  stage: string;
+  wall: number;
+  cpu: number;
+  peakBytes?: number;
+};
+
+// cached_fit() lookups during the run (see ubacktest/modelcache.py).
+export type ModelCacheStats = {
+  hits: number;
+  misses: number;
+  stores: number;
+  evictions: number;
+  uncached: number; // fits while the cache was off
+  enabled: boolean;
+};
 
 class STDParser {
   private stdout: string;
@@ -13,9 +51,17 @@ class STDParser {
   }
 
   public parse() {
-    const parsedData = STDParser.parsePythonOutput(this.stdout, this.key);
+    const { parsedData, debugOutput } = STDParser.splitResultFrame(
+      this.stdout,
+      this.key
+    );
     let signal: number[] = [];
     let userDefinedData: UserDefinedData = {};
+    let portfolio: PortfolioSeries | null = null;
+    let statistics: Stat | null = null;
+    let robustness: Robustness | null = null;
+    let profile: string | null = null;
+    let partial: PartialRun | null = null;
 
     if (parsedData) {
       signal = parsedData.result.signal;
@@ -30,6 +76,14 @@ class STDParser {
             value.every((item) => typeof item === "number")
         )
       );
+      portfolio = parsedData.portfolio
+        ? STDParser.decodePortfolio(parsedData.portfolio)
+        : null;
+      statistics = parsedData.statistics ?? null;
+      robustness = parsedData.robustness ?? null;
+      profile =
+        typeof parsedData.profile === "string" ? parsedData.profile : null;
+      partial = parsedData.partial ?? null;
     } else if (!parsedData && !this.stderr) {
       throw new HttpError(
         503,
@@ -37,38 +91,148 @@ class STDParser {
       );
     }
 
-    this.stdout = STDParser.stripDebugOutput(this.stdout, this.key);
-    const lenLim = 10000;
-    this.stdout =
-      this.stdout.length > lenLim
-        ? `${this.stdout.slice(0, lenLim)}... (${
-            this.stdout.length - lenLim
-          } more characters)`
-        : this.stdout;
+    this.stdout = STDParser.trimDebugOutput(debugOutput);
 
     return {
       stdout: this.stdout,
       stderr: this.stderr,
       signal: signal,
       userDefinedData: userDefinedData,
+      portfolio: portfolio,
+      statistics: statistics,
+      robustness: robustness,
+      profile: profile,
+      partial: partial,
+      stages: STDParser.stagesOf(parsedData),
+      modelCache: STDParser.modelCacheOf(parsedData),
     };
   }
 
-  private static parsePythonOutput(stdout: string, uniqueKey: string) {
-    const regex = new RegExp(
-      `${uniqueKey}START${uniqueKey}(.*?)${uniqueKey}END${uniqueKey}`,
-      "s"
+  public parseSweep() {
+    const { parsedData, debugOutput } = STDParser.splitResultFrame(
+      this.stdout,
+      this.key
     );
-    const match = stdout.match(regex);
-    return match ? JSON.parse(match[1]) : null;
+    let sweep: {
+      rows: SweepRow[];
+      best: (Omit<SweepBest, "strategyResult"> & {
+        signal: number[];
+        portfolio: PortfolioSeries;
+      })[];
+      workers: number;
+    } | null = null;
+
+    if (parsedData?.sweep) {
+      const { rows, best, workers } = parsedData.sweep;
+      sweep = {
+        rows,
+        workers,
+        best: best.map((entry: any) => ({
+          ...entry,
+          portfolio: STDParser.decodePortfolio(entry.portfolio),
+        })),
+      };
+    } else if (!parsedData && !this.stderr) {
+      throw new HttpError(
+        503,
+        "No output extracted from the execution engine. This usually means you're printing too much to stdout."
+      );
+    }
+
+    this.stdout = STDParser.trimDebugOutput(debugOutput);
+
+    return {
+      stdout: this.stdout,
+      stderr: this.stderr,
+      sweep: sweep,
+      stages: STDParser.stagesOf(parsedData),
+      modelCache: STDParser.modelCacheOf(parsedData),
+    };
   }
 
-  private static stripDebugOutput(stdout: string, uniqueKey: string) {
-    const regex = new RegExp(
-      `${uniqueKey}START${uniqueKey}(.*?)${uniqueKey}END${uniqueKey}`,
-      "s"
+  public parseBatch() {
+    const { parsedData, debugOutput } = STDParser.splitResultFrame(
+      this.stdout,
+      this.key
     );
-    return stdout.replace(regex, "").trim();
+    let batch: {
+      slices: { statistics: Stat | null; error: string | null }[];
+      workers: number;
+    } | null = null;
+
+    if (parsedData?.batch) {
+      batch = parsedData.batch;
+    } else if (!parsedData && !this.stderr) {
+      throw new HttpError(
+        503,
+        "No output extracted from the execution engine. This usually means you're printing too much to stdout."
+      );
+    }
+
+    this.stdout = STDParser.trimDebugOutput(debugOutput);
+
+    return {
+      stdout: this.stdout,
+      stderr: this.stderr,
+      batch: batch,
+      stages: STDParser.stagesOf(parsedData),
+      modelCache: STDParser.modelCacheOf(parsedData),
+    };
+  }
+
+  // Only present when the harness ran with HARNESS_PROFILE set.
+  private static stagesOf(parsedData: any): HarnessStage[] | null {
+    return Array.isArray(parsedData?.stages) ? parsedData.stages : null;
+  }
+
+  // Only present when the strategy called cached_fit().
+  private static modelCacheOf(parsedData: any): ModelCacheStats | null {
+    return parsedData?.modelCache ?? null;
+  }
+
+  private static trimDebugOutput(debugOutput: string): string {
+    const trimmed = debugOutput.trim();
+    const lenLim = 10000;
+    return trimmed.length > lenLim
+      ? `${trimmed.slice(0, lenLim)}... (${
+          trimmed.length - lenLim
+        } more characters)`
+      : trimmed;
+  }
+
+  // Rounded series arrive as integer multiples of 1 / scale.
+  private static decodePortfolio(encoded: {
+    scale: number;
+    rounded: Record<string, number[]>;
+    values: Record<string, (number | null)[]>;
+  }): PortfolioSeries {
+    const series: Record<string, (number | null)[]> = { ...encoded.values };
+    for (const [name, units] of Object.entries(encoded.rounded)) {
+      series[name] = units.map((unit) => unit / encoded.scale);
+    }
+    return series as PortfolioSeries;
+  }
+
+  // The harness ends stdout with "<payload>\n<key><payload length>", so the
+  // frame is located from the end without scanning the debug output.
+  private static splitResultFrame(stdout: string, uniqueKey: string) {
+    const trailerStart = stdout.lastIndexOf(uniqueKey);
+    if (trailerStart === -1) return { parsedData: null, debugOutput: stdout };
+
+    const payloadLength = parseInt(
+      stdout.slice(trailerStart + uniqueKey.length),
+      10
+    );
+    const payloadEnd = trailerStart - 1; // newline before the trailer
+    const payloadStart = payloadEnd - payloadLength;
+    if (isNaN(payloadLength) || payloadStart < 0) {
+      return { parsedData: null, debugOutput: stdout };
+    }
+
+    return {
+      parsedData: JSON.parse(stdout.slice(payloadStart, payloadEnd)),
+      debugOutput: stdout.slice(0, payloadStart),
+    };
   }
 }
 
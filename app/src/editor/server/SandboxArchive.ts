@@ -0,0 +1,116 @@
+import { deflateRawSync } from "zlib";
+import { Buffer } from "buffer";
+
+/*
+    Builds the zip that Judge0 unpacks next to the submitted script
+    (the `additional_files` field). Entries are deflated and the archive is
+    returned base64-encoded, ready to drop into the submission body.
+*/
+
+type ArchiveEntry = {
+  name: string;
+  data: Buffer;
+};
+
+class SandboxArchive {
+  private entries: ArchiveEntry[] = [];
+
+  private static crcTable: Uint32Array | null = null;
+
+  public add(name: string, data: Buffer | string): void {
+    this.entries.push({
+      name,
+      data: typeof data === "string" ? Buffer.from(data, "utf-8") : data,
+    });
+  }
+
+  public isEmpty(): boolean {
+    return this.entries.length === 0;
+  }
+
+  public toBase64(): string {
+    return this.toBuffer().toString("base64");
+  }
+
+  public toBuffer(): Buffer {
+    const localParts: Buffer[] = [];
+    const centralParts: Buffer[] = [];
+    let offset = 0;
+
+    for (const { name, data } of this.entries) {
+      const fileName = Buffer.from(name, "utf-8");
+      const compressed = deflateRawSync(data);
+      const crc = SandboxArchive.crc32(data);
+
+      const local = Buffer.alloc(30);
+      local.writeUInt32LE(0x04034b50, 0); // local file header signature
+      local.writeUInt16LE(20, 4); // version needed to extract
+      local.writeUInt16LE(0, 6); // flags
+      local.writeUInt16LE(8, 8); // deflate
+      local.writeUInt32LE(0, 10); // mod time + date
+      local.writeUInt32LE(crc, 14);
+      local.writeUInt32LE(compressed.length, 18);
+      local.writeUInt32LE(data.length, 22);
+      local.writeUInt16LE(fileName.length, 26);
+      local.writeUInt16LE(0, 28); // extra field length
+
+      const central = Buffer.alloc(46);
+      central.writeUInt32LE(0x02014b50, 0); // central directory signature
+      central.writeUInt16LE(20, 4); // version made by
+      central.writeUInt16LE(20, 6); // version needed to extract
+      central.writeUInt16LE(0, 8);
+      central.writeUInt16LE(8, 10);
+      central.writeUInt32LE(0, 12);
+      central.writeUInt32LE(crc, 16);
+      central.writeUInt32LE(compressed.length, 20);
+      central.writeUInt32LE(data.length, 24);
+      central.writeUInt16LE(fileName.length, 28);
+      central.writeUInt16LE(0, 30); // extra field length
+      central.writeUInt16LE(0, 32); // comment length
+      central.writeUInt16LE(0, 34); // disk number
+      central.writeUInt16LE(0, 36); // internal attributes
+      central.writeUInt32LE(0, 38); // external attributes
+      central.writeUInt32LE(offset, 42);
+
+      localParts.push(local, fileName, compressed);
+      centralParts.push(central, fileName);
+      offset += local.length + fileName.length + compressed.length;
+    }
+
+    const centralDirectory = Buffer.concat(centralParts);
+    const end = Buffer.alloc(22);
+    end.writeUInt32LE(0x06054b50, 0); // end of central directory signature
+    end.writeUInt16LE(0, 4);
+    end.writeUInt16LE(0, 6);
+    end.writeUInt16LE(this.entries.length, 8);
+    end.writeUInt16LE(this.entries.length, 10);
+    end.writeUInt32LE(centralDirectory.length, 12);
+    end.writeUInt32LE(offset, 16);
+    end.writeUInt16LE(0, 20);
+
+    return Buffer.concat([...localParts, centralDirectory, end]);
+  }
+
+  private static crc32(data: Buffer): number {
+    if (!SandboxArchive.crcTable) {
+      const table = new Uint32Array(256);
+      for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+          c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+      }
+      SandboxArchive.crcTable = table;
+    }
+
+    const table = SandboxArchive.crcTable;
+    let crc = 0xffffffff;
+    for (let i = 0; i < data.length; i++) {
+      crc = table[(crc ^ data[i]) & 0xff] ^ (crc >>> 8);
+    }
+    return (crc ^ 0xffffffff) >>> 0;
+  }
+}
+
+export default SandboxArchive;
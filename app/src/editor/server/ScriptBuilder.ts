@@ -1,81 +1,456 @@
-import { PythonData } from "../../shared/sharedTypes";
+import { createHmac } from "crypto";
+import {
+  chmodSync,
+  chownSync,
+  existsSync,
+  mkdirSync,
+  readdirSync,
+  rmSync,
+  statSync,
+} from "fs";
+import { tmpdir } from "os";
+import { join } from "path";
+import { PythonData, Stat, SweepGrid } from "../../shared/sharedTypes";
+import QuoteEncoder from "./QuoteEncoder";
+import SandboxArchive from "./SandboxArchive";
+import {
+  CPU_TIME_LIMIT,
+  MAX_THREADS,
+  MEMORY_LIMIT_KB,
+  WALL_TIME_LIMIT,
+} from "./executors/limits";
+import { sandboxUser, type SandboxUser } from "./executors/sandboxEnv";
+import SandboxPackage from "./sandbox/SandboxPackage";
+
+// The prices and trading cost the portfolio is evaluated on (the quote after
+// the warmup cutoff, exactly as the server sends it to the frontend).
+export type PricingInput = {
+  close: number[];
+  timestamp: PythonData["timestamp"];
+  costPerTrade: number;
+};
+
+// What to sweep and how to rank it; memoryLimit (KB) sizes the worker pool.
+export type SweepInput = {
+  grid: SweepGrid;
+  topN: number;
+  rankBy: keyof Stat;
+  memoryLimit: number;
+};
+
+// One batch slice: its quote from the warmup date on, the date results start
+// at, and the prices its portfolio is evaluated on.
+export type BatchSliceInput = {
+  quote: PythonData;
+  startDate: string;
+  pricing: Pick<PricingInput, "close" | "timestamp">;
+};
 
 class ScriptBuilder {
+  // matches the length STDParser trims debug output to
+  private static readonly debugOutputLimit: number = 10000;
+
+  // The archive always carries the ubacktest package and the pricing
+  // columns; with binaryQuote the quote is shipped in it as binary column
+  // files too, rather than inlined into the script as a JSON literal.
+  // profileStrategy returns a profiler report of strategy() with the result;
+  // userId picks the user's own model cache.
   public static build(
     code: string,
     toInsertInPython: PythonData,
     startDate: string,
     uniqueKey: string,
+    archive: SandboxArchive,
+    pricing: PricingInput,
+    binaryQuote: boolean = false,
+    profileStrategy: boolean = false,
+    userId: string | null = null,
   ): string {
-    const m = `${code}
+    const pricingInput = ScriptBuilder.addPricing(archive, pricing);
+
+    const m = `${ScriptBuilder.preamble(code, userId)}
+${ScriptBuilder.loadQuote(toInsertInPython, archive, binaryQuote)}
+${ScriptBuilder.captureStdout()}
+try:
+    with ubacktestStages.stage("strategy"):
+        ${profileStrategy ? "df, strategyProfile = ubacktestProgress.call(ubacktestProfiling.profile_call, strategy, df_init)" : "df = ubacktestProgress.call(strategy, df_init)"}
+
+    debugStdout.muted = True
+
+    with ubacktestStages.stage("checks"):
+        df = ubacktestChecks.check_result(df, initHeight)
+        # flat from where a strategy stopped at the soft deadline
+        partial = ubacktestProgress.apply_partial(df)
+
+        df = df[df['timestamp'] >= ${JSON.stringify(startDate)}]
+
+    # The portfolio is evaluated here, on the same rounded signal, so only
+    # the final series and statistics go back to the server.
+    with ubacktestStages.stage("portfolio"):
+        pricingInput = json.loads('${JSON.stringify(pricingInput)}')
+        pricing = ubacktestColumns.load_columns(pricingInput["manifest"])
+        roundedSignal = df['signal'].round(3).to_numpy()
+        portfolioSeries, portfolioStatistics = ubacktestPortfolio.evaluate(
+            roundedSignal, pricing, pricingInput["costPerTrade"]
+        )
+${ScriptBuilder.robustness()}
+
+    with ubacktestStages.stage("to_dict"):
+        signalToReturn = df[['signal']].round(3).to_dict('list')
+        colsToExclude = {"open", "close", "high", "low", "volume", "timestamp", "signal"}
+
+        middleOutput = {
+            "result": signalToReturn,
+            "data": df.loc[:, ~df.columns.isin(colsToExclude)].iloc[:, :6].fillna(0).round(4).to_dict('list'),
+            "portfolio": ubacktestPortfolio.encode(portfolioSeries),
+            "statistics": portfolioStatistics,
+            "robustness": robustness,
+        }
+        if partial is not None:
+            middleOutput["partial"] = partial${profileStrategy ? `
+        middleOutput["profile"] = strategyProfile` : ""}
+${ScriptBuilder.resultFrame(uniqueKey)}`;
+
+    return m;
+  }
+
+  // Same data loading and output handling as build(), but strategy(df,
+  // **params) is evaluated over the whole grid (see ubacktest/sweep.py).
+  // The sweep settings travel as a file, since grid values are user input.
+  public static buildSweep(
+    code: string,
+    toInsertInPython: PythonData,
+    startDate: string,
+    uniqueKey: string,
+    archive: SandboxArchive,
+    pricing: PricingInput,
+    sweep: SweepInput,
+    binaryQuote: boolean = false,
+    userId: string | null = null,
+  ): string {
+    const pricingInput = ScriptBuilder.addPricing(archive, pricing);
+    archive.add("sweep.json", JSON.stringify({ ...sweep, ...pricingInput }));
+
+    return `${ScriptBuilder.preamble(code, userId)}
+${ScriptBuilder.loadQuote(toInsertInPython, archive, binaryQuote)}
+${ScriptBuilder.captureStdout()}
+try:
+    with open("sweep.json") as sweepFile:
+        sweepInput = json.load(sweepFile)
+
+    # only this process's CPU time: the pool's workers are not included
+    with ubacktestStages.stage("sweep"):
+        middleOutput = {
+            "sweep": ubacktestSweep.run(
+                strategy,
+                df_init,
+                sweepInput["grid"],
+                ${JSON.stringify(startDate)},
+                ubacktestColumns.load_columns(sweepInput["manifest"]),
+                sweepInput["costPerTrade"],
+                sweepInput["topN"],
+                sweepInput["rankBy"],
+                sweepInput["memoryLimit"],
+            ),
+        }
+${ScriptBuilder.resultFrame(uniqueKey)}`;
+  }
+
+  // One strategy over many quotes (see ubacktest/batch.py). Each slice is
+  // always shipped as binary columns under slices/<i>/, so a batch of long
+  // quotes never has to fit in the script itself.
+  public static buildBatch(
+    code: string,
+    slices: BatchSliceInput[],
+    uniqueKey: string,
+    archive: SandboxArchive,
+    costPerTrade: number,
+    memoryLimit: number,
+    userId: string | null = null,
+  ): string {
+    SandboxPackage.addTo(archive);
+    const sliceInputs = slices.map((slice, i) => ({
+      quote: QuoteEncoder.encode(archive, slice.quote, `slices/${i}/data`),
+      pricing: QuoteEncoder.encodeColumns(
+        archive,
+        { close: slice.pricing.close, timestamp: slice.pricing.timestamp },
+        `slices/${i}/pricing`,
+      ),
+      startDate: slice.startDate,
+    }));
+    archive.add(
+      "batch.json",
+      JSON.stringify({
+        slices: sliceInputs,
+        costPerTrade: Number(costPerTrade) || 0,
+        memoryLimit,
+      }),
+    );
+
+    return `${ScriptBuilder.preamble(code, userId)}
+${ScriptBuilder.captureStdout()}
+try:
+    with open("batch.json") as batchFile:
+        batchInput = json.load(batchFile)
+
+    # only this process's CPU time: the pool's workers are not included
+    with ubacktestStages.stage("batch"):
+        middleOutput = {
+            "batch": ubacktestBatch.run(
+                strategy,
+                batchInput["slices"],
+                batchInput["costPerTrade"],
+                batchInput["memoryLimit"],
+            ),
+        }
+${ScriptBuilder.resultFrame(uniqueKey)}`;
+  }
+
+  private static addPricing(archive: SandboxArchive, pricing: PricingInput) {
+    SandboxPackage.addTo(archive);
+    const manifest = QuoteEncoder.encodeColumns(
+      archive,
+      { close: pricing.close, timestamp: pricing.timestamp },
+      "pricing",
+    );
+    return { manifest, costPerTrade: Number(pricing.costPerTrade) || 0 };
+  }
+
+  // HARNESS_PROFILE=time reports each stage's wall and CPU time in the
+  // result; HARNESS_PROFILE=memory adds its tracemalloc peak.
+  private static profileOptions(): string {
+    const mode = process.env.HARNESS_PROFILE;
+    const enabled = mode === "time" || mode === "memory";
+    return `enabled=${enabled ? "True" : "False"}, memory=${mode === "memory" ? "True" : "False"}`;
+  }
+
+  // Trained models stay in a directory of the user's own under
+  // MODEL_CACHE_DIR (see ubacktest/modelcache.py), and are signed with a key
+  // derived from MODEL_CACHE_SECRET for that user. A job keeps its user's
+  // directory under MODEL_CACHE_USER_MAX_MB; before each job the server,
+  // which alone can list every directory, trims the whole cache back under
+  // MODEL_CACHE_MAX_MB. Only the local executors keep one, and only once
+  // jobs run as EXECUTOR_UID rather than as the server (which holds the
+  // secret). MODEL_CACHE=off turns it off; Judge0 has no shared disk, so
+  // there cached_fit() always fits.
+  private static modelCache(userId: string | null): string {
+    const local = ["local", "pool"].includes(process.env.CODE_EXECUTOR || "");
+    const secret = process.env.MODEL_CACHE_SECRET;
+    if (!local || process.env.MODEL_CACHE === "off") return "";
+    if (!userId || !secret || !process.env.EXECUTOR_UID) return "";
 
+    const derive = (purpose: string) =>
+      createHmac("sha256", secret).update(`${purpose}:${userId}`).digest("hex");
+    const root =
+      process.env.MODEL_CACHE_DIR || join(tmpdir(), "ubacktest-models");
+    const directory = join(root, derive("directory").slice(0, 32));
+    const maxBytes =
+      parseFloat(process.env.MODEL_CACHE_MAX_MB || "512") * 1024 * 1024;
+    const userMaxBytes =
+      parseFloat(process.env.MODEL_CACHE_USER_MAX_MB || "128") * 1024 * 1024;
+    try {
+      const user = sandboxUser() as SandboxUser;
+      ScriptBuilder.prepareModelCache(root, directory, user);
+      ScriptBuilder.evictModelCache(root, maxBytes);
+    } catch (error) {
+      console.error("Model cache unavailable:", error);
+      return "";
+    }
+    return `ubacktestModelCache.configure(${JSON.stringify(directory)}, ${Math.round(Math.min(userMaxBytes, maxBytes))}, "${derive("signing")}")\n`;
+  }
+
+  // Jobs may pass through the root but not list it, so a user's directory
+  // is only reachable by its name, which the script of that user's runs
+  // alone carries.
+  private static prepareModelCache(
+    root: string,
+    directory: string,
+    user: SandboxUser,
+  ): void {
+    mkdirSync(root, { recursive: true });
+    chmodSync(root, 0o711);
+    if (existsSync(directory)) return;
+    mkdirSync(directory);
+    chmodSync(directory, 0o700);
+    chownSync(directory, user.uid, user.gid);
+  }
+
+  // Least recently used entries of every user go first (jobs touch an entry
+  // when they load it), until the cache fits in maxBytes.
+  private static evictModelCache(root: string, maxBytes: number): void {
+    const entries: { path: string; size: number; used: number }[] = [];
+    for (const user of readdirSync(root, { withFileTypes: true })) {
+      if (!user.isDirectory()) continue;
+      for (const name of readdirSync(join(root, user.name))) {
+        if (!name.endsWith(".model")) continue;
+        const path = join(root, user.name, name);
+        const status = statSync(path, { throwIfNoEntry: false });
+        if (status) {
+          entries.push({ path, size: status.size, used: status.mtimeMs });
+        }
+      }
+    }
+
+    let total = entries.reduce((sum, entry) => sum + entry.size, 0);
+    for (const entry of entries.sort((a, b) => a.used - b.used)) {
+      if (total <= maxBytes) break;
+      rmSync(entry.path, { force: true });
+      total -= entry.size;
+    }
+  }
+
+  // Heartbeats, and the soft deadline (see ubacktest/progress.py): from
+  // SOFT_DEADLINE (default 0.8) of the time limits on, strategies are asked
+  // to stop; SOFT_DEADLINE=off only sends heartbeats.
+  private static progress(): string {
+    const setting = process.env.SOFT_DEADLINE || "0.8";
+    const share = parseFloat(setting);
+    const soft =
+      setting === "off" ? "None" : share > 0 && share < 1 ? `${share}` : "0.8";
+    return `ubacktestProgress.start(${CPU_TIME_LIMIT}, ${WALL_TIME_LIMIT}, soft=${soft})`;
+  }
+
+  // Bootstrap intervals and null-strategy p-values for the statistics (see
+  // ubacktest/robustness.py). ROBUSTNESS_PATHS=0 turns them off; long
+  // quotes get fewer paths, so paths x bars stays under ROBUSTNESS_MAX_CELLS.
+  // They are skipped past the soft deadline, when time is short.
+  private static robustness(): string {
+    const paths = parseInt(process.env.ROBUSTNESS_PATHS || "10000");
+    const maxCells = parseInt(process.env.ROBUSTNESS_MAX_CELLS || "15000000");
+    if (!(paths > 0)) return `    robustness = None`;
+    return `    with ubacktestStages.stage("robustness"):
+        robustness = None if ubacktestProgress.stopping() else ubacktestRobustness.analyze(
+            portfolioSeries, roundedSignal, pricing, portfolioStatistics, paths=${paths}, max_cells=${maxCells}
+        )`;
+  }
+
+  // User code, imports and the stdout capture class
+  private static preamble(code: string, userId: string | null): string {
+    return `${code}
+
+import io
 import json
 import pandas as pd
 import sys
 import warnings
-import os
+import ubacktest.batch as ubacktestBatch
+import ubacktest.checks as ubacktestChecks
+import ubacktest.columns as ubacktestColumns
+import ubacktest.modelcache as ubacktestModelCache
+import ubacktest.pool as ubacktestPool
+import ubacktest.portfolio as ubacktestPortfolio
+import ubacktest.profiling as ubacktestProfiling
+import ubacktest.progress as ubacktestProgress
+import ubacktest.robustness as ubacktestRobustness
+import ubacktest.sweep as ubacktestSweep
 
 original_stdout = sys.stdout
+ubacktestStages = ubacktestProfiling.Stages(${ScriptBuilder.profileOptions()})
+
+# pools the strategy starts itself (ubacktest.walkforward) stay within these
+ubacktestPool.limits.update(memory_kb=${MEMORY_LIMIT_KB}, threads=${MAX_THREADS})
+${ScriptBuilder.modelCache(userId)}${ScriptBuilder.progress()}
 
 # Redirect warnings to stdout
 warnings.simplefilter("always")
 warnings.showwarning = lambda message, category, filename, lineno, file=None, line=None: \
     print(f"{category.__name__}: {message}", file=sys.stdout)
 
-jsonCodeUnformatted = '${JSON.stringify(toInsertInPython)}'
-jsonCodeFormatted = json.loads(jsonCodeUnformatted)
-
-df_init = pd.DataFrame(jsonCodeFormatted)
-initHeight = df_init.shape[0]
-
-if initHeight <= 3:
-    raise Exception("Sorry, we detected less than 3 data points and had trouble applying your strategy.")
-
-df = strategy(df_init)
-
-sys.stdout = open(os.devnull, 'w')
+# Debug output is captured (and capped) while the strategy runs, so no amount
+# of printing can push the result frame out of stdout.
+class CappedStdout(io.TextIOBase):
+    def __init__(self, limit):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.dropped = 0
+        self.muted = False
 
-if not isinstance(df, pd.DataFrame):
-    raise Exception("You must return a dataframe from your strategy.")
+    def writable(self):
+        return True
 
-df.columns = df.columns.str.lower()
+    def write(self, text):
+        if self.muted:
+            return len(text)
+        room = max(0, self.limit - self.size)
+        self.parts.append(text[:room])
+        self.size += min(room, len(text))
+        self.dropped += max(0, len(text) - room)
+        return len(text)
 
-if 'signal' not in df.columns:
-    raise Exception("There is no 'signal' column in the table.")
+    def getvalue(self):
+        value = "".join(self.parts)
+        if self.dropped:
+            value += f"... ({self.dropped} more characters)"
+        return value
+`;
+  }
 
-if (df.columns == 'signal').sum() > 1:
-    raise Exception("There are two or more 'signal' columns in the table.")
+  // df_init and its height, for the single-quote scripts
+  private static loadQuote(
+    toInsertInPython: PythonData,
+    archive: SandboxArchive,
+    binaryQuote: boolean,
+  ): string {
+    return `${binaryQuote ? ScriptBuilder.binaryLoader(archive, toInsertInPython) : ScriptBuilder.jsonLoader(toInsertInPython)}
+initHeight = df_init.shape[0]
 
-if df['signal'].empty:
-    raise Exception("'signal' column is empty.")
+if initHeight <= 3:
+    raise Exception("Sorry, we detected less than 3 data points and had trouble applying your strategy.")
+`;
+  }
 
-if (df['signal'] > 1).any() or (df['signal'] < -1).any():
-    raise Exception("'signal' column contains values outside the range [-1, 1].")
+  // Starts capturing debug output; ends ready for a try:
+  private static captureStdout(): string {
+    return `debugStdout = CappedStdout(${ScriptBuilder.debugOutputLimit})
+sys.stdout = debugStdout
+`;
+  }
 
-if not df.index.is_unique:
-    raise Exception("Table index is not unique.")
+  // Closes the try: opened after the preamble and writes middleOutput as the
+  // result frame: payload, then a trailer line "<key><payload length>" that
+  // the server reads from the end of stdout.
+  private static resultFrame(uniqueKey: string): string {
+    return `finally:
+    sys.stdout = original_stdout
+    original_stdout.write(debugStdout.getvalue())
 
-if df.shape[0] != initHeight:
-    raise Exception("The height of the dataframe has changed upon applying your strategy.")
+modelCacheStats = ubacktestModelCache.stats()
+if modelCacheStats:
+    middleOutput["modelCache"] = modelCacheStats
 
-df['signal'] = df['signal'].ffill().fillna(0)
+with ubacktestStages.stage("json.dumps"):
+    output = json.dumps(middleOutput)
+# profiled runs are serialized again, so their stages include json.dumps
+if ubacktestStages.enabled:
+    middleOutput["stages"] = ubacktestStages.records
+    output = json.dumps(middleOutput)
+original_stdout.write("\\n" + output + "\\n${uniqueKey}" + str(len(output)) + "\\n")`;
+  }
 
-df = df[df['timestamp'] >= ${JSON.stringify(startDate)}]
+  private static jsonLoader(toInsertInPython: PythonData): string {
+    return `jsonCodeUnformatted = '${JSON.stringify(toInsertInPython)}'
+with ubacktestStages.stage("json.loads"):
+    jsonCodeFormatted = json.loads(jsonCodeUnformatted)
 
-signalToReturn = df[['signal']].round(3).to_dict('list')
-colsToExclude = {"open", "close", "high", "low", "volume", "timestamp", "signal"}
+with ubacktestStages.stage("DataFrame"):
+    df_init = pd.DataFrame(jsonCodeFormatted)`;
+  }
 
-middleOutput = {
-    "result": signalToReturn,
-    "data": df.loc[:, ~df.columns.isin(colsToExclude)].iloc[:, :6].fillna(0).round(4).to_dict('list'),
-}
-output = "${uniqueKey}START${uniqueKey}" + json.dumps(middleOutput) + "${uniqueKey}END${uniqueKey}"
+  // Columns are mapped copy-on-write, so strategies can still edit df_init
+  // in place without touching the files on disk.
+  private static binaryLoader(
+    archive: SandboxArchive,
+    toInsertInPython: PythonData,
+  ): string {
+    const manifest = QuoteEncoder.encode(archive, toInsertInPython);
+    return `columnManifest = json.loads('${JSON.stringify(manifest)}')
 
-sys.stdout.close()
-sys.stdout = original_stdout
-print(output)`;
+with ubacktestStages.stage("load columns"):
+    quoteColumns = ubacktestColumns.load_columns(columnManifest)
 
-    return m;
+with ubacktestStages.stage("DataFrame"):
+    df_init = pd.DataFrame(quoteColumns, copy=False)`;
   }
 }
 
@@ -0,0 +1,75 @@
+import { type User } from "wasp/entities";
+import { FormInput } from "../../shared/sharedTypes";
+
+/*
+    The signal of a user's latest runs, for repriceSignals to price again
+    without trusting arrays the client sends back. Runs are keyed by user
+    and the run id the client picked; a user keeps their REPRICE_MAX_RUNS
+    most recent, each for REPRICE_TTL_MINUTES. In memory, like
+    RunProgressRegistry: only the server instance that ran it can reprice
+    a run.
+*/
+
+export type PricedSeries = {
+  formInputs: FormInput;
+  timestamp: (number | string)[];
+  close: number[];
+  signal: number[];
+};
+
+type Entry = { series: PricedSeries; expires: number };
+
+class SignalRegistry {
+  public static readonly shared: SignalRegistry = new SignalRegistry(
+    parseFloat(process.env.REPRICE_TTL_MINUTES || "60") * 60 * 1000,
+    parseInt(process.env.REPRICE_MAX_RUNS || "5"),
+  );
+
+  private entries: Map<string, Entry> = new Map(); // oldest first
+
+  constructor(
+    private readonly ttl: number,
+    private readonly maxRunsPerUser: number,
+  ) {}
+
+  public get(userId: User["id"], runId: string): PricedSeries | null {
+    const key = SignalRegistry.key(userId, runId);
+    const entry = this.entries.get(key);
+    if (!entry) return null;
+    if (entry.expires < Date.now()) {
+      this.entries.delete(key);
+      return null;
+    }
+    return entry.series;
+  }
+
+  public remember(
+    userId: User["id"],
+    runId: string,
+    series: PricedSeries,
+  ): void {
+    this.sweep();
+    const key = SignalRegistry.key(userId, runId);
+    this.entries.delete(key);
+    this.entries.set(key, { series, expires: Date.now() + this.ttl });
+
+    const prefix = SignalRegistry.key(userId, "");
+    const runs = [...this.entries.keys()].filter((k) => k.startsWith(prefix));
+    for (const oldest of runs.slice(0, runs.length - this.maxRunsPerUser)) {
+      this.entries.delete(oldest);
+    }
+  }
+
+  private sweep(): void {
+    const now = Date.now();
+    for (const [key, entry] of this.entries) {
+      if (entry.expires < now) this.entries.delete(key);
+    }
+  }
+
+  private static key(userId: User["id"], runId: string): string {
+    return `${userId}:${runId}`;
+  }
+}
+
+export default SignalRegistry;
@@ -0,0 +1,192 @@
+import { HttpError } from "wasp/server";
+import { RepricingRow, StrategyResult } from "../../shared/sharedTypes";
+import PortfolioCalculator from "./PortfolioCalculator";
+
+/*
+    Prices an already computed signal under other trading costs and leverage
+    scalings, without running the strategy again.
+
+    Only the with-costs portfolio depends on the cost, so for each leverage
+    the no-cost portfolio and statistics come from PortfolioCalculator once,
+    and every cost level is then stepped through the bars together (one
+    Float64Array slot per cost). Each slot follows PortfolioCalculator's
+    arithmetic exactly, so a scenario matches a full run at that cost.
+*/
+
+class SignalRepricer {
+  private static readonly maxScenarios: number = parseInt(
+    process.env.REPRICE_MAX_SCENARIOS || "400",
+  );
+  // above the ~1500 data points StockDataConnection allows a backtest, which
+  // undercounts weekly and monthly bars
+  private static readonly maxBars: number = parseInt(
+    process.env.REPRICE_MAX_BARS || "3000",
+  );
+  private readonly decimalPlaces: number = 4;
+
+  constructor(
+    private timestamp: (number | string)[],
+    private close: number[],
+    private signal: number[],
+  ) {}
+
+  public reprice(costs: number[], leverages: number[] = [1]): RepricingRow[] {
+    this.validate(costs, leverages);
+
+    return leverages.flatMap((leverage) => this.repriceLeverage(costs, leverage));
+  }
+
+  private repriceLeverage(costs: number[], leverage: number): RepricingRow[] {
+    const signal = this.signal.map((value) => value * leverage);
+    const calculator = new PortfolioCalculator(0, {
+      timestamp: this.timestamp,
+      close: this.close,
+      signal,
+      portfolio: [],
+      portfolioWithCosts: [],
+      returns: [],
+      equity: [],
+      cash: [],
+      equityWithCosts: [],
+      cashWithCosts: [],
+    } as unknown as StrategyResult);
+    const { portfolio } = calculator.calculate();
+    const statistics = calculator.statistics();
+    const noCostValid = portfolio.every((value) => value >= 0);
+
+    const { first, last, valid } = this.withCosts(signal, costs);
+
+    return costs.map((costPerTrade, j) => {
+      if (!noCostValid || !valid[j]) {
+        return {
+          costPerTrade,
+          leverage,
+          statistics: null,
+          error: "The portfolio goes negative under this scenario.",
+        };
+      }
+      return {
+        costPerTrade,
+        leverage,
+        statistics: {
+          ...statistics,
+          plWCosts:
+            (100 * (this.roundTo(last[j]) - this.roundTo(first[j]))) /
+            portfolio[0],
+        },
+        error: null,
+      };
+    });
+  }
+
+  // PortfolioCalculator.calculate's with-costs recurrence for every cost at once.
+  private withCosts(signal: number[], costs: number[]) {
+    const scenarios = costs.length;
+    const tradingCost = Float64Array.from(costs, (cost) => cost / 100);
+    const portfolio = new Float64Array(scenarios);
+    const equity = new Float64Array(scenarios);
+    const cash = new Float64Array(scenarios);
+    const first = new Float64Array(scenarios);
+    const lowest = new Float64Array(scenarios);
+
+    for (let j = 0; j < scenarios; j++) {
+      portfolio[j] = 1 - Math.abs(tradingCost[j] * signal[0]);
+      equity[j] = portfolio[j] * signal[0];
+      cash[j] = portfolio[j] - Math.abs(equity[j]);
+      first[j] = portfolio[j];
+      lowest[j] = portfolio[j];
+    }
+
+    for (let i = 1; i < this.timestamp.length; i++) {
+      const curr = this.close[i];
+      const prev = this.close[i - 1];
+      let stockRet = (curr - prev) / prev;
+      if (signal[i - 1] < 0) {
+        stockRet = -1 * stockRet;
+      }
+
+      const currSignal = signal[i];
+      const prevSignal = signal[i - 1];
+      const traded = currSignal != prevSignal;
+
+      for (let j = 0; j < scenarios; j++) {
+        equity[j] = equity[j] * (1 + stockRet);
+        portfolio[j] = Math.abs(equity[j]) + cash[j];
+
+        if (traded) {
+          const tradeValue = Math.abs(
+            portfolio[j] * (currSignal - prevSignal),
+          );
+          portfolio[j] = portfolio[j] - tradeValue * tradingCost[j];
+          equity[j] = portfolio[j] * currSignal;
+        }
+
+        cash[j] = Math.max(0, portfolio[j] - Math.abs(equity[j]));
+        if (!(portfolio[j] >= lowest[j])) lowest[j] = portfolio[j];
+      }
+    }
+
+    // rounding is monotonic, so the rounded series stays non-negative
+    // exactly when its lowest value does
+    const valid = Array.from(lowest, (value) => this.roundTo(value) >= 0);
+    return { first, last: portfolio, valid };
+  }
+
+  private roundTo(value: number): number {
+    return (
+      Math.round(value * 10 ** this.decimalPlaces) / 10 ** this.decimalPlaces
+    );
+  }
+
+  private validate(costs: number[], leverages: number[]): void {
+    const length = this.timestamp?.length ?? 0;
+    if (
+      length < 2 ||
+      this.close?.length !== length ||
+      this.signal?.length !== length
+    ) {
+      throw new HttpError(
+        400,
+        "Repricing needs matching timestamp, close and signal arrays.",
+      );
+    }
+    if (length > SignalRepricer.maxBars) {
+      throw new HttpError(
+        400,
+        `At most ${SignalRepricer.maxBars} bars can be repriced.`,
+      );
+    }
+    if (
+      ![...this.close, ...this.signal].every(
+        (value) => typeof value === "number" && Number.isFinite(value),
+      )
+    ) {
+      throw new HttpError(400, "Close prices and signals must be numbers.");
+    }
+    if (
+      !Array.isArray(costs) ||
+      costs.length === 0 ||
+      !costs.every((cost) => Number.isFinite(cost) && cost >= 0)
+    ) {
+      throw new HttpError(
+        400,
+        "Provide at least one non-negative cost per trade.",
+      );
+    }
+    if (
+      !Array.isArray(leverages) ||
+      leverages.length === 0 ||
+      !leverages.every((leverage) => Number.isFinite(leverage) && leverage > 0)
+    ) {
+      throw new HttpError(400, "Leverage scalings must be positive numbers.");
+    }
+    if (costs.length * leverages.length > SignalRepricer.maxScenarios) {
+      throw new HttpError(
+        400,
+        `At most ${SignalRepricer.maxScenarios} cost/leverage scenarios can be priced at once.`,
+      );
+    }
+  }
+}
+
+export default SignalRepricer;
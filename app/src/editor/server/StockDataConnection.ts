@@ -1,6 +1,8 @@
 import { HttpError } from "wasp/server";
 import { FormInput } from "../../shared/sharedTypes";
 import { intVals, eodFreqs } from "../../shared/sharedTypes";
+import OhlcvStore from "./OhlcvStore";
+import SyntheticQuotes from "./SyntheticQuotes";
 
 // work on this!
 type QuoteColumns = {
@@ -66,15 +68,61 @@ class StockDataConnection {
       );
     }
 
-    const rawData = await this.fetchStockData(symbol);
-    return this.processStockData(rawData);
+    const quote = await this.fetchQuote(symbol);
+    return this.processStockData(quote);
   }
 
-  private async fetchStockData(symbol: string): Promise<any> {
+  // Brings the symbol's stored history up to date without the length limit
+  // or any processing (used by the nightly prefetch).
+  public async prefetch(symbol: string): Promise<void> {
+    await this.fetchQuote(symbol);
+  }
+
+  // Daily bars go through the local store, which only asks Tiingo for the
+  // ranges it doesn't have yet; other intervals are fetched directly.
+  // Synthetic quotes are generated on the spot and never stored.
+  private async fetchQuote(symbol: string): Promise<QuoteColumns> {
     const { startDate, endDate, warmupDate, useWarmupDate, intval } =
       this.formInputs;
     const effectiveStart = useWarmupDate ? warmupDate : startDate;
 
+    if (
+      intval === "daily" &&
+      !SyntheticQuotes.enabled() &&
+      OhlcvStore.enabled() &&
+      OhlcvStore.storable(symbol)
+    ) {
+      const columns = await new OhlcvStore().get(
+        symbol,
+        intval,
+        effectiveStart,
+        endDate,
+        (start, end) => this.fetchStockData(symbol, start, end),
+      );
+      return columns as QuoteColumns;
+    }
+
+    const rows = await this.fetchStockData(symbol, effectiveStart, endDate);
+    return OhlcvStore.toColumns(rows) as QuoteColumns;
+  }
+
+  private async fetchStockData(
+    symbol: string,
+    effectiveStart: string,
+    endDate: string,
+  ): Promise<any> {
+    const { intval } = this.formInputs;
+
+    // STOCK_DATA_SOURCE=synthetic: offline stand-in with the same row shape
+    if (SyntheticQuotes.enabled()) {
+      return SyntheticQuotes.shared.rows(
+        symbol,
+        intval as (typeof intVals)[number],
+        effectiveStart,
+        endDate,
+      );
+    }
+
     const baseUrl = this.isEOD ? this.baseUrlEOD : this.baseUrlIntraday;
     const extraColumns = this.isEOD
       ? ""
@@ -96,8 +144,7 @@ class StockDataConnection {
     return json;
   }
 
-  private processStockData(apiResult: any) {
-    const quote = StockDataConnection.rowsToColumns(apiResult);
+  private processStockData(quote: QuoteColumns) {
     this.validateData(quote);
     const warnings: string[] = this.generateWarnings(quote);
     const { normalizedQuote, shortenedNormalizedQuote } =
@@ -283,16 +330,6 @@ class StockDataConnection {
       },
     };
   }
-
-  private static rowsToColumns(data: any[]): QuoteColumns {
-    return data.reduce((acc, row) => {
-      Object.entries(row).forEach(([key, val]) => {
-        if (!acc[key]) acc[key] = [];
-        acc[key].push(val);
-      });
-      return acc;
-    }, {} as QuoteColumns);
-  }
 }
 
 export default StockDataConnection;
@@ -1,10 +1,18 @@
-import { StrategyResult, FormInput, Stat } from "../../shared/sharedTypes";
+import {
+  StrategyResult,
+  FormInput,
+  PartialRun,
+  PythonData,
+  RunProgress,
+  Stat,
+} from "../../shared/sharedTypes";
 import CodeExecutor from "./CodeExecutor";
 import ScriptBuilder from "./ScriptBuilder";
 import ResultValidator from "./ResultValidator";
 import STDParser from "./STDParser";
-import PortfolioCalculator from "./PortfolioCalculator";
 import StockDataConnection from "./StockDataConnection";
+import SandboxArchive from "./SandboxArchive";
+import ResultCache from "./ResultCache";
 import { HttpError } from "wasp/server";
 import { BacktestResult } from "wasp/src/shared/sharedTypes";
 
@@ -22,6 +30,8 @@ class StrategyPipeline {
   // Store user inputs in formInputs, code in code.
   private formInputs: FormInput;
   private code: string;
+  private profile: boolean;
+  private userId: string | null;
 
   // initialize the final result with empty arrays
   private strategyResult: StrategyResult = {
@@ -65,10 +75,24 @@ class StrategyPipeline {
   private stderr: string = "";
   private stdout: string = "";
   private warnings: string[] = [];
+  private partial: PartialRun | null = null;
+  private onProgress?: (progress: RunProgress) => void;
 
-  constructor(formInputs: FormInput, code: string) {
+  // profile: return a profiler report of strategy() in the debug output;
+  // onProgress: the harness's heartbeats while it runs; userId: whose model
+  // cache the run uses
+  constructor(
+    formInputs: FormInput,
+    code: string,
+    profile: boolean = false,
+    onProgress?: (progress: RunProgress) => void,
+    userId: string | null = null,
+  ) {
     this.formInputs = formInputs;
     this.code = code;
+    this.profile = profile;
+    this.onProgress = onProgress;
+    this.userId = userId;
   }
 
   //________________________________________ run: main endpoint
@@ -86,31 +110,80 @@ class StrategyPipeline {
       ...this.strategyResult,
       ...shortenedNormalizedQuote,
     };
+
+    // Identical deterministic runs on the same bars are served from (or
+    // wait on) the result cache; profiled runs always execute
+    if (!ResultCache.enabled() || this.profile) {
+      return this.execute(apiConnection, normalizedQuote, shortenedNormalizedQuote);
+    }
+    if (!ResultCache.isDeterministic(this.code)) {
+      ResultCache.shared.countUncacheable();
+      return this.execute(apiConnection, normalizedQuote, shortenedNormalizedQuote);
+    }
+    return ResultCache.shared.getOrRun(
+      ResultCache.key(this.code, this.formInputs, normalizedQuote),
+      () =>
+        this.execute(apiConnection, normalizedQuote, shortenedNormalizedQuote),
+    );
+  }
+
+  //________________________________________ execute: sandbox run + results
+  private async execute(
+    apiConnection: StockDataConnection,
+    normalizedQuote: PythonData,
+    shortenedNormalizedQuote: PythonData,
+  ): Promise<BacktestResult> {
     const cutoffDate = shortenedNormalizedQuote.timestamp[0];
 
     // Generate a unique key; surround stdout in this private key
     const key =
       Math.random().toString(36).substring(2, 8) +
       Math.random().toString(36).substring(2, 8);
+    // Files shipped next to the script; optionally the quote goes in as
+    // binary columns too (DATA_HANDOFF=binary)
+    const archive = new SandboxArchive();
     const fullUserCode = ScriptBuilder.build(
       this.code,
       normalizedQuote,
       cutoffDate,
       key,
+      archive,
+      {
+        close: shortenedNormalizedQuote.close,
+        timestamp: shortenedNormalizedQuote.timestamp,
+        costPerTrade: this.formInputs.costPerTrade,
+      },
+      process.env.DATA_HANDOFF === "binary",
+      this.profile,
+      this.userId,
     );
 
     // Execute user code
-    const { stdout_raw, stderr_raw } = await new CodeExecutor(
+    const { stdout_raw, stderr_raw, usage } = await new CodeExecutor(
       fullUserCode,
       this.formInputs.timeout,
+      archive.toBase64(),
+      this.onProgress,
     ).execute();
 
     // Parse execution output
     const parsedOutput = new STDParser(stdout_raw, stderr_raw, key).parse();
-    this.stdout = parsedOutput.stdout;
+    const debugOutput = [parsedOutput.stdout, parsedOutput.profile]
+      .filter(Boolean)
+      .join("\n\n");
+    this.stdout = CodeExecutor.withStageDiagnostics(
+      debugOutput,
+      parsedOutput.stages,
+      usage,
+      parsedOutput.modelCache,
+    );
     this.stderr = parsedOutput.stderr;
     this.strategyResult.signal = parsedOutput.signal;
     this.strategyResult.userDefinedData = parsedOutput.userDefinedData;
+    this.partial = parsedOutput.partial;
+    if (this.partial) {
+      this.warnings.push(StrategyPipeline.partialWarning(this.partial));
+    }
 
     // If there's an error, and no signals found, return early
     if (this.strategyResult.signal.length === 0) {
@@ -140,15 +213,23 @@ class StrategyPipeline {
       );
     }
 
-    // Calculate final portfolio results
-    const calc = new PortfolioCalculator(
-      this.formInputs.costPerTrade,
-      this.strategyResult,
-    );
-    this.strategyResult = calc.calculate();
+    // Portfolio results were calculated in the harness, next to the strategy
+    if (!parsedOutput.portfolio || !parsedOutput.statistics) {
+      throw new HttpError(
+        500,
+        "Your portfolio arrays are missing or mismatched in length.",
+      );
+    }
+    this.strategyResult = {
+      ...this.strategyResult,
+      ...parsedOutput.portfolio,
+    };
 
     ResultValidator.validatePortfolio(this.strategyResult);
-    this.statistics = calc.statistics();
+    this.statistics = {
+      ...parsedOutput.statistics,
+      robustness: parsedOutput.robustness,
+    };
 
     return this.sendJSONtoFrontend();
   }
@@ -162,10 +243,19 @@ class StrategyPipeline {
       debugOutput: this.stdout,
       stderr: this.stderr,
       warnings: [...new Set(this.warnings)],
+      partial: this.partial,
     };
   }
 
-  private static arraysAreEqual<T>(arr1: T[], arr2: T[]): boolean {
+  private static partialWarning({ reason, after, from }: PartialRun): string {
+    const when = after === null ? "" : ` after ${after}s`;
+    const flat = from
+      ? `signals from ${from} on are flat`
+      : "its last signals are flat";
+    return `Partial result: your strategy stopped early (${reason}${when}), so ${flat}. Statistics cover the whole period.`;
+  }
+
+  public static arraysAreEqual<T>(arr1: T[], arr2: T[]): boolean {
     // Check if the arrays are the same length
     if (arr1.length !== arr2.length) {
       return false;
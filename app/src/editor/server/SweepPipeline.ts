@@ -0,0 +1,224 @@
+import {
+  FormInput,
+  RunProgress,
+  Stat,
+  StrategyResult,
+  SweepBest,
+  SweepGrid,
+  SweepResult,
+} from "../../shared/sharedTypes";
+import CodeExecutor from "./CodeExecutor";
+import ScriptBuilder from "./ScriptBuilder";
+import ResultValidator from "./ResultValidator";
+import STDParser from "./STDParser";
+import StockDataConnection from "./StockDataConnection";
+import StrategyPipeline from "./StrategyPipeline";
+import SandboxArchive from "./SandboxArchive";
+import { HttpError } from "wasp/server";
+
+/*
+    Runs one strategy over a grid of keyword parameters in a single executor
+    submission: the quote is fetched and loaded once, every combination is
+    evaluated inside the sandbox, and only a statistics table plus the full
+    series of the best few combinations come back.
+*/
+
+class SweepPipeline {
+  private static readonly maxCombinations: number = parseInt(
+    process.env.SWEEP_MAX_COMBINATIONS || "256",
+  );
+  private static readonly maxTopN: number = 10;
+  private static readonly rankable: (keyof Stat)[] = [
+    "pl",
+    "plWCosts",
+    "cagr",
+    "percTradesProf",
+    "sharpeRatio",
+    "sortinoRatio",
+    "maxDrawdown",
+    "maxGain",
+    "meanReturn",
+    "stddevReturn",
+  ];
+
+  private formInputs: FormInput;
+  private code: string;
+  private grid: SweepGrid;
+  private topN: number;
+  private rankBy: keyof Stat;
+  private onProgress?: (progress: RunProgress) => void;
+  private userId: string | null;
+
+  constructor(
+    formInputs: FormInput,
+    code: string,
+    grid: SweepGrid,
+    topN: number = 3,
+    rankBy: keyof Stat = "pl",
+    onProgress?: (progress: RunProgress) => void,
+    userId: string | null = null,
+  ) {
+    this.formInputs = formInputs;
+    this.code = code;
+    this.grid = grid;
+    this.topN = topN;
+    this.rankBy = rankBy;
+    this.onProgress = onProgress;
+    this.userId = userId;
+  }
+
+  public async run(): Promise<SweepResult> {
+    this.validate();
+
+    const apiConnection = new StockDataConnection(this.formInputs);
+    const { normalizedQuote, shortenedNormalizedQuote, warnings } =
+      await apiConnection.get(this.formInputs.symbol);
+    const cutoffDate = shortenedNormalizedQuote.timestamp[0];
+
+    const key =
+      Math.random().toString(36).substring(2, 8) +
+      Math.random().toString(36).substring(2, 8);
+    const archive = new SandboxArchive();
+    const fullUserCode = ScriptBuilder.buildSweep(
+      this.code,
+      normalizedQuote,
+      cutoffDate,
+      key,
+      archive,
+      {
+        close: shortenedNormalizedQuote.close,
+        timestamp: shortenedNormalizedQuote.timestamp,
+        costPerTrade: this.formInputs.costPerTrade,
+      },
+      {
+        grid: this.grid,
+        topN: this.topN,
+        rankBy: this.rankBy,
+        memoryLimit: CodeExecutor.memoryLimit,
+      },
+      process.env.DATA_HANDOFF === "binary",
+      this.userId,
+    );
+
+    const { stdout_raw, stderr_raw, usage } = await new CodeExecutor(
+      fullUserCode,
+      this.formInputs.timeout,
+      archive.toBase64(),
+      this.onProgress,
+    ).execute();
+    const { stdout: debugOutput, stderr, sweep, stages, modelCache } =
+      new STDParser(stdout_raw, stderr_raw, key).parseSweep();
+    const stdout = CodeExecutor.withStageDiagnostics(
+      debugOutput,
+      stages,
+      usage,
+      modelCache,
+    );
+
+    if (!sweep) {
+      return {
+        rows: [],
+        best: [],
+        workers: 0,
+        debugOutput: stdout,
+        stderr,
+        warnings,
+      };
+    }
+
+    // S&P 500 comparison, fetched once for every best combination
+    let sp: number[] = [];
+    try {
+      const spy = await apiConnection.get("SPY");
+      if (
+        StrategyPipeline.arraysAreEqual(
+          shortenedNormalizedQuote.timestamp,
+          spy.shortenedNormalizedQuote.timestamp,
+        )
+      ) {
+        sp = spy.shortenedNormalizedQuote.close;
+      }
+    } catch (error: any) {
+      warnings.push(
+        "An issue occurred with fetching S&P Comparison Data, so it will be excluded from this backtest.",
+      );
+    }
+
+    const best: SweepBest[] = sweep.best.map(
+      ({ params, signal, portfolio, statistics }) => {
+        const strategyResult = {
+          ...shortenedNormalizedQuote,
+          ...portfolio,
+          sp,
+          signal,
+          userDefinedData: {},
+        } as StrategyResult;
+        ResultValidator.validatePortfolio(strategyResult);
+        return { params, strategyResult, statistics };
+      },
+    );
+
+    return {
+      rows: sweep.rows,
+      best,
+      workers: sweep.workers,
+      debugOutput: stdout,
+      stderr,
+      warnings: [...new Set(warnings)],
+    };
+  }
+
+  // Checks the grid and settings; returns the number of combinations.
+  public validate(): number {
+    const entries = Object.entries(this.grid ?? {});
+    if (entries.length === 0) {
+      throw new HttpError(400, "A sweep needs at least one parameter.");
+    }
+
+    let combinations = 1;
+    for (const [name, values] of entries) {
+      if (!/^[A-Za-z_][A-Za-z0-9_]*$/.test(name) || name === "data") {
+        throw new HttpError(400, `"${name}" is not a valid parameter name.`);
+      }
+      if (
+        !Array.isArray(values) ||
+        values.length === 0 ||
+        !values.every((value) =>
+          ["number", "string", "boolean"].includes(typeof value),
+        )
+      ) {
+        throw new HttpError(
+          400,
+          `Parameter "${name}" needs a list of numbers, strings or booleans.`,
+        );
+      }
+      combinations *= values.length;
+    }
+
+    if (combinations > SweepPipeline.maxCombinations) {
+      throw new HttpError(
+        400,
+        `This sweep has ${combinations} combinations; the limit is ${SweepPipeline.maxCombinations}.`,
+      );
+    }
+    if (
+      !Number.isInteger(this.topN) ||
+      this.topN < 1 ||
+      this.topN > SweepPipeline.maxTopN
+    ) {
+      throw new HttpError(
+        400,
+        `Between 1 and ${SweepPipeline.maxTopN} best combinations can be returned.`,
+      );
+    }
+    if (!SweepPipeline.rankable.includes(this.rankBy)) {
+      throw new HttpError(
+        400,
+        `Sweeps can be ranked by ${SweepPipeline.rankable.join(", ")}.`,
+      );
+    }
+    return combinations;
+  }
+}
+
+export default SweepPipeline;
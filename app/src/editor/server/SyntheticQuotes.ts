@@ -0,0 +1,315 @@
+import { intVals } from "../../shared/sharedTypes";
+import { QuoteRows } from "./OhlcvStore";
+
+/*
+    Offline stand-in for Tiingo (STOCK_DATA_SOURCE=synthetic): deterministic
+    price history per symbol and SYNTHETIC_SEED, in the same row shape as the
+    daily and IEX endpoints, so the whole pipeline runs without an API key.
+
+    Daily bars are generated from SYNTHETIC_EPOCH to today: a regime-switching
+    GBM (calm/turbulent) with Merton jumps and overnight gaps. The raw price
+    splits 2:1 to 4:1 when it gets expensive, and the adj* columns are
+    back-adjusted to the latest bar, as Tiingo's are. Intraday bars fill the
+    regular session (09:30-16:00 New York time) with a Brownian bridge from
+    each day's open to its close, with U-shaped volatility and volume.
+    Weekends are skipped; market holidays are not modelled.
+
+    Any bar is the same whichever range it is requested in, so the quote
+    store, SPY alignment and warmup cutoffs behave as with real data.
+*/
+
+type DailyBar = {
+  day: number; // days since 1970-01-01
+  open: number;
+  high: number;
+  low: number;
+  close: number;
+  volume: number;
+  splitFactor: number;
+  splitLevel: number; // product of split factors up to this bar
+};
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const SESSION_MINUTES = 390;
+const TRADING_DAYS = 252;
+
+class SyntheticQuotes {
+  public static readonly shared: SyntheticQuotes = new SyntheticQuotes(
+    parseInt(process.env.SYNTHETIC_SEED || "0"),
+    process.env.SYNTHETIC_EPOCH || "1990-01-02",
+  );
+
+  // symbol -> daily history through the day it was generated
+  private cache: Map<string, { through: number; bars: DailyBar[] }> =
+    new Map();
+
+  constructor(
+    private readonly seed: number,
+    private readonly epoch: string,
+  ) {}
+
+  public static enabled(): boolean {
+    return process.env.STOCK_DATA_SOURCE === "synthetic";
+  }
+
+  public rows(
+    symbol: string,
+    intval: (typeof intVals)[number],
+    start: string,
+    end: string,
+  ): QuoteRows {
+    const bars = this.daily(symbol.toUpperCase());
+    const from = SyntheticQuotes.dayOf(start);
+    const to = SyntheticQuotes.dayOf(end);
+    const inRange = bars.filter((bar) => bar.day >= from && bar.day <= to);
+    const latestLevel = bars[bars.length - 1].splitLevel;
+
+    switch (intval) {
+      case "daily":
+        return inRange.map((bar) => SyntheticQuotes.eodRow(bar, latestLevel));
+      case "weekly":
+      case "monthly":
+        return SyntheticQuotes.resample(inRange, intval).map((bar) =>
+          SyntheticQuotes.eodRow(bar, latestLevel),
+        );
+      default:
+        return this.intraday(
+          symbol.toUpperCase(),
+          inRange,
+          parseInt(intval) * (intval.endsWith("hour") ? 60 : 1),
+        );
+    }
+  }
+
+  //________________________________________ daily path
+
+  private daily(symbol: string): DailyBar[] {
+    const today = SyntheticQuotes.dayOf(new Date().toISOString());
+    const cached = this.cache.get(symbol);
+    if (cached && cached.through === today) return cached.bars;
+
+    const random = SyntheticQuotes.stream(this.seed, symbol);
+    // per-symbol character, drawn once
+    const drift = 0.06 + 0.1 * random();
+    const calmVol = 0.12 + 0.18 * random();
+    const price = 10 + 190 * random();
+    const baseVolume = 1e6 * (1 + 49 * random());
+    const splitAt = 300 + 400 * random();
+
+    const bars: DailyBar[] = [];
+    let turbulent = false;
+    let close = price;
+    let splitLevel = 1;
+    let pendingSplit = 1;
+
+    for (let day = SyntheticQuotes.dayOf(this.epoch); day <= today; day++) {
+      const weekday = new Date(day * DAY_MS).getUTCDay();
+      if (weekday === 0 || weekday === 6) continue;
+
+      // calm <-> turbulent, with mean spells of ~100 and ~20 days
+      if (random() < (turbulent ? 0.05 : 0.01)) turbulent = !turbulent;
+      const vol = (turbulent ? 2 * calmVol : calmVol) / Math.sqrt(TRADING_DAYS);
+      const mu = (turbulent ? -0.05 : drift) / TRADING_DAYS;
+
+      let logReturn = mu - (vol * vol) / 2 + vol * SyntheticQuotes.normal(random);
+      if (random() < 0.01) {
+        logReturn += -0.005 + 0.04 * SyntheticQuotes.normal(random);
+      }
+
+      // a split announced yesterday takes effect at today's open
+      const splitFactor = pendingSplit;
+      splitLevel *= splitFactor;
+      const previous = close / splitFactor;
+      pendingSplit = 1;
+
+      const gap = 0.3 * vol * SyntheticQuotes.normal(random);
+      const open = previous * Math.exp(gap);
+      close = previous * Math.exp(logReturn);
+      const wick = 0.5 * vol;
+      const high =
+        Math.max(open, close) * Math.exp(wick * Math.abs(SyntheticQuotes.normal(random)));
+      const low =
+        Math.min(open, close) * Math.exp(-wick * Math.abs(SyntheticQuotes.normal(random)));
+      const volume = Math.round(
+        baseVolume *
+          Math.exp(0.3 * SyntheticQuotes.normal(random)) *
+          (1 + (2 * Math.abs(logReturn)) / vol) * // busier on big moves
+          splitLevel,
+      );
+
+      bars.push({ day, open, high, low, close, volume, splitFactor, splitLevel });
+
+      if (close > splitAt) pendingSplit = 2 + Math.floor(3 * random());
+    }
+
+    this.cache.set(symbol, { through: today, bars });
+    return bars;
+  }
+
+  private static eodRow(bar: DailyBar, latestLevel: number) {
+    // adjusted to the latest bar: earlier prices divided by later splits
+    const adjust = bar.splitLevel / latestLevel;
+    const round = (value: number) => Math.round(value * 1e4) / 1e4;
+    return {
+      date: new Date(bar.day * DAY_MS).toISOString(),
+      open: round(bar.open),
+      high: round(bar.high),
+      low: round(bar.low),
+      close: round(bar.close),
+      volume: bar.volume,
+      adjOpen: round(bar.open * adjust),
+      adjHigh: round(bar.high * adjust),
+      adjLow: round(bar.low * adjust),
+      adjClose: round(bar.close * adjust),
+      adjVolume: Math.round(bar.volume / adjust),
+      divCash: 0,
+      splitFactor: bar.splitFactor,
+    };
+  }
+
+  // Weekly and monthly bars, dated on their last trading day
+  private static resample(
+    bars: DailyBar[],
+    intval: "weekly" | "monthly",
+  ): DailyBar[] {
+    const period = (day: number) => {
+      const date = new Date(day * DAY_MS);
+      return intval === "weekly"
+        ? Math.floor((day + 3) / 7) // weeks starting on Monday
+        : date.getUTCFullYear() * 12 + date.getUTCMonth();
+    };
+
+    const resampled: DailyBar[] = [];
+    for (const bar of bars) {
+      const last = resampled[resampled.length - 1];
+      if (last && period(last.day) === period(bar.day)) {
+        // a split within the period: earlier prices onto the new basis
+        last.open /= bar.splitFactor;
+        last.high = Math.max(last.high / bar.splitFactor, bar.high);
+        last.low = Math.min(last.low / bar.splitFactor, bar.low);
+        last.close = bar.close;
+        last.volume += bar.volume;
+        last.splitFactor *= bar.splitFactor;
+        last.splitLevel = bar.splitLevel;
+        last.day = bar.day;
+      } else {
+        resampled.push({ ...bar });
+      }
+    }
+    return resampled;
+  }
+
+  //________________________________________ intraday session
+
+  private intraday(
+    symbol: string,
+    days: DailyBar[],
+    minutesPerBar: number,
+  ): QuoteRows {
+    const rows: QuoteRows = [];
+    const round = (value: number) => Math.round(value * 1e4) / 1e4;
+
+    for (const bar of days) {
+      const random = SyntheticQuotes.stream(this.seed, `${symbol}@${bar.day}`);
+      const path = SyntheticQuotes.bridge(bar, random);
+      const sessionOpen =
+        bar.day * DAY_MS + (9.5 + SyntheticQuotes.newYorkOffset(bar.day)) * 60 * 60 * 1000;
+
+      for (let first = 0; first < SESSION_MINUTES; first += minutesPerBar) {
+        const last = Math.min(first + minutesPerBar, SESSION_MINUTES);
+        let high = -Infinity;
+        let low = Infinity;
+        let volume = 0;
+        for (let minute = first; minute < last; minute++) {
+          high = Math.max(high, path[minute], path[minute + 1]);
+          low = Math.min(low, path[minute], path[minute + 1]);
+          volume += SyntheticQuotes.volumeShare(minute) * (0.5 + random());
+        }
+        rows.push({
+          date: new Date(sessionOpen + first * 60 * 1000).toISOString(),
+          open: round(path[first]),
+          high: round(high),
+          low: round(low),
+          close: round(path[last]),
+          volume: Math.round(bar.volume * volume),
+        });
+      }
+    }
+    return rows;
+  }
+
+  // Minute prices from the day's open to its close; volatility is higher
+  // near the open and the close.
+  private static bridge(bar: DailyBar, random: () => number): Float64Array {
+    const steps = new Float64Array(SESSION_MINUTES + 1);
+    const scale = Math.log(bar.high / bar.low) / Math.sqrt(SESSION_MINUTES) / 2;
+    for (let minute = 1; minute <= SESSION_MINUTES; minute++) {
+      steps[minute] =
+        steps[minute - 1] +
+        scale * SyntheticQuotes.uShape(minute - 1) * SyntheticQuotes.normal(random);
+    }
+
+    const from = Math.log(bar.open);
+    const to = Math.log(bar.close);
+    const path = new Float64Array(SESSION_MINUTES + 1);
+    for (let minute = 0; minute <= SESSION_MINUTES; minute++) {
+      const t = minute / SESSION_MINUTES;
+      path[minute] = Math.exp(
+        from + steps[minute] - t * steps[SESSION_MINUTES] + t * (to - from),
+      );
+    }
+    return path;
+  }
+
+  private static uShape(minute: number): number {
+    const t = minute / (SESSION_MINUTES - 1);
+    return 0.6 + 1.6 * (t - 0.5) ** 2 * 4;
+  }
+
+  private static volumeShare(minute: number): number {
+    // the U-shaped weights, normalized to about 1 over a session
+    return SyntheticQuotes.uShape(minute) / (SESSION_MINUTES * 1.13);
+  }
+
+  // Hours New York is behind UTC: EDT from the second Sunday of March to
+  // the first Sunday of November.
+  private static newYorkOffset(day: number): number {
+    const date = new Date(day * DAY_MS);
+    const year = date.getUTCFullYear();
+    const nthSunday = (month: number, n: number) => {
+      const first = new Date(Date.UTC(year, month, 1)).getUTCDay();
+      return Date.UTC(year, month, 1 + ((7 - first) % 7) + 7 * (n - 1));
+    };
+    const time = date.getTime();
+    return time >= nthSunday(2, 2) && time < nthSunday(10, 1) ? 4 : 5;
+  }
+
+  //________________________________________ randomness
+
+  // mulberry32 over a hash of the seed and key
+  private static stream(seed: number, key: string): () => number {
+    let state = seed ^ 0x9e3779b9;
+    for (let i = 0; i < key.length; i++) {
+      state = Math.imul(state ^ key.charCodeAt(i), 0x85ebca6b);
+      state ^= state >>> 13;
+    }
+    return () => {
+      state = (state + 0x6d2b79f5) | 0;
+      let t = Math.imul(state ^ (state >>> 15), 1 | state);
+      t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+      return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+  }
+
+  private static normal(random: () => number): number {
+    return (
+      Math.sqrt(-2 * Math.log(1 - random())) * Math.cos(2 * Math.PI * random())
+    );
+  }
+
+  private static dayOf(date: string): number {
+    return Math.floor(new Date(date).getTime() / DAY_MS);
+  }
+}
+
+export default SyntheticQuotes;
@@ -0,0 +1,159 @@
+import { HttpError } from "wasp/server";
+import { Buffer } from "buffer";
+import { ExecutionRequest, ExecutionResult, Executor } from "./types";
+
+// JUDGE0_URL points this at a self-hosted Judge0 (or tools/judge0_standin.py).
+// Judge0 cannot relay the harness's heartbeats, but with JUDGE0_POLL_MS set
+// the submission is polled instead of waited on, so the client at least
+// sees it go from queued to running. Every poll is a request (billed on
+// RapidAPI), hence off by default.
+class Judge0Executor implements Executor {
+  private readonly url: string =
+    process.env.JUDGE0_URL ||
+    "https://judge0-extra-ce.p.rapidapi.com/submissions?base64_encoded=true&wait=true&fields=*";
+  private readonly pollMs: number = Number(process.env.JUDGE0_POLL_MS || 0);
+
+  private static headers() {
+    return {
+      "x-rapidapi-key": process.env.JUDGE_API_KEY_RAPID_API as string,
+      "x-rapidapi-host": "judge0-extra-ce.p.rapidapi.com",
+      "Content-Type": "application/json",
+    };
+  }
+
+  public async run(request: ExecutionRequest): Promise<ExecutionResult> {
+    const polling = this.pollMs > 0 && !!request.onProgress;
+    const url = new URL(this.url);
+    if (polling) url.searchParams.set("wait", "false");
+
+    const options = {
+      method: "POST",
+      headers: Judge0Executor.headers(),
+      body: JSON.stringify({
+        language_id: 31, // Python for ML (base image)
+        source_code: Buffer.from(request.code).toString("base64"), // Encode source code
+        cpu_time_limit: request.cpuTimeLimit,
+        wall_time_limit: request.wallTimeLimit,
+        memory_limit: request.memoryLimit,
+        max_processes_and_or_threads: request.maxThreads,
+        additional_files: request.additionalFiles,
+      }),
+    };
+
+    const response = await fetch(url, options);
+    Judge0Executor.check(response);
+
+    const submission = (await response.json()) as Judge0Result;
+    const { stdout, stderr, message, memory, time, status } = polling
+      ? await this.poll(url, submission.token, request)
+      : submission;
+
+    return {
+      stdout: Judge0Executor.decode(stdout),
+      stderr: Judge0Executor.decode(stderr),
+      message: message ? Judge0Executor.decode(message) : null,
+      memory,
+      time,
+      status,
+    };
+  }
+
+  // GET /submissions/<token> until Judge0 reports a final status (ids 1
+  // and 2 are "In Queue" and "Processing")
+  private async poll(
+    submitted: URL,
+    token: string,
+    request: ExecutionRequest,
+  ): Promise<Judge0Result> {
+    const url = new URL(submitted);
+    url.pathname = `${url.pathname.replace(/\/$/, "")}/${token}`;
+    url.searchParams.delete("wait");
+
+    const started = Date.now();
+    // the run's own wall limit, plus as long again for the queue
+    const deadline = started + 2 * request.wallTimeLimit * 1000;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, this.pollMs));
+      const response = await fetch(url, { headers: Judge0Executor.headers() });
+      Judge0Executor.check(response);
+      const submission = (await response.json()) as Judge0Result;
+      if (submission.status.id > 2) return submission;
+
+      request.onProgress?.({
+        state: submission.status.id === 1 ? "queued" : "running",
+        elapsed: (Date.now() - started) / 1000,
+        cpu: null,
+        done: null,
+        total: null,
+        message: null,
+        stopping: false,
+      });
+    }
+    throw new HttpError(
+      503,
+      "Code Execution Failed:\n\nThe execution engine did not finish the run in time.",
+    );
+  }
+
+  private static check(response: Response): void {
+    if (!response.ok) {
+      // TODO, put in better error message after processing response.json()
+      throw new HttpError(
+        503,
+        `Code Execution Failed:\n\nStatus ${response.status} - ${response.statusText}`,
+      );
+    }
+  }
+
+  // for some reason this doesn't work unless I set the null values to '' (???)
+  private static decode(value: string | null): string {
+    return value ? Buffer.from(value, "base64").toString("utf-8") : "";
+  }
+}
+
+export default Judge0Executor;
+
+export type Judge0Result = {
+  source_code: string;
+  language_id: number;
+  stdin: string | null;
+  expected_output: string | null;
+  stdout: string | null;
+  status_id: number;
+  created_at: string; // ISO timestamp
+  finished_at: string; // ISO timestamp
+  time: string; // CPU time (seconds, as string)
+  memory: number; // in KB
+  stderr: string | null;
+  token: string;
+  number_of_runs: number;
+  cpu_time_limit: string; // seconds
+  cpu_extra_time: string; // seconds
+  wall_time_limit: string; // seconds
+  memory_limit: number; // KB
+  stack_limit: number; // KB
+  max_processes_and_or_threads: number;
+  enable_per_process_and_thread_time_limit: boolean;
+  enable_per_process_and_thread_memory_limit: boolean;
+  max_file_size: number; // KB
+  compile_output: string | null;
+  exit_code: number | null;
+  exit_signal: number | null;
+  message: string | null; // Base64-encoded
+  wall_time: string; // actual runtime in seconds
+  compiler_options: string | null;
+  command_line_arguments: string | null;
+  redirect_stderr_to_stdout: boolean;
+  callback_url: string | null;
+  additional_files: any[] | null;
+  enable_network: boolean;
+  post_execution_filesystem: string | null; // Base64 ZIP of filesystem
+  status: {
+    id: number;
+    description: string;
+  };
+  language: {
+    id: number;
+    name: string;
+  };
+};
@@ -0,0 +1,137 @@
+import { spawn } from "child_process";
+import { createInterface } from "readline";
+import { mkdtemp, rm, writeFile } from "fs/promises";
+import { tmpdir } from "os";
+import { join } from "path";
+import { Buffer } from "buffer";
+import { ExecutionRequest, ExecutionResult, Executor } from "./types";
+import { sandboxLauncher } from "./sandboxLauncher";
+import { toExecutionResult, type LocalRun } from "./localResult";
+import { parseHeartbeat } from "./heartbeat";
+import { sandboxEnv, sandboxUser } from "./sandboxEnv";
+
+/*
+    Local executor backend (CODE_EXECUTOR=local).
+
+    Runs each job in a throwaway directory through the sandbox launcher,
+    which applies Judge0's memory, CPU and process/thread limits as rlimits
+    (plus a per-job cgroup when EXECUTOR_CGROUP is set). The wall-clock limit
+    is enforced here by killing the job's whole process group. The harness's
+    progress heartbeats arrive on a pipe of their own (fd 4 in the job). The
+    job sees an allowlisted environment and runs as EXECUTOR_UID (see
+    sandboxEnv.ts).
+*/
+
+type LauncherStats = {
+  exit_code: number | null;
+  exit_signal: number | null;
+  time: number;
+  memory: number;
+};
+
+class SubprocessExecutor implements Executor {
+  private readonly outputLimit: number = 1024 * 1024; // bytes kept per stream
+
+  public async run(request: ExecutionRequest): Promise<ExecutionResult> {
+    const workdir = await mkdtemp(join(tmpdir(), "ubacktest-"));
+    try {
+      await writeFile(join(workdir, "script.py"), request.code);
+      if (request.additionalFiles) {
+        await writeFile(
+          join(workdir, "files.zip"),
+          Buffer.from(request.additionalFiles, "base64"),
+        );
+      }
+      return toExecutionResult(await this.launch(workdir, request));
+    } finally {
+      await rm(workdir, { recursive: true, force: true });
+    }
+  }
+
+  private launch(workdir: string, request: ExecutionRequest) {
+    const user = sandboxUser();
+    const spec = JSON.stringify({
+      cpu_time_limit: request.cpuTimeLimit,
+      memory_limit: request.memoryLimit,
+      max_threads: request.maxThreads,
+      uid: user?.uid ?? null,
+      gid: user?.gid ?? null,
+    });
+
+    const child = spawn(
+      process.env.PYTHON_BIN || "python3",
+      ["-c", sandboxLauncher, spec],
+      {
+        cwd: workdir,
+        detached: true, // own process group, so a timeout kills everything
+        env: sandboxEnv({
+          UBACKTEST_STATS_FD: "3",
+          UBACKTEST_PROGRESS_FD: "4",
+        }),
+        stdio: ["ignore", "pipe", "pipe", "pipe", "pipe"],
+      },
+    );
+
+    const collect = (stream: NodeJS.ReadableStream | null) => {
+      const chunks: Buffer[] = [];
+      let size = 0;
+      stream?.on("data", (chunk: Buffer) => {
+        if (size < this.outputLimit) chunks.push(chunk);
+        size += chunk.length;
+      });
+      return () =>
+        Buffer.concat(chunks).subarray(0, this.outputLimit).toString("utf-8");
+    };
+    const stdout = collect(child.stdout);
+    const stderr = collect(child.stderr);
+    const stats = collect(child.stdio[3] as NodeJS.ReadableStream);
+    const heartbeats = createInterface({
+      input: child.stdio[4] as NodeJS.ReadableStream,
+    });
+    heartbeats.on("line", (line) => {
+      const progress = parseHeartbeat(line);
+      if (progress) request.onProgress?.(progress);
+    });
+
+    let timedOut = false;
+    const timer = setTimeout(() => {
+      timedOut = true;
+      try {
+        process.kill(-(child.pid as number), "SIGKILL");
+      } catch {
+        // already gone
+      }
+    }, request.wallTimeLimit * 1000);
+
+    return new Promise<LocalRun>((resolve, reject) => {
+      child.once("error", (error) => {
+        clearTimeout(timer);
+        reject(error);
+      });
+      child.once("close", (code) => {
+        clearTimeout(timer);
+        // without a (complete) launcher report the job was killed before it
+        // finished, possibly while the launcher was writing it
+        let launcher: LauncherStats | null = null;
+        try {
+          launcher = JSON.parse(stats().trim());
+        } catch {
+          // missing or truncated
+        }
+
+        resolve({
+          stdout: stdout(),
+          stderr: stderr(),
+          exitCode: launcher ? launcher.exit_code : code,
+          exitSignal: launcher ? launcher.exit_signal : null,
+          timedOut:
+            timedOut || (!!launcher && launcher.time >= request.cpuTimeLimit),
+          time: launcher ? launcher.time : request.wallTimeLimit,
+          memory: launcher ? launcher.memory : null,
+        });
+      });
+    });
+  }
+}
+
+export default SubprocessExecutor;
@@ -0,0 +1,284 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import { createInterface } from "readline";
+import { cpus } from "os";
+import { Buffer } from "buffer";
+import { HttpError } from "wasp/server";
+import { RunProgress } from "../../../shared/sharedTypes";
+import { ExecutionRequest, ExecutionResult, Executor } from "./types";
+import { zygoteScript } from "./zygoteScript";
+import { toExecutionResult } from "./localResult";
+import { toRunProgress } from "./heartbeat";
+import { sandboxEnv, sandboxUser, type SandboxUser } from "./sandboxEnv";
+
+/*
+    Local executor backend (CODE_EXECUTOR=pool).
+
+    Keeps EXECUTOR_POOL_SIZE warm Python workers that have already imported
+    EXECUTOR_POOL_PRELOAD. Every job runs in a fresh fork of a worker, and a
+    worker is replaced after EXECUTOR_POOL_MAX_JOBS jobs so leaked state in
+    the parent (caches, fragmentation) never accumulates. Workers see an
+    allowlisted environment and jobs run as EXECUTOR_UID (see sandboxEnv.ts).
+*/
+
+type WorkerReply = {
+  id: number;
+  stdout: string;
+  stderr: string;
+  exit_code: number | null;
+  exit_signal: number | null;
+  timed_out: boolean;
+  time: number;
+  wall_time: number;
+  memory: number;
+  error?: string;
+};
+
+// Sent while a job runs, as many times as the harness reports progress.
+type WorkerProgress = {
+  id: number;
+  progress: unknown;
+};
+
+// Sent once, after the preload.
+type WorkerReady = {
+  ready: true;
+  preloaded: string[];
+  preload_seconds: number;
+};
+
+type PendingJob = {
+  request: ExecutionRequest;
+  resolve: (result: ExecutionResult) => void;
+  reject: (error: Error) => void;
+};
+
+export type PoolMetrics = {
+  jobs: number;
+  recycledWorkers: number;
+  coldStartSeconds: number | null; // average spawn-to-ready time of a worker
+  savedSeconds: number; // coldStartSeconds summed over every warm job
+};
+
+class PoolWorker {
+  public jobsRun: number = 0;
+  public busy: boolean = false;
+  public coldStartSeconds: number = 0;
+
+  private process: ChildProcessWithoutNullStreams;
+  private readonly user: SandboxUser | null;
+  private ready: Promise<void>;
+  private current: {
+    id: number;
+    resolve: (reply: WorkerReply) => void;
+    reject: (error: Error) => void;
+    onProgress?: (progress: RunProgress) => void;
+  } | null = null;
+
+  constructor(preload: string, user: SandboxUser | null) {
+    this.user = user;
+    const spawnedAt = performance.now();
+    this.process = spawn(
+      process.env.PYTHON_BIN || "python3",
+      ["-u", "-c", zygoteScript],
+      { env: sandboxEnv({ UBACKTEST_PRELOAD: preload }) },
+    );
+    this.process.stderr.on("data", (chunk) =>
+      console.error(`[worker ${this.process.pid}] ${chunk}`),
+    );
+
+    const lines = createInterface({ input: this.process.stdout });
+    this.ready = new Promise((resolve, reject) => {
+      lines.on("line", (line) => {
+        const message = this.parse(line);
+        if (!message) return;
+        if ("ready" in message) {
+          this.coldStartSeconds = (performance.now() - spawnedAt) / 1000;
+          resolve();
+        } else {
+          this.onReply(message);
+        }
+      });
+      this.process.once("exit", () =>
+        reject(new Error("Execution worker exited before it was ready.")),
+      );
+    });
+    this.ready.catch(() => {}); // surfaced through run()
+
+    this.process.on("error", (error) => console.error(error));
+    this.process.once("exit", () => {
+      this.current?.reject(new Error("Execution worker exited unexpectedly."));
+      this.current = null;
+    });
+  }
+
+  public async run(id: number, request: ExecutionRequest): Promise<WorkerReply> {
+    await this.ready;
+    this.jobsRun++;
+    return new Promise((resolve, reject) => {
+      this.current = { id, resolve, reject, onProgress: request.onProgress };
+      this.process.stdin.write(
+        JSON.stringify({
+          id,
+          code: Buffer.from(request.code).toString("base64"),
+          files: request.additionalFiles ?? null,
+          cpu_time_limit: request.cpuTimeLimit,
+          wall_time_limit: request.wallTimeLimit,
+          memory_limit: request.memoryLimit,
+          max_threads: request.maxThreads,
+          uid: this.user?.uid ?? null,
+          gid: this.user?.gid ?? null,
+        }) + "\n",
+      );
+    });
+  }
+
+  public kill(): void {
+    this.process.kill("SIGKILL");
+  }
+
+  // Anything on stdout that is not a protocol message (say, a preloaded
+  // library printing at import time) is logged and dropped.
+  private parse(
+    line: string,
+  ): WorkerReply | WorkerProgress | WorkerReady | null {
+    try {
+      const message = JSON.parse(line);
+      if (message?.ready === true || typeof message?.id === "number") {
+        return message;
+      }
+    } catch {
+      // not JSON
+    }
+    console.error(
+      `[worker ${this.process.pid}] dropped non-protocol output: ${line.slice(0, 200)}`,
+    );
+    return null;
+  }
+
+  private onReply(reply: WorkerReply | WorkerProgress): void {
+    if (!this.current || this.current.id !== reply.id) return;
+    if ("progress" in reply) {
+      const progress = toRunProgress(reply.progress);
+      if (progress) this.current.onProgress?.(progress);
+      return;
+    }
+    const { resolve, reject } = this.current;
+    this.current = null;
+    if (reply.error) reject(new Error(reply.error));
+    else resolve(reply);
+  }
+}
+
+class WorkerPool implements Executor {
+  private static instance: WorkerPool | null = null;
+
+  private readonly size: number = Number(
+    process.env.EXECUTOR_POOL_SIZE || cpus().length,
+  );
+  private readonly maxJobsPerWorker: number = Number(
+    process.env.EXECUTOR_POOL_MAX_JOBS || 50,
+  );
+  private readonly preload: string =
+    process.env.EXECUTOR_POOL_PRELOAD || "numpy,pandas,sklearn";
+  private readonly user: SandboxUser | null = sandboxUser();
+
+  private workers: PoolWorker[] = [];
+  private queue: PendingJob[] = [];
+  private nextId: number = 0;
+  private metrics: PoolMetrics = {
+    jobs: 0,
+    recycledWorkers: 0,
+    coldStartSeconds: null,
+    savedSeconds: 0,
+  };
+
+  public static shared(): WorkerPool {
+    if (!WorkerPool.instance) WorkerPool.instance = new WorkerPool();
+    return WorkerPool.instance;
+  }
+
+  private constructor() {
+    for (let i = 0; i < this.size; i++) {
+      this.workers.push(new PoolWorker(this.preload, this.user));
+    }
+  }
+
+  public getMetrics(): PoolMetrics {
+    return { ...this.metrics };
+  }
+
+  public run(request: ExecutionRequest): Promise<ExecutionResult> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ request, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  private dispatch(): void {
+    while (this.queue.length > 0) {
+      const index = this.workers.findIndex((worker) => !worker.busy);
+      if (index === -1) return;
+
+      const job = this.queue.shift() as PendingJob;
+      const worker = this.workers[index];
+      worker.busy = true;
+      let failed = false;
+
+      worker
+        .run(this.nextId++, job.request)
+        .then((reply) => {
+          this.record(worker);
+          job.resolve(
+            toExecutionResult({
+              stdout: Buffer.from(reply.stdout, "base64").toString("utf-8"),
+              stderr: Buffer.from(reply.stderr, "base64").toString("utf-8"),
+              exitCode: reply.exit_code,
+              exitSignal: reply.exit_signal,
+              timedOut: reply.timed_out,
+              time: reply.time,
+              memory: reply.memory,
+            }),
+          );
+        })
+        .catch((error: Error) => {
+          console.error(error);
+          failed = true;
+          job.reject(
+            new HttpError(503, "Code Execution Failed: local worker error."),
+          );
+        })
+        .finally(() => {
+          worker.busy = false;
+          if (failed || worker.jobsRun >= this.maxJobsPerWorker) {
+            this.replace(index);
+          }
+          this.dispatch();
+        });
+    }
+  }
+
+  private record(worker: PoolWorker): void {
+    const { jobs, coldStartSeconds } = this.metrics;
+    // running mean of the cold start each warm job avoided
+    const coldStart =
+      coldStartSeconds === null
+        ? worker.coldStartSeconds
+        : (coldStartSeconds * jobs + worker.coldStartSeconds) / (jobs + 1);
+
+    this.metrics.jobs = jobs + 1;
+    this.metrics.coldStartSeconds = coldStart;
+    this.metrics.savedSeconds += worker.coldStartSeconds;
+
+    console.log(
+      `Worker pool: job ${this.metrics.jobs} skipped a ~${worker.coldStartSeconds.toFixed(2)}s cold start (${this.metrics.savedSeconds.toFixed(1)}s saved in total).`,
+    );
+  }
+
+  private replace(index: number): void {
+    this.workers[index].kill();
+    this.workers[index] = new PoolWorker(this.preload, this.user);
+    this.metrics.recycledWorkers++;
+  }
+}
+
+export default WorkerPool;
@@ -0,0 +1,27 @@
+import { RunProgress } from "../../../shared/sharedTypes";
+
+// One heartbeat from ubacktest/progress.py, as the local backends relay it;
+// null for anything else (a line cut off by a kill).
+export function toRunProgress(heartbeat: any): RunProgress | null {
+  if (typeof heartbeat !== "object" || heartbeat === null) return null;
+
+  const numberOrNull = (value: unknown) =>
+    typeof value === "number" && Number.isFinite(value) ? value : null;
+  return {
+    state: "running",
+    elapsed: numberOrNull(heartbeat.elapsed),
+    cpu: numberOrNull(heartbeat.cpu),
+    done: numberOrNull(heartbeat.done),
+    total: numberOrNull(heartbeat.total),
+    message: typeof heartbeat.message === "string" ? heartbeat.message : null,
+    stopping: heartbeat.stopping === true,
+  };
+}
+
+export function parseHeartbeat(line: string): RunProgress | null {
+  try {
+    return toRunProgress(JSON.parse(line));
+  } catch {
+    return null;
+  }
+}
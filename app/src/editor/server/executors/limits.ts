@@ -0,0 +1,7 @@
+// What every submission may use, whichever backend runs it. The harness
+// passes these on to pools the strategy starts itself, and sets its soft
+// deadline (see ubacktest/progress.py) below the time limits.
+export const MEMORY_LIMIT_KB = 1024000;
+export const MAX_THREADS = 256;
+export const CPU_TIME_LIMIT = 59; // seconds
+export const WALL_TIME_LIMIT = 89; // seconds
@@ -0,0 +1,40 @@
+import { ExecutionResult } from "./types";
+
+// What the local backends know about a finished job.
+export type LocalRun = {
+  stdout: string;
+  stderr: string;
+  exitCode: number | null;
+  exitSignal: number | null;
+  timedOut: boolean;
+  time: number; // CPU seconds
+  memory: number | null; // KB
+};
+
+const SIGXCPU = 24; // raised once RLIMIT_CPU is hit
+
+// Maps a local run onto the Judge0 status ids CodeExecutor already handles.
+export function toExecutionResult(run: LocalRun): ExecutionResult {
+  let status = { id: 3, description: "Accepted" };
+  let message: string | null = null;
+
+  if (run.timedOut || run.exitSignal === SIGXCPU) {
+    status = { id: 5, description: "Time Limit Exceeded" };
+    message = "Time limit exceeded";
+  } else if (run.exitSignal !== null) {
+    status = { id: 12, description: "Runtime Error (Other)" };
+    message = `Exited with signal ${run.exitSignal}`;
+  } else if (run.exitCode !== 0) {
+    status = { id: 11, description: "Runtime Error (NZEC)" };
+    message = `Exited with error status ${run.exitCode}`;
+  }
+
+  return {
+    stdout: run.stdout,
+    stderr: run.stderr,
+    message,
+    memory: run.memory,
+    time: run.time.toString(),
+    status,
+  };
+}
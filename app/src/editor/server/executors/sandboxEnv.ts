@@ -0,0 +1,65 @@
+/*
+    What the local backends (SubprocessExecutor, WorkerPool) hand a job.
+    Jobs see an allowlisted environment only, never the server's own (the
+    database URL, API keys and JWT secret live there), and run under the
+    unprivileged EXECUTOR_UID/EXECUTOR_GID, which the Python side switches
+    to (drop_privileges in sandboxLimits.ts) just before the submitted code
+    starts. Switching uid needs a server that may setuid (root, or
+    CAP_SETUID, CAP_SETGID and CAP_CHOWN).
+*/
+
+export type SandboxUser = {
+  uid: number;
+  gid: number;
+};
+
+const ALLOWED_ENV = ["PATH", "LANG", "PYTHONPATH"];
+
+let warnedUnisolated = false;
+
+export function sandboxEnv(extra: Record<string, string> = {}) {
+  const env: Record<string, string> = {};
+  for (const [name, value] of Object.entries(process.env)) {
+    if (value === undefined) continue;
+    if (ALLOWED_ENV.includes(name) || name.startsWith("UBACKTEST_")) {
+      env[name] = value;
+    }
+  }
+  // read by the launcher before the job starts (see sandboxLimits.ts)
+  if (process.env.EXECUTOR_CGROUP) {
+    env.EXECUTOR_CGROUP = process.env.EXECUTOR_CGROUP;
+  }
+  return { ...env, ...extra };
+}
+
+// The uid/gid jobs run as, or null when none is configured. Without one a
+// job runs as the server itself, which production refuses outright.
+export function sandboxUser(): SandboxUser | null {
+  const uid = process.env.EXECUTOR_UID;
+  if (!uid) {
+    if (process.env.NODE_ENV === "production") {
+      throw new Error(
+        "EXECUTOR_UID is not set: local executors refuse to run jobs as the server's own user.",
+      );
+    }
+    if (!warnedUnisolated) {
+      console.warn(
+        "!!! EXECUTOR_UID is not set: local jobs are NOT ISOLATED and run as the server's own user. Dev only. !!!",
+      );
+      warnedUnisolated = true;
+    }
+    return null;
+  }
+
+  const user = {
+    uid: parseInt(uid),
+    gid: parseInt(process.env.EXECUTOR_GID || uid),
+  };
+  if (!Number.isInteger(user.uid) || !Number.isInteger(user.gid)) {
+    throw new Error("EXECUTOR_UID and EXECUTOR_GID must be numeric ids.");
+  }
+  if (user.uid === 0 || user.gid === 0) {
+    throw new Error("EXECUTOR_UID and EXECUTOR_GID must not be root.");
+  }
+  return user;
+}
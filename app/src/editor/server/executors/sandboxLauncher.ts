@@ -0,0 +1,65 @@
+import { sandboxLimits } from "./sandboxLimits";
+
+/*
+    Source of the launcher SubprocessExecutor (and tools/judge0_standin.py)
+    starts in a job's working directory. It unpacks files.zip, forks the
+    limited child that runs script.py, and reports the child's rusage as one
+    JSON line on the file descriptor named by UBACKTEST_STATS_FD. The child
+    keeps the one named by UBACKTEST_PROGRESS_FD for its heartbeats, and
+    runs as spec.uid/spec.gid when they are given.
+
+    usage: python3 -c <launcher> '{"cpu_time_limit": 59, "memory_limit": 1024000, "max_threads": 256, "uid": 990, "gid": 990}'
+*/
+
+export const sandboxLauncher = String.raw`
+import json
+import math
+import os
+import resource
+import sys
+import zipfile
+
+${sandboxLimits}
+
+def main():
+    spec = json.loads(sys.argv[1])
+    stats_fd = int(os.environ.get("UBACKTEST_STATS_FD", "-1"))
+    progress_fd = int(os.environ.get("UBACKTEST_PROGRESS_FD", "-1"))
+
+    if os.path.exists("files.zip"):
+        with zipfile.ZipFile("files.zip") as archive:
+            archive.extractall(".")
+        os.remove("files.zip")
+
+    pid = os.fork()
+    if pid == 0:
+        if stats_fd >= 0:
+            os.close(stats_fd)
+        uid, gid = spec.get("uid"), spec.get("gid")
+        private_tmp(os.getcwd())
+        hand_over(os.getcwd(), uid, gid)
+        join_cgroup(spec["memory_limit"], spec["max_threads"])
+        apply_limits(spec["memory_limit"], spec["cpu_time_limit"], spec["max_threads"], uid=uid)
+        drop_privileges(uid, gid)
+        os.execv(sys.executable, [sys.executable, "script.py"])
+
+    if progress_fd >= 0:
+        os.close(progress_fd)  # so the reader sees the end when the child exits
+
+    _, status, usage = os.wait4(pid, 0)
+    memory = cgroup_peak_kb(pid) or usage.ru_maxrss
+    leave_cgroup(pid)
+
+    stats = {
+        "exit_code": os.WEXITSTATUS(status) if os.WIFEXITED(status) else None,
+        "exit_signal": os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+        "time": round(usage.ru_utime + usage.ru_stime, 3),
+        "memory": memory,
+    }
+    if stats_fd >= 0:
+        with os.fdopen(stats_fd, "w") as f:
+            f.write(json.dumps(stats) + "\n")
+
+
+main()
+`;
@@ -0,0 +1,102 @@
+/*
+    Python helpers shared by the local backends (WorkerPool, SubprocessExecutor)
+    to hold a job to the same limits Judge0 enforces. rlimits always apply;
+    when EXECUTOR_CGROUP names a delegated cgroup v2 directory, each job also
+    gets its own child cgroup with memory.max and pids.max set. A job gets
+    a tmp and home inside its own directory, and when EXECUTOR_UID is set
+    (see sandboxEnv.ts) that directory is handed to the sandbox user before
+    the job drops to it.
+*/
+
+export const sandboxLimits = String.raw`
+def count_user_threads(uid):
+    total = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+            if int(status["Uid"].split()[0]) == uid:
+                total += int(status["Threads"])
+        except (OSError, KeyError, ValueError):
+            continue
+    return total
+
+
+def apply_limits(memory_kb, cpu_seconds, max_threads, baseline_bytes=0, uid=None):
+    memory = baseline_bytes + int(memory_kb) * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored
+    cpu = int(math.ceil(cpu_seconds))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    # RLIMIT_NPROC counts every thread this user owns, so leave room for the
+    # ones already running (it is not enforced for root; use a cgroup there)
+    user = os.getuid() if uid is None else uid
+    threads = count_user_threads(user) + int(max_threads)
+    resource.setrlimit(resource.RLIMIT_NPROC, (threads, threads))
+
+
+def private_tmp(workdir):
+    path = os.path.join(workdir, ".tmp")
+    os.makedirs(path, exist_ok=True)
+    os.environ["TMPDIR"] = os.environ["HOME"] = path
+    return path
+
+
+def hand_over(workdir, uid, gid):
+    if uid is None:
+        return
+    os.chown(workdir, uid, gid)
+    for root, dirs, files in os.walk(workdir):
+        for name in dirs + files:
+            os.chown(os.path.join(root, name), uid, gid, follow_symlinks=False)
+
+
+def drop_privileges(uid, gid):
+    if uid is None:
+        return
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+
+
+def cgroup_path(pid):
+    root = os.environ.get("EXECUTOR_CGROUP")
+    return os.path.join(root, f"job-{pid}") if root else None
+
+
+def join_cgroup(memory_kb, max_threads):
+    path = cgroup_path(os.getpid())
+    if not path:
+        return
+    try:
+        os.mkdir(path)
+        with open(os.path.join(path, "memory.max"), "w") as f:
+            f.write(str(int(memory_kb) * 1024))
+        with open(os.path.join(path, "pids.max"), "w") as f:
+            f.write(str(int(max_threads)))
+        with open(os.path.join(path, "cgroup.procs"), "w") as f:
+            f.write("0")
+    except OSError as e:
+        print(f"cgroup limits unavailable: {e}", file=sys.stderr)
+
+
+def cgroup_peak_kb(pid):
+    path = cgroup_path(pid)
+    try:
+        with open(os.path.join(path, "memory.peak")) as f:
+            return int(f.read()) // 1024
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def leave_cgroup(pid):
+    path = cgroup_path(pid)
+    if path and os.path.isdir(path):
+        try:
+            os.rmdir(path)
+        except OSError:
+            pass
+`;
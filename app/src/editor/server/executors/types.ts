@@ -0,0 +1,30 @@
+import { RunProgress } from "../../../shared/sharedTypes";
+
+// What CodeExecutor hands to an execution backend.
+export type ExecutionRequest = {
+  code: string;
+  additionalFiles?: string; // base64 zip unpacked next to the script
+  cpuTimeLimit: number; // seconds
+  wallTimeLimit: number; // seconds
+  memoryLimit: number; // KB
+  maxThreads: number;
+  onProgress?: (progress: RunProgress) => void; // called per heartbeat
+};
+
+// The decoded subset of a Judge0 submission that CodeExecutor relies on.
+// Local backends report the same shape (and the same status ids).
+export type ExecutionResult = {
+  stdout: string;
+  stderr: string;
+  message: string | null;
+  memory: number | null; // KB
+  time: string | null; // CPU time in seconds
+  status: {
+    id: number;
+    description: string;
+  };
+};
+
+export interface Executor {
+  run(request: ExecutionRequest): Promise<ExecutionResult>;
+}
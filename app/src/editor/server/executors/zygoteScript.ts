@@ -0,0 +1,192 @@
+/*
+    Source of the warm worker processes kept by WorkerPool. Each worker
+    imports the heavy scientific stack once, then forks a fresh copy-on-write
+    child per job, relaying the job's progress heartbeats while it waits.
+*/
+
+import { sandboxLimits } from "./sandboxLimits";
+
+export const zygoteScript = String.raw`"""
+Warm worker for the local execution pool. Imports the heavy scientific stack
+once, then reads one JSON job per line from stdin and runs each in a forked
+child, so every job starts with the libraries already in memory but cannot
+see or modify another job's state. While a job runs, its heartbeats (see
+ubacktest/progress.py) go out as {"id": ..., "progress": ...} lines.
+"""
+
+import base64
+import io
+import json
+import math
+import os
+import resource
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+import zipfile
+
+protocol = sys.stdout
+
+
+def emit(message):
+    protocol.write(json.dumps(message) + "\n")
+    protocol.flush()
+
+
+${sandboxLimits}
+
+def address_space():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+
+def run_child(job, workdir, stdout_path, stderr_path, progress_fd):
+    os.setsid()
+    os.environ["UBACKTEST_PROGRESS_FD"] = str(progress_fd)
+    os.chdir(workdir)
+    private_tmp(workdir)
+    tempfile.tempdir = None  # picked up from TMPDIR again on next use
+    hand_over(workdir, job.get("uid"), job.get("gid"))
+
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(os.open(stdout_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC), 1)
+    os.dup2(os.open(stderr_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC), 2)
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = io.TextIOWrapper(open(1, "wb", closefd=False), line_buffering=True)
+    sys.stderr = io.TextIOWrapper(open(2, "wb", closefd=False), line_buffering=True)
+
+    join_cgroup(job["memory_limit"], job["max_threads"])
+    # the warm baseline is already mapped, so the memory limit applies on top of it
+    apply_limits(job["memory_limit"], job["cpu_time_limit"], job["max_threads"], address_space(), job.get("uid"))
+    drop_privileges(job.get("uid"), job.get("gid"))
+
+    sys.argv = ["script.py"]
+    sys.path[0] = workdir
+    code = 0
+    try:
+        with open("script.py") as f:
+            source = f.read()
+        exec(compile(source, "script.py", "exec"), {"__name__": "__main__", "__file__": "script.py"})
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if not isinstance(e.code, int) and e.code is not None:
+            print(e.code, file=sys.stderr)
+    except BaseException as e:
+        # drop this frame so tracebacks start at the submitted script
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+
+class Heartbeats:
+    # complete lines from a job's progress pipe, passed on as they arrive
+    def __init__(self, job_id, fd):
+        self.job_id = job_id
+        self.fd = fd
+        self.pending = b""
+
+    def relay(self):
+        try:
+            chunk = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        *lines, self.pending = (self.pending + chunk).split(b"\n")
+        self.pending = self.pending[-65536:]
+        for line in lines:
+            try:
+                emit({"id": self.job_id, "progress": json.loads(line)})
+            except ValueError:
+                pass
+
+
+def run(job):
+    workdir = tempfile.mkdtemp(prefix="ubacktest-")
+    # kept out of the job's reach, since the job's directory is handed to it
+    outdir = tempfile.mkdtemp(prefix="ubacktest-out-")
+    stdout_path = os.path.join(outdir, "stdout")
+    stderr_path = os.path.join(outdir, "stderr")
+    try:
+        with open(os.path.join(workdir, "script.py"), "wb") as f:
+            f.write(base64.b64decode(job["code"]))
+        if job.get("files"):
+            with zipfile.ZipFile(io.BytesIO(base64.b64decode(job["files"]))) as archive:
+                archive.extractall(workdir)
+
+        progress_read, progress_write = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(progress_read)
+            run_child(job, workdir, stdout_path, stderr_path, progress_write)
+        os.close(progress_write)
+        os.set_blocking(progress_read, False)
+        heartbeats = Heartbeats(job["id"], progress_read)
+
+        deadline = started + job["wall_time_limit"]
+        timed_out = False
+        while True:
+            heartbeats.relay()
+            finished, status, usage = os.wait4(pid, os.WNOHANG)
+            if finished:
+                break
+            if time.perf_counter() > deadline:
+                timed_out = True
+                os.killpg(pid, signal.SIGKILL)
+                finished, status, usage = os.wait4(pid, 0)
+                break
+            time.sleep(0.005)
+        wall_time = time.perf_counter() - started
+        os.close(progress_read)
+        memory = cgroup_peak_kb(pid) or usage.ru_maxrss
+        leave_cgroup(pid)
+
+        with open(stdout_path, "rb") as f:
+            stdout = f.read()
+        with open(stderr_path, "rb") as f:
+            stderr = f.read()
+
+        cpu_time = usage.ru_utime + usage.ru_stime
+        return {
+            "id": job["id"],
+            "stdout": base64.b64encode(stdout).decode(),
+            "stderr": base64.b64encode(stderr).decode(),
+            "exit_code": os.WEXITSTATUS(status) if os.WIFEXITED(status) else None,
+            "exit_signal": os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+            "timed_out": timed_out or cpu_time > job["cpu_time_limit"],
+            "time": round(cpu_time, 3),
+            "wall_time": round(wall_time, 3),
+            "memory": memory,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        shutil.rmtree(outdir, ignore_errors=True)
+
+
+def main():
+    started = time.perf_counter()
+    preloaded = []
+    for name in filter(None, os.environ.get("UBACKTEST_PRELOAD", "").split(",")):
+        try:
+            __import__(name.strip())
+            preloaded.append(name.strip())
+        except Exception:
+            pass
+    emit({"ready": True, "preloaded": preloaded, "preload_seconds": round(time.perf_counter() - started, 3)})
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            emit(run(job))
+        except Exception:
+            emit({"id": job.get("id"), "error": traceback.format_exc()})
+
+
+main()
+`;
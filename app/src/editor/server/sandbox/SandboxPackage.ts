@@ -0,0 +1,50 @@
+import SandboxArchive from "../SandboxArchive";
+import { batchModule } from "./batchModule";
+import { checksModule } from "./checksModule";
+import { columnsModule } from "./columnsModule";
+import { indicatorsModule } from "./indicatorsModule";
+import { modelcacheModule } from "./modelcacheModule";
+import { poolModule } from "./poolModule";
+import { portfolioModule } from "./portfolioModule";
+import { profilingModule } from "./profilingModule";
+import { progressModule } from "./progressModule";
+import { regressionModule } from "./regressionModule";
+import { robustnessModule } from "./robustnessModule";
+import { sequencesModule } from "./sequencesModule";
+import { sweepModule } from "./sweepModule";
+import { walkforwardModule } from "./walkforwardModule";
+
+/*
+    The `ubacktest` Python package shipped next to every submission. The
+    harness imports it after the user's code, and strategies may import it
+    too. Module sources live here as strings, like the other Python snippets
+    the server generates.
+*/
+
+const MODULES: Record<string, string> = {
+  "__init__.py": "",
+  "batch.py": batchModule,
+  "checks.py": checksModule,
+  "columns.py": columnsModule,
+  "indicators.py": indicatorsModule,
+  "modelcache.py": modelcacheModule,
+  "pool.py": poolModule,
+  "portfolio.py": portfolioModule,
+  "profiling.py": profilingModule,
+  "progress.py": progressModule,
+  "regression.py": regressionModule,
+  "robustness.py": robustnessModule,
+  "sequences.py": sequencesModule,
+  "sweep.py": sweepModule,
+  "walkforward.py": walkforwardModule,
+};
+
+class SandboxPackage {
+  public static addTo(archive: SandboxArchive): void {
+    for (const [file, source] of Object.entries(MODULES)) {
+      archive.add(`ubacktest/${file}`, source.trimStart());
+    }
+  }
+}
+
+export default SandboxPackage;
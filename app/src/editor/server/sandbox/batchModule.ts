@@ -0,0 +1,61 @@
+/*
+    ubacktest/batch.py: runs one strategy over many slices (symbol x date
+    window) inside one submission and returns statistics per slice.
+
+    Every slice ships as its own binary quote and pricing columns. As in a
+    sweep, the first slice runs in-process to measure its peak memory, and
+    the rest are spread over ubacktest.pool workers.
+*/
+
+export const batchModule = String.raw`
+import pandas as pd
+
+from . import checks, columns, pool, portfolio, profiling, progress
+
+_job = None  # set before forking, so workers inherit it
+
+
+def _evaluate(index):
+    spec = _job["slices"][index]
+    try:
+        df_init = pd.DataFrame(columns.load_columns(spec["quote"]), copy=False)
+        if df_init.shape[0] <= 3:
+            raise Exception("Sorry, we detected less than 3 data points and had trouble applying your strategy.")
+        df = checks.check_result(_job["strategy"](df_init), df_init.shape[0])
+        df = df[df['timestamp'] >= spec["startDate"]]
+        _, stats = portfolio.evaluate(
+            df['signal'].round(3).to_numpy(), columns.load_columns(spec["pricing"]), _job["cost_per_trade"]
+        )
+        return index, stats, None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+def run(strategy, slices, cost_per_trade, memory_limit_kb):
+    global _job
+    _job = {"strategy": strategy, "slices": slices, "cost_per_trade": cost_per_trade}
+    results = [{"statistics": None, "error": None} for _ in slices]
+
+    evaluated = 0
+
+    def on_result(result):
+        nonlocal evaluated
+        index, stats, error = result
+        results[index]["statistics"] = stats
+        results[index]["error"] = error
+        evaluated += 1
+        progress.report(evaluated, len(results), "batch")
+
+    first, peak = profiling.traced_peak(_evaluate, 0)
+    on_result(first)
+
+    remaining = list(range(1, len(slices)))
+    workers = pool.worker_count(peak, len(remaining), memory_limit_kb)
+    pool.run(_evaluate, remaining, workers, on_result, should_stop=progress.stopping)
+
+    for result in results:
+        if result["statistics"] is None and result["error"] is None:
+            result["error"] = pool.STOPPED if progress.stopping() else pool.WORKER_DIED
+
+    return {"slices": results, "workers": workers}
+`;
@@ -0,0 +1,37 @@
+/*
+    ubacktest/checks.py: the checks every strategy result has to pass before
+    it is priced. Messages are shown to users verbatim (and asserted by the
+    e2e tests), so keep them stable.
+*/
+
+export const checksModule = String.raw`
+import pandas as pd
+
+
+def check_result(df, init_height):
+    if not isinstance(df, pd.DataFrame):
+        raise Exception("You must return a dataframe from your strategy.")
+
+    df.columns = df.columns.str.lower()
+
+    if 'signal' not in df.columns:
+        raise Exception("There is no 'signal' column in the table.")
+
+    if (df.columns == 'signal').sum() > 1:
+        raise Exception("There are two or more 'signal' columns in the table.")
+
+    if df['signal'].empty:
+        raise Exception("'signal' column is empty.")
+
+    if (df['signal'] > 1).any() or (df['signal'] < -1).any():
+        raise Exception("'signal' column contains values outside the range [-1, 1].")
+
+    if not df.index.is_unique:
+        raise Exception("Table index is not unique.")
+
+    if df.shape[0] != init_height:
+        raise Exception("The height of the dataframe has changed upon applying your strategy.")
+
+    df['signal'] = df['signal'].ffill().fillna(0)
+    return df
+`;
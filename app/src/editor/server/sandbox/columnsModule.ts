@@ -0,0 +1,20 @@
+/*
+    ubacktest/columns.py: maps the raw column files QuoteEncoder writes into
+    numpy arrays. Files are mapped copy-on-write, so callers can still edit
+    the arrays in place without touching the files on disk.
+*/
+
+export const columnsModule = String.raw`
+import numpy as np
+
+
+def load_columns(manifest):
+    columns = {}
+    for name, spec in manifest.items():
+        if spec["length"] == 0:
+            values = np.empty(0, dtype=spec["dtype"])  # np.memmap refuses empty files
+        else:
+            values = np.memmap(spec["file"], dtype=spec["dtype"], mode="c", shape=(spec["length"],))
+        columns[name] = values.astype(str) if values.dtype.kind == "S" else values
+    return columns
+`;
@@ -0,0 +1,120 @@
+/*
+    ubacktest/indicators.py: the indicators the examples use, for strategies
+    to import instead of re-implementing them:
+
+        from ubacktest.indicators import rsi, sma
+
+    Each function returns exactly what the example code it replaces computed
+    (tools/check_indicators.py checks this). Rolling and EWM indicators are
+    pandas one-liners; OBV is a cumulative sum. AMA and Parabolic SAR are
+    recurrences, so they run as plain float loops over NumPy arrays rather
+    than through .iloc, which is where the example versions spent their time.
+*/
+
+export const indicatorsModule = String.raw`
+import numpy as np
+import pandas as pd
+
+
+def sma(series, window):
+    return series.rolling(window=window).mean()
+
+
+def ema(series, span):
+    return series.ewm(span=span, adjust=False).mean()
+
+
+def rsi(series, window=14):
+    delta = series.diff()
+
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    rs = gain.rolling(window=window).mean() / loss.rolling(window=window).mean()
+    return 100 - (100 / (1 + rs))
+
+
+def bollinger_bands(series, window=20, num_std=2):
+    """Returns (upper band, lower band)."""
+    mid = sma(series, window)
+    std = series.rolling(window=window).std()
+    return mid + (std * num_std), mid - (std * num_std)
+
+
+def macd(series, short_window=12, long_window=26, signal_window=9):
+    """Returns (MACD line, signal line)."""
+    line = ema(series, short_window) - ema(series, long_window)
+    return line, ema(line, signal_window)
+
+
+def obv(data):
+    """On-balance volume: running volume, added on up bars and subtracted on down bars."""
+    close = data['close'].to_numpy()
+    volume = data['volume'].to_numpy()
+
+    direction = np.zeros(len(close), dtype=np.int8)
+    direction[1:] = (close[1:] > close[:-1]).astype(np.int8) - (close[1:] < close[:-1]).astype(np.int8)
+
+    return pd.Series(np.cumsum(direction * volume), index=data.index)
+
+
+def ama(series, window=10, fast_ema=2, slow_ema=30):
+    """Kaufman's adaptive moving average."""
+    price_change = abs(series.diff(window))
+    volatility = series.diff().abs().rolling(window=window).sum()
+    efficiency_ratio = (price_change / volatility.replace(0, np.nan)).fillna(0)
+
+    fast, slow = 2 / (fast_ema + 1), 2 / (slow_ema + 1)
+    smoothing = ((efficiency_ratio * (fast - slow) + slow) ** 2).to_numpy(dtype=float).tolist()
+    values = series.to_numpy(dtype=float).tolist()
+
+    out = values[:1]
+    for i in range(1, len(values)):
+        previous = out[-1]
+        out.append(previous + smoothing[i] * (values[i] - previous))
+
+    return pd.Series(out, index=series.index, name=series.name, dtype=float)
+
+
+def parabolic_sar(data, step=0.02, max_step=0.2):
+    """Parabolic SAR as a NumPy array; the first value is NaN (warm-up)."""
+    high = data['high'].to_numpy(dtype=float).tolist()
+    low = data['low'].to_numpy(dtype=float).tolist()
+    close = data['close'].to_numpy(dtype=float).tolist()
+
+    sar = [np.nan] * len(close)
+    if len(close) < 2:
+        return np.array(sar)
+
+    af = step
+    uptrend = close[1] > close[0]
+    if uptrend:
+        sar[1], ep = low[0], high[0]
+    else:
+        sar[1], ep = high[0], low[0]
+
+    for i in range(2, len(close)):
+        value = sar[i - 1] + af * (ep - sar[i - 1])
+
+        # the SAR never moves into the prior two bars' range
+        if uptrend:
+            value = min(value, low[i - 1], low[i - 2])
+            if high[i] > ep:
+                ep = high[i]
+                af = min(af + step, max_step)
+        else:
+            value = max(value, high[i - 1], high[i - 2])
+            if low[i] < ep:
+                ep = low[i]
+                af = min(af + step, max_step)
+
+        # reversal: restart from the extreme point of the trend that ended
+        if uptrend and low[i] < value:
+            uptrend, value, ep, af = False, ep, low[i], step
+        elif not uptrend and high[i] > value:
+            uptrend, value, ep, af = True, ep, high[i], step
+
+        sar[i] = value
+
+    return np.array(sar)
+`;
@@ -0,0 +1,319 @@
+/*
+    ubacktest/modelcache.py: trained models kept between runs, so iterating
+    on the signal logic after an expensive fit does not refit every time:
+
+        from ubacktest.modelcache import cached_fit
+
+        model = cached_fit(
+            lambda: (X_train, y_train),
+            lambda: RandomForestClassifier(n_estimators=100).fit(X_train, y_train),
+        )
+
+    The key hashes what key_fn() returns (arrays, frames, parameters,
+    estimators' get_params()), the code of fit_fn and build and what they
+    close over or reference in the script (functions, classes, constants),
+    and the versions of the libraries loaded. Torch modules and Keras models
+    are stored as weights and rebuilt with build(); anything else that
+    pickles (sklearn models, prediction arrays) is stored whole.
+
+    Every user has a directory of their own on local disk, evicted
+    least-recently-used above a size limit (the server trims all of them
+    together to a second one). Each entry is signed with a key
+    the server derives for that user and is only loaded when the signature
+    checks out, so a file planted by someone else's job is never unpickled.
+    Weights are stored as .npz arrays and read back with allow_pickle=False.
+    The harness configures the cache; where it does not (Judge0, which has
+    no shared disk, or local executors that do not run jobs under their own
+    uid), cached_fit() just calls fit_fn().
+*/
+
+export const modelcacheModule = String.raw`
+import fcntl
+import hashlib
+import hmac
+import io
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import types
+import warnings
+
+COUNTERS = ("hits", "misses", "stores", "evictions", "uncached")
+VERSIONED = ("numpy", "pandas", "sklearn", "scipy", "torch", "tensorflow", "keras", "xgboost", "lightgbm")
+
+_directory = None
+_max_bytes = 0
+_secret = b""
+# shared with forked pool workers (sweeps, batches), so their lookups count.
+# Updates hold a POSIX record lock on the backing file, which each process
+# takes for itself (an flock would be shared with the forks).
+_counts_file = tempfile.TemporaryFile()
+_counts_file.truncate(8 * len(COUNTERS))
+_counts = mmap.mmap(_counts_file.fileno(), 8 * len(COUNTERS))
+
+
+def configure(directory, max_bytes, secret):
+    global _directory, _max_bytes, _secret
+    _directory = directory
+    _max_bytes = int(max_bytes)
+    _secret = bytes.fromhex(secret)
+
+
+def stats():
+    # None when cached_fit() was never called
+    counts = dict(zip(COUNTERS, struct.unpack_from(f"<{len(COUNTERS)}q", _counts)))
+    if not any(counts.values()):
+        return None
+    return {**counts, "enabled": _directory is not None}
+
+
+def _count(name, amount=1):
+    offset = 8 * COUNTERS.index(name)
+    fcntl.lockf(_counts_file, fcntl.LOCK_EX, 8, offset)
+    try:
+        struct.pack_into("<q", _counts, offset, struct.unpack_from("<q", _counts, offset)[0] + amount)
+    finally:
+        fcntl.lockf(_counts_file, fcntl.LOCK_UN, 8, offset)
+
+
+def cached_fit(key_fn, fit_fn, build=None):
+    # fit_fn()'s model, or the one an earlier run with the same key stored.
+    # Pass build (a function returning the untrained model) for torch and
+    # Keras models.
+    if _directory is None:
+        _count("uncached")
+        return fit_fn()
+
+    digest = hashlib.blake2b(digest_size=20)
+    _update(digest, (key_fn(), fit_fn, build, _versions()), set())
+    path = os.path.join(_directory, digest.hexdigest() + ".model")
+
+    model = _load(path, build)
+    if model is not None:
+        _count("hits")
+        return model
+    _count("misses")
+    model = fit_fn()
+    _store(path, model, build)
+    return model
+
+
+def _versions():
+    return sorted(
+        (name, str(getattr(sys.modules[name], "__version__", "")))
+        for name in VERSIONED if name in sys.modules
+    ) + [("python", sys.version)]
+
+
+def _update(digest, value, seen):
+    # feeds value into digest, tagged by type so equal reprs of different
+    # types do not collide
+    digest.update(type(value).__name__.encode() + b"\0")
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(repr(value).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update(digest, item, seen)
+    elif isinstance(value, dict):
+        digest.update(str(len(value)).encode())
+        for item_key in sorted(value, key=repr):
+            _update(digest, item_key, seen)
+            _update(digest, value[item_key], seen)
+    elif _is_array(value):
+        _update_array(digest, value)
+    elif isinstance(value, (types.FunctionType, type)):
+        if id(value) not in seen:
+            seen.add(id(value))
+            _update_code(digest, value, seen)
+    elif _is_torch_module(value):
+        _update(digest, (repr(value), value.state_dict()), seen)
+    elif type(value).__module__ == "__main__" and hasattr(value, "__dict__"):
+        if id(value) not in seen:
+            seen.add(id(value))
+            _update(digest, (type(value), vars(value)), seen)
+    elif hasattr(value, "get_params"):
+        _update(digest, (type(value).__qualname__, value.get_params(deep=False)), seen)
+    else:
+        try:
+            digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            raise ValueError(f"cached_fit cannot use a {type(value).__name__} in a key: {e}") from None
+
+
+def _is_torch_module(value):
+    torch = sys.modules.get("torch")
+    return torch is not None and isinstance(value, torch.nn.Module)
+
+
+def _is_array(value):
+    module = type(value).__module__
+    return module.startswith(("numpy", "pandas", "torch")) and hasattr(value, "shape")
+
+
+def _update_array(digest, value):
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index)).to_numpy().tobytes())
+        return
+    if hasattr(value, "detach"):  # a torch tensor
+        value = value.detach().cpu().numpy()
+    import numpy as np
+
+    value = np.ascontiguousarray(value)
+    digest.update(f"{value.dtype.str}{value.shape}".encode())
+    digest.update(value.tobytes() if value.dtype != object else pickle.dumps(value.tolist()))
+
+
+def _update_code(digest, fn, seen):
+    # a function's code, defaults, closure and the script-level names it
+    # uses; a class's own methods and attributes. Library modules and their
+    # functions are covered by _versions().
+    if isinstance(fn, type):
+        if fn.__module__ != "__main__":
+            digest.update(f"{fn.__module__}.{fn.__qualname__}".encode())
+            return
+        _update(digest, fn.__bases__, seen)
+        for name, attribute in sorted(vars(fn).items()):
+            if not name.startswith("__") or name == "__init__":
+                _update(digest, (name, attribute), seen)
+        return
+    if fn.__module__ != "__main__":
+        digest.update(f"{fn.__module__}.{fn.__qualname__}".encode())
+        return
+
+    _update_code_object(digest, fn.__code__)
+    _update(digest, fn.__defaults__, seen)
+    # values that cannot be hashed (locks, open files...) are left out
+    for cell in fn.__closure__ or ():
+        try:
+            _update(digest, cell.cell_contents, seen)
+        except ValueError:  # also raised for an empty cell
+            pass
+    for name in _global_names(fn.__code__):
+        referenced = fn.__globals__.get(name)
+        if referenced is not None and not isinstance(referenced, types.ModuleType):
+            try:
+                _update(digest, (name, referenced), seen)
+            except ValueError:
+                pass
+
+
+def _update_code_object(digest, code):
+    # bytecode, constants and names, but not line numbers: code that only
+    # moved does not change the key
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names + code.co_varnames).encode())
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            _update_code_object(digest, constant)
+        else:
+            digest.update(repr(constant).encode())
+
+
+def _global_names(code):
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= _global_names(constant)
+    return sorted(names)
+
+
+def _sign(path, payload):
+    # covers the entry's name too, so an entry cannot be moved under another key
+    return hmac.new(_secret, os.path.basename(path).encode() + b"\0" + payload, "sha256").digest()
+
+
+def _load(path, build):
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except FileNotFoundError:
+        return None
+    signature, payload = blob[:32], blob[32:]
+    if not hmac.compare_digest(signature, _sign(path, payload)):
+        return None  # not stored by this user's runs: fit again
+    try:
+        os.utime(path)  # most recently used
+        kind, _, body = payload.partition(b"\n")
+        if kind == b"pickle":
+            return pickle.loads(body)
+        import numpy as np
+
+        with np.load(io.BytesIO(body), allow_pickle=False) as arrays:
+            weights = {name: arrays[name] for name in arrays.files}
+        model = build()
+        if kind == b"torch":
+            torch = sys.modules["torch"]
+            model.load_state_dict({name: torch.from_numpy(value) for name, value in weights.items()})
+        else:
+            model.set_weights([weights[f"w{i}"] for i in range(len(weights))])
+        return model
+    except Exception:
+        # written by another version of the code or libraries: fit again
+        return None
+
+
+def _store(path, model, build):
+    if _is_torch_module(model):
+        kind, weights = "torch", {
+            name: value.detach().cpu().numpy() for name, value in model.state_dict().items()
+        }
+    elif type(model).__module__.startswith(("keras", "tensorflow")) and hasattr(model, "get_weights"):
+        kind, weights = "keras", {f"w{i}": value for i, value in enumerate(model.get_weights())}
+    else:
+        kind, weights = "pickle", None
+    if kind != "pickle" and build is None:
+        warnings.warn("cached_fit needs build= to store a torch or Keras model; it was not stored")
+        return
+
+    try:
+        if weights is None:
+            body = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            import numpy as np
+
+            buffer = io.BytesIO()
+            np.savez(buffer, **weights)
+            body = buffer.getvalue()
+        payload = kind.encode() + b"\n" + body
+        if len(payload) > _max_bytes:
+            return
+        os.makedirs(_directory, mode=0o700, exist_ok=True)
+        # written whole under a temporary name, so readers never see half
+        descriptor, temporary = tempfile.mkstemp(dir=_directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(_sign(path, payload) + payload)
+        os.replace(temporary, path)
+    except Exception as e:
+        warnings.warn(f"cached_fit could not store the model: {e}")
+        return
+    _count("stores")
+    _evict()
+
+
+def _evict():
+    entries = []
+    for name in os.listdir(_directory):
+        if name.endswith(".model"):
+            try:
+                status = os.stat(os.path.join(_directory, name))
+            except FileNotFoundError:
+                continue  # evicted by another job
+            entries.append((status.st_mtime, status.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= _max_bytes:
+            break
+        try:
+            os.remove(os.path.join(_directory, name))
+            _count("evictions")
+        except FileNotFoundError:
+            pass
+        total -= size
+`;
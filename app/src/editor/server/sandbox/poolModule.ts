@@ -0,0 +1,142 @@
+/*
+    ubacktest/pool.py: runs independent evaluations (sweep combinations,
+    batch slices, walk-forward fits) on forked workers inside one submission.
+
+    Workers are sized from a measured per-task peak so they fit in the memory
+    left under the submission's limit, inherit everything already loaded
+    copy-on-write, and stream pickled results back over pipes. Plain fork +
+    pipes is used rather than multiprocessing.Pool, which needs POSIX
+    semaphores the sandbox may not provide.
+*/
+
+export const poolModule = String.raw`
+import os
+import pickle
+import selectors
+import signal
+import struct
+import tracemalloc
+
+WORKER_OVERHEAD_KB = 32 * 1024
+MEMORY_HEADROOM = 0.8
+WORKER_DIED = "The worker evaluating this exited early (likely out of memory)."
+STOPPED = "Not evaluated: the submission was stopped close to its time limit."
+POLL_SECONDS = 0.1  # how often run() checks should_stop
+
+# The submission's memory (KB) and thread limits, filled in by the harness
+# for pools started from inside strategy(); None where unknown
+limits = {"memory_kb": None, "threads": None}
+_in_worker = False  # set in forked workers, which never fork again
+
+
+def _proc_value(path, key):
+    with open(path) as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _rss_kb():
+    return _proc_value("/proc/self/status", "VmRSS")
+
+
+def cpu_count():
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return cpus or 1
+
+
+def worker_count(peak_bytes, remaining, memory_limit_kb):
+    per_worker_kb = peak_bytes * 1.5 / 1024 + WORKER_OVERHEAD_KB
+    available_kb = memory_limit_kb * MEMORY_HEADROOM - _rss_kb()
+    fits = int(available_kb // per_worker_kb)
+    return max(1, min(fits, cpu_count(), remaining))
+
+
+def running_threads():
+    return max(1, _proc_value("/proc/self/status", "Threads"))
+
+
+def strategy_worker_count(peak_bytes, remaining):
+    # worker_count() within the limits, for pools started by strategy code;
+    # each worker is assumed to need as many threads as this process has
+    if _in_worker:
+        return 1
+    memory_kb = limits["memory_kb"] or _proc_value("/proc/meminfo", "MemAvailable") + _rss_kb()
+    workers = worker_count(peak_bytes, remaining, memory_kb)
+    if limits["threads"]:
+        threads = running_threads()
+        workers = min(workers, max(1, (limits["threads"] - threads) // threads))
+    return workers
+
+
+def run(evaluate, indices, workers, on_result, should_stop=None):
+    # results arrive in completion order; indices a dead worker never
+    # reported are simply missing, as are the rest once should_stop()
+    # turns true (the workers are killed)
+    global _in_worker
+    if workers <= 1:
+        for index in indices:
+            if should_stop is not None and should_stop():
+                return
+            on_result(evaluate(index))
+        return
+
+    readers = {}
+    pids = []
+    for chunk in (indices[i::workers] for i in range(workers)):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            _in_worker = True
+            os.close(read_fd)
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()  # a profiled parent's tracing is no use here
+            try:
+                with os.fdopen(write_fd, "wb") as out:
+                    for index in chunk:
+                        payload = pickle.dumps(evaluate(index), protocol=pickle.HIGHEST_PROTOCOL)
+                        out.write(struct.pack("<Q", len(payload)) + payload)
+                        out.flush()  # keep finished results if a later one kills us
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        pids.append(pid)
+        readers[read_fd] = bytearray()
+
+    timeout = None if should_stop is None else POLL_SECONDS
+    try:
+        with selectors.DefaultSelector() as selector:
+            for fd in readers:
+                selector.register(fd, selectors.EVENT_READ)
+            while readers:
+                for key, _ in selector.select(timeout):
+                    data = os.read(key.fd, 1 << 20)
+                    if not data:
+                        selector.unregister(key.fd)
+                        os.close(key.fd)
+                        del readers[key.fd]
+                        continue
+                    buffer = readers[key.fd]
+                    buffer += data
+                    while len(buffer) >= 8:
+                        size = struct.unpack_from("<Q", buffer)[0]
+                        if len(buffer) < 8 + size:
+                            break
+                        on_result(pickle.loads(bytes(buffer[8:8 + size])))
+                        del buffer[:8 + size]
+                if should_stop is not None and should_stop():
+                    break
+    finally:
+        # stopped early, or interrupted: workers still running are killed
+        if readers:
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            for fd in readers:
+                os.close(fd)
+        for pid in pids:
+            os.waitpid(pid, 0)
+`;
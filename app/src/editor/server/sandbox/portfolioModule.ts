@@ -0,0 +1,206 @@
+/*
+    ubacktest/portfolio.py: the portfolio model from PortfolioCalculator.ts,
+    vectorized so it can run inside the harness right after strategy(df).
+
+    Between two signal changes the position only compounds, so each bar's
+    value is the value at the last change times the cumulative growth since
+    then. Trading costs scale the value at every change point. Rounding and
+    statistics follow the TypeScript implementation exactly.
+*/
+
+export const portfolioModule = String.raw`
+import math
+
+import numpy as np
+import pandas as pd
+
+DECIMALS = 4
+ROUNDED = ("returns", "portfolio", "portfolioWithCosts", "cash", "equity")
+STATISTICS_SERIES = ("portfolio", "portfolioWithCosts", "returns")
+
+
+def round_half_up(values, decimals=DECIMALS):
+    # Math.round semantics (halves go up), not numpy's banker's rounding
+    scale = 10.0 ** decimals
+    return np.floor(values * scale + 0.5) / scale
+
+
+def simulate(close, signal, cost_per_trade=0.0):
+    close = np.asarray(close, dtype=np.float64)
+    signal = np.asarray(signal, dtype=np.float64)
+    cost = cost_per_trade / 100
+    n = len(close)
+
+    with np.errstate(all="ignore"):
+        # growth over bar i of a position opened with the previous bar's signal
+        stock_ret = np.diff(close) / close[:-1]
+        growth = np.ones(n)
+        growth[1:] = 1 + np.where(signal[:-1] < 0, -stock_ret, stock_ret)
+
+        changed = np.empty(n, dtype=bool)
+        changed[0] = True
+        changed[1:] = signal[1:] != signal[:-1]
+
+        # owner[i] is the change point whose position is held going into bar i
+        last_change = np.maximum.accumulate(np.where(changed, np.arange(n), 0))
+        owner = np.concatenate(([0], last_change[:-1]))
+        held = pd.Series(growth).groupby(owner, sort=False).cumprod().to_numpy()
+
+        exposure = np.abs(signal[owner])
+        scale = 1 + exposure * (np.abs(held) - 1)
+
+        change_points = np.flatnonzero(changed)
+        keep = np.ones(len(change_points))
+        keep[0] = 1 - abs(cost * signal[0])
+        keep[1:] = 1 - cost * np.abs(np.diff(signal[change_points]))
+
+        level = np.zeros(n)
+        level[change_points] = np.cumprod(scale[change_points])
+        level_costs = np.zeros(n)
+        level_costs[change_points] = np.cumprod(scale[change_points] * keep)
+
+        portfolio = np.where(changed, level, level[owner] * scale)
+        portfolio_costs = np.where(changed, level_costs, level_costs[owner] * scale)
+
+        equity = np.where(changed, portfolio * signal, level[owner] * signal[owner] * held)
+        equity_costs = np.where(
+            changed, portfolio_costs * signal, level_costs[owner] * signal[owner] * held
+        )
+
+        returns = np.zeros(n)
+        returns[1:] = np.diff(portfolio) / portfolio[:-1]
+
+        series = {
+            "returns": returns,
+            "portfolio": portfolio,
+            "portfolioWithCosts": portfolio_costs,
+            "cash": np.maximum(0, portfolio - np.abs(equity)),
+            "equity": equity,
+            "cashWithCosts": np.maximum(0, portfolio_costs - np.abs(equity_costs)),
+            "equityWithCosts": equity_costs,
+        }
+
+        for name in ROUNDED:
+            series[name] = round_half_up(series[name])
+
+    return series
+
+
+def _finite(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def statistics(series, signal, timestamp):
+    return statistics_batch(
+        {name: np.asarray(series[name])[None, :] for name in STATISTICS_SERIES},
+        np.asarray(signal, dtype=np.float64)[None, :],
+        timestamp,
+    )[0]
+
+
+def statistics_batch(series, signal, timestamp):
+    # statistics() for every row of (paths x bars) "portfolio",
+    # "portfolioWithCosts" and "returns" arrays; signal is (paths x bars) or
+    # one signal shared by every row, and all rows share the timestamps.
+    # Each row's figures are exactly what statistics() gives for it alone.
+    portfolio = np.asarray(series["portfolio"], dtype=np.float64)
+    with_costs = np.asarray(series["portfolioWithCosts"], dtype=np.float64)
+    returns = np.asarray(series["returns"], dtype=np.float64)[:, 1:]  # dont include the first 0% return
+    signal = np.broadcast_to(np.asarray(signal, dtype=np.float64), portfolio.shape)
+    rows, bars = portfolio.shape
+    last = bars - 1
+    first = portfolio[:, 0]
+
+    with np.errstate(all="ignore"):
+        pl = 100 * (portfolio[:, last] - first) / first
+        pl_w_costs = 100 * (with_costs[:, last] - with_costs[:, 0]) / first
+
+        days = (pd.Timestamp(str(timestamp[last])) - pd.Timestamp(str(timestamp[0]))) / pd.Timedelta(days=1)
+        cagr = ((portfolio[:, last] / first) ** (np.float64(365) / days) - 1) * 100
+
+        # a trade is profitable if the portfolio grew since the previous trade
+        # (or since the start, for the first one)
+        traded = signal[:, 1:] != signal[:, :-1]
+        num_trades = np.count_nonzero(traded, axis=1)
+        trade_bar = np.where(traded, np.arange(1, bars), 0)
+        previous_trade = np.zeros_like(trade_bar)
+        np.maximum.accumulate(trade_bar[:, :-1], axis=1, out=previous_trade[:, 1:])
+        bought_at = np.take_along_axis(portfolio, previous_trade, axis=1)
+        num_prof_trades = np.count_nonzero(traded & (portfolio[:, 1:] > bought_at), axis=1)
+
+        held_throughout = (signal[:, 0] != 0) & (num_trades == 0)
+        num_trades = np.where(held_throughout, 1, num_trades)
+        num_prof_trades = num_prof_trades + (held_throughout & (portfolio[:, last] > first))
+
+        peak = np.maximum.accumulate(portfolio, axis=1)[:, 1:]
+        drawdowns = peak - portfolio[:, 1:]
+        drawdowns /= peak
+        max_drawdown = drawdowns.max(axis=1, initial=0.0)
+
+        perc_trades_prof = np.where(num_trades != 0, 100 * num_prof_trades / np.maximum(num_trades, 1), 0)
+        max_gain = 100 * (portfolio.max(axis=1) - first) / first
+
+        count = returns.shape[1]
+        mean_return = returns.sum(axis=1) / np.float64(count)
+        deviations = returns - mean_return[:, None]
+        std_dev = np.sqrt(np.einsum("ij,ij->i", deviations, deviations) / count)
+        # downside: squares of the negative returns only
+        downside = np.minimum(returns, 0.0, out=deviations)
+        downside_dev = np.sqrt(
+            np.einsum("ij,ij->i", downside, downside) / np.maximum(np.count_nonzero(downside, axis=1), 1)
+        )
+        risk_free_rate = 0
+
+        sharpe = (mean_return - risk_free_rate) / std_dev
+        sortino = (mean_return - risk_free_rate) / downside_dev
+        max_return = returns.max(axis=1, initial=-np.inf)
+        min_return = returns.min(axis=1, initial=np.inf)
+
+    return [
+        {
+            "length": bars,
+            "pl": _finite(pl[row]),
+            "plWCosts": _finite(pl_w_costs[row]),
+            "cagr": _finite(cagr[row]),
+            "numTrades": int(num_trades[row]),
+            "numProfTrades": int(num_prof_trades[row]),
+            "percTradesProf": _finite(perc_trades_prof[row]),
+            "sharpeRatio": _finite(sharpe[row]) if num_trades[row] != 0 else None,
+            "sortinoRatio": _finite(sortino[row]) if num_trades[row] != 0 else None,
+            "maxDrawdown": _finite(100 * max_drawdown[row]),
+            "maxGain": _finite(max_gain[row]),
+            "meanReturn": _finite(100 * mean_return[row]),
+            "stddevReturn": _finite(100 * std_dev[row]),
+            "maxReturn": _finite(100 * max_return[row]) if count else None,
+            "minReturn": _finite(100 * min_return[row]) if count else None,
+        }
+        for row in range(rows)
+    ]
+
+
+def evaluate(signal, pricing, cost_per_trade):
+    # signal is the checked, post-warmup signal rounded as the server sees it
+    if len(signal) != len(pricing["close"]):
+        raise Exception("Your portfolio arrays are missing or mismatched in length.")
+    series = simulate(pricing["close"], signal, cost_per_trade)
+    return series, statistics(series, signal, pricing["timestamp"])
+
+
+def encode(series):
+    # Rounded series go back as whole multiples of 10**-DECIMALS: integers
+    # serialize several times faster than floats, and the server's k / 10**4
+    # is exactly what Math.round produced. Anything else (NaN/inf as null,
+    # for ResultValidator) goes back as plain floats.
+    scale = 10 ** DECIMALS
+    encoded = {"scale": scale, "rounded": {}, "values": {}}
+    for name, values in series.items():
+        finite = np.isfinite(values).all()
+        if name in ROUNDED and finite and np.abs(values).max(initial=0) < 2 ** 53 / scale:
+            encoded["rounded"][name] = np.rint(values * scale).astype(np.int64).tolist()
+        elif finite:
+            encoded["values"][name] = values.tolist()
+        else:
+            encoded["values"][name] = [v if math.isfinite(v) else None for v in values.tolist()]
+    return encoded
+`;
@@ -0,0 +1,166 @@
+/*
+    ubacktest/profiling.py: per-stage wall time, CPU time and (optionally)
+    tracemalloc peak of the harness, returned with the result when
+    HARNESS_PROFILE is set. Disabled, stage() hands back one shared no-op
+    context manager, so the instrumented harness costs next to nothing.
+
+    profile_call() is the user-facing "profile this run" option: cProfile
+    for the hottest functions, plus a SIGPROF sampler for the hottest lines
+    of the strategy's own file.
+*/
+
+export const profilingModule = String.raw`
+import collections
+import contextlib
+import cProfile
+import linecache
+import os
+import pstats
+import signal
+import sys
+import time
+import tracemalloc
+
+_DISABLED = contextlib.nullcontext()
+SAMPLE_INTERVAL = 0.005  # seconds of CPU time between line samples
+_hidden_peak = 0  # a peak traced_peak reset while a stage was measuring
+
+
+def traced_peak(fn, *args):
+    # Calls fn and returns (result, the most it held on top of what was
+    # live before). Tracing that was already on (a profiled harness) stays
+    # on, and the enclosing stage still sees its own peak.
+    global _hidden_peak
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    baseline, peak = tracemalloc.get_traced_memory()
+    _hidden_peak = max(_hidden_peak, peak)
+    tracemalloc.reset_peak()
+    try:
+        result = fn(*args)
+        return result, max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+class Stages:
+    def __init__(self, enabled=False, memory=False):
+        self.enabled = enabled
+        # tracing every allocation slows allocation-heavy stages down, so
+        # memory is only measured when asked for
+        self.memory = enabled and memory
+        self.records = []
+        if self.memory:
+            tracemalloc.start()
+
+    def stage(self, name):
+        return self._measure(name) if self.enabled else _DISABLED
+
+    @contextlib.contextmanager
+    def _measure(self, name):
+        global _hidden_peak
+        if self.memory:
+            _hidden_peak = 0
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": name,
+                "wall": time.perf_counter() - wall,
+                "cpu": time.process_time() - cpu,
+            }
+            if self.memory:
+                # the most the stage held on top of what was already live
+                peak = max(tracemalloc.get_traced_memory()[1], _hidden_peak)
+                record["peakBytes"] = max(0, peak - baseline)
+            self.records.append(record)
+
+
+def profile_call(fn, *args, top_functions=15, top_lines=10, limit=6000):
+    # Calls fn and returns (result, a text report of at most limit chars)
+    # partials and callable instances have no __code__: sample the script
+    user_file = getattr(getattr(fn, "__code__", None), "co_filename", None) or getattr(
+        sys.modules.get("__main__"), "__file__", "script.py"
+    )
+    line_samples = collections.Counter()
+
+    def sample(signum, frame):
+        while frame is not None:
+            if frame.f_code.co_filename == user_file:
+                line_samples[frame.f_lineno] += 1
+                return
+            frame = frame.f_back
+
+    try:
+        previous_handler = signal.signal(signal.SIGPROF, sample)
+        signal.setitimer(signal.ITIMER_PROF, SAMPLE_INTERVAL, SAMPLE_INTERVAL)
+        sampling = True
+    except (AttributeError, OSError, ValueError):
+        sampling = False  # no itimers here: functions only
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        result = fn(*args)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        if sampling:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, previous_handler)
+
+    stats = pstats.Stats(profiler).stats
+    report = _report(fn, stats, line_samples, user_file, elapsed, top_functions, top_lines, sampling)
+    if len(report) > limit:
+        report = report[:report.rfind("\n", 0, limit)] + "\n..."
+    return result, report
+
+
+def _report(fn, stats, line_samples, user_file, elapsed, top_functions, top_lines, sampling):
+    lines = [
+        "════════════════ Profile ════════════════",
+        f"{getattr(fn, '__name__', type(fn).__name__)}() took {elapsed:.3f} s (profiling slows call-heavy code down)",
+        "",
+        f"{'calls':>9} {'own (s)':>9} {'total (s)':>10}  function",
+    ]
+    hottest = sorted(
+        (
+            (key, value)
+            for key, value in stats.items()
+            # the sampler and the profiler's own switch-off
+            if key[0] != __file__ and key[2] != "<method 'disable' of '_lsprof.Profiler' objects>"
+        ),
+        key=lambda item: item[1][3],
+        reverse=True,
+    )
+    for (filename, lineno, name), (_, calls, own, total, _) in hottest[:top_functions]:
+        lines.append(f"{calls:>9} {own:>9.3f} {total:>10.3f}  {_label(filename, lineno, name, user_file)}")
+
+    if sampling:
+        count = sum(line_samples.values())
+        lines += ["", f"Hot lines in your code ({count} samples, one per {SAMPLE_INTERVAL * 1000:g} ms of CPU):"]
+        for lineno, hits in line_samples.most_common(top_lines):
+            source = linecache.getline(user_file, lineno).strip()
+            lines.append(f"{100 * hits / count:>5.0f}%  line {lineno:<5} {source[:80]}")
+        if not count:
+            lines.append("  (too fast to sample)")
+
+    return "\n".join(lines)
+
+
+def _label(filename, lineno, name, user_file):
+    if filename == "~":  # builtins
+        return name
+    if filename == user_file:
+        return f"{name} (your code, line {lineno})"
+    parts = filename.replace(os.sep, "/").split("/site-packages/")
+    path = parts[-1] if len(parts) > 1 else "/".join(parts[0].split("/")[-2:])
+    return f"{name} ({path}:{lineno})"
+`;
@@ -0,0 +1,154 @@
+/*
+    ubacktest/progress.py: heartbeats while a submission runs, and a soft
+    deadline below the sandbox's hard limits.
+
+    Every HEARTBEAT_SECONDS a JSON line (elapsed wall and CPU seconds, plus
+    whatever the strategy last passed to report()) goes to the file
+    descriptor the local executors name in UBACKTEST_PROGRESS_FD, for the
+    server to relay. Where there is none (Judge0), nothing is sent.
+
+    Once the run has used the soft share of its CPU or wall limit,
+    stopping() turns true. Long loops that check it (walk_forward does) can
+    stop early, mark where their signals end with partial_from(), and return;
+    the harness sends the result back marked partial, flat from there on.
+    Sweeps and batches leave the rest of their rows unevaluated. A strategy
+    still running a grace period later is interrupted with SoftDeadline,
+    which ends the run with an error message instead of the sandbox killing
+    it without its output.
+*/
+
+export const progressModule = String.raw`
+import json
+import os
+import signal
+import threading
+import time
+
+HEARTBEAT_SECONDS = 1.0
+POLL_SECONDS = 0.1
+
+
+class SoftDeadline(BaseException):
+    # a BaseException, so strategies' "except Exception" does not swallow it
+    pass
+
+
+_state = {"done": None, "total": None, "message": None}
+_limits = None  # {"cpu": (soft, hard), "wall": (soft, hard)} seconds
+_stopping_since = None  # (resource, seconds used when stopping began)
+_partial_from = None  # {"label": ..., "position": ...}
+_in_strategy = False
+_started = time.monotonic()
+
+
+def start(cpu_limit, wall_limit, soft=0.8, grace=0.1):
+    # Called once by the harness: stopping() from soft * limit on, and
+    # SoftDeadline from (soft + grace) * limit. soft=None only sends
+    # heartbeats.
+    global _limits
+    if soft is not None:
+        _limits = {
+            "cpu": (soft * cpu_limit, (soft + grace) * cpu_limit),
+            "wall": (soft * wall_limit, (soft + grace) * wall_limit),
+        }
+        signal.signal(signal.SIGUSR1, _interrupt)
+    fd = os.environ.get("UBACKTEST_PROGRESS_FD")
+    stream = os.fdopen(int(fd), "w", buffering=1) if fd else None
+    if stream is not None or _limits is not None:
+        threading.Thread(target=_watch, args=(stream, threading.main_thread().ident), daemon=True).start()
+
+
+def report(done, total=None, message=None):
+    # what the strategy has got through, for the heartbeats
+    _state.update(done=done, total=total, message=message)
+
+
+def stopping():
+    return _stopping_since is not None
+
+
+def partial_from(label=None, position=None):
+    # the index label (or, without one, the position) of the first row whose
+    # signal was not computed
+    global _partial_from
+    _partial_from = {"label": label, "position": position}
+
+
+def call(fn, *args):
+    # fn(*args) as the strategy: the part SoftDeadline may interrupt
+    global _in_strategy
+    _in_strategy = True
+    try:
+        return fn(*args)
+    except SoftDeadline:
+        raise Exception(
+            f"Your strategy was stopped after {_wall():.0f}s ({time.process_time():.0f}s of CPU), close to the time "
+            "limit. To get the signals computed so far instead, check ubacktest.progress.stopping() in long "
+            "loops and return early (walk_forward does this by itself)."
+        ) from None
+    finally:
+        _in_strategy = False
+
+
+def apply_partial(df):
+    # After the strategy returned: None, or how the result is partial, with
+    # the signal set flat from the first row that was not computed
+    if _partial_from is None:
+        return None
+    info = {"reason": "stopped early", "after": None, "from": None}
+    if _stopping_since is not None:
+        resource, used = _stopping_since
+        info.update(reason=f"soft {resource} deadline", after=round(used, 1))
+    first = _partial_from["position"]
+    if _partial_from["label"] is not None and _partial_from["label"] in df.index:
+        first = df.index.get_loc(_partial_from["label"])  # check_result: the index is unique
+    if first is not None and 0 <= first < len(df):
+        df.iloc[first:, df.columns.get_loc("signal")] = 0
+        info["from"] = str(df["timestamp"].iloc[first])
+    return info
+
+
+def _wall():
+    # seconds since the process started, as the sandbox's wall limit counts
+    try:
+        with open("/proc/self/stat") as f:
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            return float(f.read().split()[0]) - started
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _started
+
+
+def _interrupt(signum, frame):
+    if _in_strategy:
+        raise SoftDeadline()
+
+
+def _watch(stream, main_thread):
+    global _stopping_since
+    last_heartbeat = 0.0
+    interrupted = False
+    while True:
+        time.sleep(POLL_SECONDS)
+        used = {"cpu": time.process_time(), "wall": _wall()}
+
+        if _limits is not None:
+            for resource, (soft, hard) in _limits.items():
+                if _stopping_since is None and used[resource] >= soft:
+                    _stopping_since = (resource, used[resource])
+                if used[resource] >= hard and _in_strategy and not interrupted:
+                    interrupted = True
+                    signal.pthread_kill(main_thread, signal.SIGUSR1)
+
+        if stream is not None and used["wall"] - last_heartbeat >= HEARTBEAT_SECONDS:
+            last_heartbeat = used["wall"]
+            try:
+                stream.write(json.dumps({
+                    "elapsed": round(used["wall"], 1),
+                    "cpu": round(used["cpu"], 1),
+                    **_state,
+                    "stopping": _stopping_since is not None,
+                }, default=str) + "\n")
+            except (OSError, ValueError):
+                stream = None  # the reader went away
+`;
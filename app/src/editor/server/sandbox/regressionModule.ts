@@ -0,0 +1,90 @@
+/*
+    ubacktest/regression.py: the regression examples' rolling fits, for all
+    bars at once:
+
+        from ubacktest.regression import rolling_regression
+
+        predictions, slopes = rolling_regression(data['close'], window=14)
+
+    For every bar i, a fit of the window closes before it against their bar
+    numbers (i - window .. i - 1), evaluated at bar i. That is what the
+    examples got from a new sklearn model per bar; tools/check_regression.py
+    checks the two agree.
+
+    Shifting the bar numbers does not change a least-squares fit (nor the
+    ridge or lasso fit of a line, since sklearn centers x), so the
+    prediction and slope are the same weighted sum of every window. The
+    weights are solved for once; applying them is one matrix-vector product
+    over a sliding-window view. Lasso on a single feature is the
+    soft-thresholded least-squares slope, which is where sklearn's
+    coordinate descent lands after its first update (unless it stops at a
+    zero slope already within its tolerance, just past alpha).
+*/
+
+export const regressionModule = String.raw`
+import numpy as np
+
+METHODS = ("ols", "ridge", "lasso")
+
+
+def rolling_regression(values, window=14, degree=1, method="ols", alpha=1.0, log=False):
+    # (predictions, slopes), both NaN for the first window bars:
+    # - ols: least squares polynomial of the given degree
+    # - ridge / lasso: sklearn's Ridge(alpha) / Lasso(alpha) line (degree 1)
+    # - log: fitted to log(values), predictions exp()'d back; slopes stay in
+    #   log space (growth per bar)
+    # Slopes are the fitted curve's derivative at the predicted bar.
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if method != "ols" and degree != 1:
+        raise ValueError(f"{method} is only available for degree=1")
+    if window <= degree:
+        raise ValueError("window must be larger than degree")
+
+    y = np.asarray(values, dtype=np.float64)
+    if log:
+        y = np.log(y)
+    predictions = np.full(len(y), np.nan)
+    slopes = np.full(len(y), np.nan)
+    if len(y) <= window:
+        return predictions, slopes
+
+    # windows[k] is bars k .. k + window - 1, the window for bar k + window
+    windows = np.lib.stride_tricks.sliding_window_view(y, window)[:-1]
+    x = np.arange(window) - (window - 1) / 2  # centered bar numbers
+    ahead = (window + 1) / 2  # the predicted bar, on the same scale
+
+    if method == "ols":
+        prediction_weights, slope_weights = _polynomial_weights(window, degree)
+        predictions[window:] = windows @ prediction_weights
+        slopes[window:] = windows @ slope_weights
+    else:
+        mean = windows.mean(axis=1)
+        covariance = windows @ x  # sum of x * (y - mean), as x sums to 0
+        if method == "ridge":
+            slope = covariance / (x @ x + alpha)
+        else:
+            # sklearn's lasso objective is RSS / (2 * window) + alpha * |slope|
+            rho = covariance / window
+            slope = np.sign(rho) * np.maximum(np.abs(rho) - alpha, 0) / (x @ x / window)
+        predictions[window:] = mean + slope * ahead
+        slopes[window:] = slope
+
+    if log:
+        predictions = np.exp(predictions)
+    return predictions, slopes
+
+
+def _polynomial_weights(window, degree):
+    # Weights giving a window's least-squares polynomial at the bar after it,
+    # and its derivative there. Bars are rescaled to [-1/2, 1/2] so the
+    # powers stay well conditioned.
+    scale = window
+    x = (np.arange(window) - (window - 1) / 2) / scale
+    ahead = (window + 1) / 2 / scale
+    powers = np.arange(degree + 1)
+    solve = np.linalg.pinv(x[:, None] ** powers)  # coefficients = solve @ y
+    value = ahead ** powers
+    derivative = np.concatenate(([0.0], powers[1:] * ahead ** (powers[1:] - 1))) / scale
+    return value @ solve, derivative @ solve
+`;
@@ -0,0 +1,136 @@
+/*
+    ubacktest/robustness.py: how much the headline statistics of a backtest
+    can be trusted, computed in the harness right after the portfolio.
+
+    - bootstrap: the strategy's bar returns resampled in circular blocks
+      (keeping short-range autocorrelation), giving an interval for each
+      statistic
+    - null: the same signal circularly shifted against the prices, so entry
+      timing is random but the number of trades, holding periods and time in
+      the market are the strategy's own; the p-value is the share of these
+      that did at least as well
+
+    Paths are processed in chunks of (paths x bars) matrices, so memory stays
+    bounded and each chunk is a handful of numpy calls.
+*/
+
+export const robustnessModule = String.raw`
+import math
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (5, 50, 95)
+CHUNK_CELLS = 2_000_000  # matrix elements per chunk
+MIN_BARS = 30
+METRICS = ("sharpeRatio", "sortinoRatio", "maxDrawdown", "cagr")
+
+
+def analyze(series, signal, pricing, statistics, paths=10000, max_cells=15_000_000, seed=0):
+    # Intervals and null-strategy p-values for sharpeRatio, sortinoRatio,
+    # maxDrawdown and cagr, in the units of portfolio.statistics(); None
+    # when the backtest is too short or never trades. Seeded, so the same
+    # backtest always gets the same answer.
+    returns = np.asarray(series["returns"], dtype=np.float64)[1:]
+    signal = np.asarray(signal, dtype=np.float64)
+    close = np.asarray(pricing["close"], dtype=np.float64)
+    count = len(returns)
+    if count < MIN_BARS or not statistics["numTrades"] or not np.isfinite(returns).all():
+        return None
+
+    paths = int(min(paths, max(100, max_cells // count)))
+    if paths <= 0:
+        return None
+    timestamp = pricing["timestamp"]
+    days = (pd.Timestamp(str(timestamp[-1])) - pd.Timestamp(str(timestamp[0]))) / pd.Timedelta(days=1)
+    block = max(1, round(count ** (1 / 3)))
+    rng = np.random.default_rng(seed)
+
+    with np.errstate(all="ignore"):
+        wrapped = np.concatenate((returns, returns[: block - 1]))
+        blocks = np.lib.stride_tricks.sliding_window_view(wrapped, block)
+        bootstrap = _run_chunks(paths, count, lambda rows: _bootstrap(rng, blocks, count, rows), days)
+
+        # per-bar rebalanced approximation of the portfolio, for the strategy
+        # itself and for every shifted copy, so the comparison is like for like
+        stock_ret = np.diff(close) / close[:-1]
+        held = signal[:-1]
+        observed = _metrics((held * stock_ret)[None, :], days)
+        rotations = np.lib.stride_tricks.sliding_window_view(np.concatenate((held, held)), count)
+        shifted = _run_chunks(paths, count, lambda rows: _shifted(rng, rotations, stock_ret, rows), days)
+
+    result = {"paths": paths, "blockLength": block, "percentiles": list(PERCENTILES)}
+    result["bootstrap"] = {name: _percentiles(bootstrap[name]) for name in METRICS}
+    result["null"] = {name: _percentiles(shifted[name]) for name in METRICS}
+    result["pValue"] = {}
+    for name in METRICS:
+        values = shifted[name]
+        values = values[np.isfinite(values)]
+        if not values.size or not np.isfinite(observed[name][0]):
+            result["pValue"][name] = None
+            continue
+        # a lower drawdown is the better one
+        better = values <= observed[name][0] if name == "maxDrawdown" else values >= observed[name][0]
+        result["pValue"][name] = float((better.sum() + 1) / (values.size + 1))
+    return result
+
+
+def _run_chunks(paths, count, make_returns, days):
+    rows = max(1, CHUNK_CELLS // count)
+    chunks = [_metrics(make_returns(min(rows, paths - done)), days) for done in range(0, paths, rows)]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in METRICS}
+
+
+def _bootstrap(rng, blocks, count, rows):
+    # circular block bootstrap: whole blocks gathered from a sliding-window
+    # view over the wrapped returns, so no per-bar index is ever built
+    per_path = -(-count // blocks.shape[1])
+    starts = rng.integers(0, count, (rows, per_path))
+    return blocks[starts].reshape(rows, -1)[:, :count]
+
+
+def _shifted(rng, rotations, stock_ret, rows):
+    # rotations[k] is the held signal shifted k bars later, wrapping around
+    count = len(stock_ret)
+    shifts = rng.integers(1, count, rows)
+    return rotations[count - shifts] * stock_ret
+
+
+def _metrics(returns, days):
+    # portfolio.statistics() for each row of returns (paths x bars); works
+    # in place on returns
+    count = returns.shape[1]
+    mean = returns.mean(axis=1)
+    variance = np.einsum("ij,ij->i", returns, returns) / count - mean * mean
+    sharpe = mean / np.sqrt(np.maximum(variance, 0))
+
+    buffer = np.minimum(returns, 0)
+    negatives = np.count_nonzero(buffer, axis=1)
+    downside = np.sqrt(np.einsum("ij,ij->i", buffer, buffer) / np.maximum(1, negatives))
+
+    wealth = np.add(returns, 1, out=returns)
+    np.cumprod(wealth, axis=1, out=wealth)
+    peak = np.maximum.accumulate(wealth, axis=1, out=buffer)
+    np.maximum(peak, 1, out=peak)
+    drawdown = 1 - np.divide(wealth, peak, out=peak).min(axis=1)
+    cagr = (wealth[:, -1] ** (np.float64(365) / days) - 1) * 100
+
+    return {
+        "sharpeRatio": sharpe,
+        "sortinoRatio": mean / downside,
+        "maxDrawdown": 100 * np.maximum(drawdown, 0),
+        "cagr": cagr,
+    }
+
+
+def _percentiles(values):
+    values = values[np.isfinite(values)]
+    if not values.size:
+        return None
+    return [_finite(value) for value in np.percentile(values, PERCENTILES)]
+
+
+def _finite(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+`;
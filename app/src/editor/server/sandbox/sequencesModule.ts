@@ -0,0 +1,95 @@
+/*
+    ubacktest/sequences.py: fixed-length input sequences for the deep learning
+    examples, without a copy per window, and batched inference over them:
+
+        from ubacktest.sequences import configure_threads, predict, windows
+
+        configure_threads()
+        x = windows(scaled, 60)  # x[k] is rows k .. k + 59, shape (60, features)
+        ...train on torch.from_numpy(x) or x directly (Keras)...
+        predicted = predict(model, x)
+
+    windows() is a strided view of one float32 copy of the rows, so N windows
+    of length L cost N rows of memory rather than N * L, and
+    torch.from_numpy() turns it into a tensor without copying. predict() runs
+    the model over batch_size windows at a time instead of once per bar.
+
+    configure_threads() sizes PyTorch's and TensorFlow's CPU thread pools to
+    the CPUs, within what is left of the submission's thread limit; their
+    defaults can start more threads than the sandbox allows.
+*/
+
+export const sequencesModule = String.raw`
+import sys
+
+import numpy as np
+
+from . import pool
+
+BATCH_SIZE = 1024  # windows per forward pass in predict()
+
+
+def windows(values, length, dtype=np.float32):
+    # (len(values) - length + 1, length, features) view of values' rows. It
+    # is marked writeable so torch.from_numpy() accepts it without a
+    # warning, but the windows overlap: never write to it.
+    values = np.ascontiguousarray(values, dtype=dtype)
+    if values.ndim == 1:
+        values = values[:, None]
+    count = max(0, len(values) - length + 1)
+    rows, features = values.strides
+    return np.lib.stride_tricks.as_strided(
+        values, shape=(count, length, values.shape[1]), strides=(rows, rows, features)
+    )
+
+
+def configure_threads():
+    # Threads per op (intra-op) for whichever of torch / tensorflow is
+    # imported: one per CPU, but at most half of the threads the submission
+    # may still start, since both frameworks run helper threads too. Ops run
+    # one after another (one inter-op thread): these models are a single
+    # chain of layers. Returns the thread count.
+    threads = pool.cpu_count()
+    if pool.limits["threads"]:
+        threads = min(threads, (pool.limits["threads"] - pool.running_threads()) // 2)
+    threads = max(1, threads)
+
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # only possible before torch's first parallel work
+    if "tensorflow" in sys.modules:
+        threading = sys.modules["tensorflow"].config.threading
+        try:
+            threading.set_intra_op_parallelism_threads(threads)
+            threading.set_inter_op_parallelism_threads(1)
+        except RuntimeError:
+            pass  # only possible before tensorflow's runtime has started
+    return threads
+
+
+def predict(model, inputs, batch_size=BATCH_SIZE):
+    # The outputs of a torch.nn.Module (put it in eval mode first) or Keras
+    # model for every window in inputs, batch_size windows per forward pass.
+    # A model with one output gives a 1-d array.
+    torch = sys.modules.get("torch")
+    is_torch = torch is not None and isinstance(model, torch.nn.Module)
+    if is_torch:
+        inputs = torch.from_numpy(inputs) if isinstance(inputs, np.ndarray) else inputs
+
+    outputs = []
+    for start in range(0, len(inputs), batch_size):
+        batch = inputs[start:start + batch_size]
+        if is_torch:
+            with torch.no_grad():
+                outputs.append(model(batch).numpy())
+        else:
+            outputs.append(np.asarray(model(batch, training=False)))
+    if not outputs:
+        return np.empty(0, dtype=np.float32)
+    outputs = np.concatenate(outputs)
+    return outputs[:, 0] if outputs.ndim == 2 and outputs.shape[1] == 1 else outputs
+`;
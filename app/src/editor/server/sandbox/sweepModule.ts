@@ -0,0 +1,111 @@
+/*
+    ubacktest/sweep.py: evaluates strategy(df, **params) over a parameter
+    grid inside one submission.
+
+    The first combination runs in-process, with tracemalloc measuring what it
+    allocates; that sizes the ubacktest.pool workers. Workers inherit the
+    loaded quote copy-on-write and stream (statistics, signal) back; only the
+    signals of the best N combinations are kept and priced in full.
+*/
+
+export const sweepModule = String.raw`
+import heapq
+import inspect
+import itertools
+
+from . import checks, pool, portfolio, profiling, progress
+
+# statistics where a smaller value ranks higher
+LOWER_IS_BETTER = {"maxDrawdown", "stddevReturn"}
+
+_job = None  # set before forking, so workers inherit it
+
+
+def combinations(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _evaluate(index):
+    job = _job
+    params = job["combinations"][index]
+    try:
+        df = job["strategy"](job["df_init"].copy(), **params)
+        df = checks.check_result(df, job["df_init"].shape[0])
+        df = df[df['timestamp'] >= job["start_date"]]
+        signal = df['signal'].round(3).to_numpy()
+        _, stats = portfolio.evaluate(signal, job["pricing"], job["cost_per_trade"])
+        return index, stats, signal, None
+    except Exception as e:
+        return index, None, None, f"{type(e).__name__}: {e}"
+
+
+def run(strategy, df_init, grid, start_date, pricing, cost_per_trade, top_n, rank_by, memory_limit_kb):
+    global _job
+    combos = combinations(grid)
+
+    try:
+        inspect.signature(strategy).bind(df_init, **combos[0])
+    except TypeError:
+        raise Exception(
+            "To sweep parameters, strategy must accept them as keyword arguments, "
+            "e.g. def strategy(data, window=20)."
+        )
+
+    _job = {
+        "strategy": strategy,
+        "df_init": df_init,
+        "combinations": combos,
+        "start_date": start_date,
+        "pricing": pricing,
+        "cost_per_trade": cost_per_trade,
+    }
+
+    rows = [{"params": params, "statistics": None, "error": None} for params in combos]
+    best = []  # heap of (score, -index, signal), worst first
+    direction = -1 if rank_by in LOWER_IS_BETTER else 1
+
+    evaluated = 0
+
+    def on_result(result):
+        nonlocal evaluated
+        index, stats, signal, error = result
+        rows[index]["statistics"] = stats
+        rows[index]["error"] = error
+        evaluated += 1
+        progress.report(evaluated, len(rows), "sweep")
+        if stats is None or stats.get(rank_by) is None:
+            return
+        entry = (direction * stats[rank_by], -index, signal)
+        if len(best) < top_n:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+
+    first, peak = profiling.traced_peak(_evaluate, 0)
+    on_result(first)
+
+    remaining = list(range(1, len(combos)))
+    workers = pool.worker_count(peak, len(remaining), memory_limit_kb)
+    pool.run(_evaluate, remaining, workers, on_result, should_stop=progress.stopping)
+
+    for row in rows:
+        if row["statistics"] is None and row["error"] is None:
+            row["error"] = pool.STOPPED if progress.stopping() else pool.WORKER_DIED
+
+    if all(row["statistics"] is None for row in rows):
+        raise Exception(f"Every parameter combination failed. The first failed with {rows[0]['error']}")
+
+    top = []
+    for _, negative_index, signal in sorted(best, key=lambda entry: entry[:2], reverse=True):
+        index = -negative_index
+        series, _ = portfolio.evaluate(signal, pricing, cost_per_trade)
+        top.append({
+            "params": combos[index],
+            "signal": signal.tolist(),
+            "portfolio": portfolio.encode(series),
+            "statistics": rows[index]["statistics"],
+        })
+
+    return {"rows": rows, "best": top, "workers": workers}
+`;
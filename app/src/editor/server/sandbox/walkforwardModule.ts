@@ -0,0 +1,131 @@
+/*
+    ubacktest/walkforward.py: rolling-retrain ("walk-forward") predictions for
+    strategies that refit a model on the last N bars before every bar:
+
+        from ubacktest.walkforward import walk_forward
+
+        data.loc[data.index[44:], 'signal'] = walk_forward(
+            lambda: KNeighborsClassifier(n_neighbors=5),
+            data[features], data['target'], training_window=30, start=44,
+        )
+
+    gives the same predictions as refitting a StandardScaler and a new model
+    on data.iloc[i-30:i] and predicting row i, for every i from 44 on. The
+    features become one contiguous float array, each training window is a
+    view of it, and the fits run in chunks on ubacktest.pool workers.
+
+    With warm_start=True, estimators that have partial_fit are fitted once
+    per refit_every bars and updated with partial_fit in between. That is
+    faster but no longer the same model as a fresh fit, so signals change.
+
+    Past the soft deadline (see ubacktest/progress.py) no more chunks are
+    fitted: predictions from the first missing chunk on are NaN, and the
+    harness returns the result as partial, flat from that row.
+*/
+
+export const walkforwardModule = String.raw`
+import numpy as np
+
+from . import pool, profiling, progress
+
+CHUNK_WINDOWS = 32  # windows per pool task when every window is a fresh fit
+
+_job = None  # set before forking, so workers inherit it
+
+
+def walk_forward(make_model, X, y, training_window, start=None, scale=True, warm_start=False, refit_every=50, workers=None):
+    # model.predict for rows start .. len(X)-1, each from make_model() fitted
+    # on the training_window rows before it (standardized first if scale)
+    global _job
+    labels = getattr(X, "index", None)
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+    y = np.asarray(y)
+    start = training_window if start is None else start
+    if training_window < 1 or start < training_window:
+        raise ValueError("walk_forward needs 1 <= training_window <= start")
+    rows = np.arange(start, len(X))
+    if not len(rows):
+        return np.empty(0, dtype=y.dtype)
+    if warm_start and not hasattr(make_model(), "partial_fit"):
+        raise ValueError("warm_start needs an estimator with partial_fit")
+
+    # windows[k] is rows k .. k + training_window - 1 (features x rows)
+    size = refit_every if warm_start else CHUNK_WINDOWS
+    _job = {
+        "make_model": make_model,
+        "X": X,
+        "windows": np.lib.stride_tricks.sliding_window_view(X, training_window, axis=0),
+        "targets": np.lib.stride_tricks.sliding_window_view(y, training_window),
+        "training_window": training_window,
+        "chunks": [rows[i:i + size] for i in range(0, len(rows), size)],
+        "scale": scale,
+        "warm_start": warm_start,
+    }
+    predictions = [None] * len(_job["chunks"])
+    done = 0
+
+    def on_result(result):
+        nonlocal done
+        index, chunk_predictions = result
+        predictions[index] = chunk_predictions
+        done += len(chunk_predictions)
+        progress.report(done, len(rows), "walk_forward")
+
+    if workers is None:
+        # one window is fitted (and thrown away) to measure what a fit holds;
+        # tracing a whole chunk would slow allocation-heavy models right down
+        _, peak = profiling.traced_peak(_fit_rows, rows[:1])
+        workers = pool.strategy_worker_count(peak, len(predictions))
+    pool.run(
+        _fit_chunk, list(range(len(predictions))), min(workers, len(predictions)), on_result,
+        should_stop=progress.stopping,
+    )
+
+    missing = [index for index, chunk in enumerate(predictions) if chunk is None]
+    if missing and progress.stopping():
+        return _partial(predictions[:missing[0]], rows, labels)
+    # chunks a dead worker never reported are fitted here instead
+    for index in missing:
+        on_result(_fit_chunk(index))
+    return np.concatenate(predictions)
+
+
+def _partial(finished, rows, labels):
+    # the predictions up to the first chunk that was not fitted, then NaN
+    kept = np.concatenate(finished) if finished else np.empty(0)
+    predictions = np.full(len(rows), np.nan, dtype=np.float64 if kept.dtype.kind in "biuf" else object)
+    predictions[:len(kept)] = kept
+    first = rows[len(kept)]
+    if labels is not None:
+        progress.partial_from(label=labels[first])
+    else:
+        progress.partial_from(position=first)
+    return predictions
+
+
+def _fit_chunk(index):
+    return index, _fit_rows(_job["chunks"][index])
+
+
+def _fit_rows(rows):
+    job = _job
+    if job["scale"]:
+        from sklearn.preprocessing import StandardScaler
+    model = None
+    predictions = []
+    for i in rows:
+        X_train = job["windows"][i - job["training_window"]].T
+        y_train = job["targets"][i - job["training_window"]]
+        X_test = job["X"][i:i + 1]
+        if job["scale"]:
+            scaler = StandardScaler()
+            X_train = scaler.fit_transform(X_train)
+            X_test = scaler.transform(X_test)
+        if model is None or not job["warm_start"]:
+            model = job["make_model"]()
+            model.fit(X_train, y_train)
+        else:
+            model.partial_fit(X_train, y_train)
+        predictions.append(model.predict(X_test)[0])
+    return np.asarray(predictions)
+`;
@@ -1,5 +1,5 @@
 import { HttpError } from "wasp/server";
-import { type Strategy } from "wasp/entities";
+import { type Strategy, type User } from "wasp/entities";
 import {
   type CreateStrategy,
   type UpdateStrategy,
@@ -9,9 +9,31 @@ import {
   type GetSpecificStrategy,
   type Charge,
   type RunStrategy,
+  type RunSweep,
+  type RunBatch,
+  type GetResultCacheStats,
+  type GetRunProgress,
+  type RepriceSignals,
 } from "wasp/server/operations";
 import StrategyPipeline from "./StrategyPipeline";
-import { BacktestResult, eodFreqs, FormInput } from "../../shared/sharedTypes";
+import SweepPipeline from "./SweepPipeline";
+import BatchPipeline from "./BatchPipeline";
+import ResultCache, { ResultCacheStats } from "./ResultCache";
+import RunProgressRegistry from "./RunProgressRegistry";
+import SignalRepricer from "./SignalRepricer";
+import SignalRegistry, { PricedSeries } from "./SignalRegistry";
+import {
+  BacktestResult,
+  BatchResult,
+  BatchWindow,
+  eodFreqs,
+  FormInput,
+  RepricingResult,
+  RunProgress,
+  Stat,
+  SweepGrid,
+  SweepResult,
+} from "../../shared/sharedTypes";
 
 export const createStrategy: CreateStrategy<
   { name: string; code: string },
@@ -133,13 +155,191 @@ export const updateStrategy: UpdateStrategy<
   });
 };
 
+// runId (picked by the client) lets getRunProgress report on the run while
+// it executes, and repriceSignals price its signal afterwards.
 export const runStrategy: RunStrategy<
-  { formInputs: FormInput; code: string },
+  { formInputs: FormInput; code: string; profile?: boolean; runId?: string },
   BacktestResult
-> = async ({ formInputs, code }, context) => {
+> = async ({ formInputs, code, profile, runId }, context) => {
+  if (!context.user) throw new HttpError(401);
+  assertCanBacktest(context.user, formInputs);
+
+  const userId = context.user.id;
+  const result = await RunProgressRegistry.shared.track(
+    userId,
+    runId,
+    (onProgress) =>
+      new StrategyPipeline(
+        formInputs,
+        code,
+        profile === true,
+        onProgress,
+        userId,
+      ).run(),
+  );
+
+  // kept for repriceSignals, which only takes the signal back from here
+  const { timestamp, close, signal } = result.strategyResult;
+  if (runId && signal.length > 0) {
+    SignalRegistry.shared.remember(userId, runId, {
+      formInputs,
+      timestamp,
+      close,
+      signal,
+    });
+  }
+  return result;
+};
+
+export const runSweep: RunSweep<
+  {
+    formInputs: FormInput;
+    code: string;
+    grid: SweepGrid;
+    topN?: number;
+    rankBy?: keyof Stat;
+    runId?: string;
+  },
+  SweepResult
+> = async ({ formInputs, code, grid, topN, rankBy, runId }, context) => {
+  if (!context.user) throw new HttpError(401);
+  assertCanBacktest(context.user, formInputs);
+
+  const userId = context.user.id;
+  const pipeline = (onProgress?: (progress: RunProgress) => void) =>
+    new SweepPipeline(
+      formInputs,
+      code,
+      grid,
+      topN,
+      rankBy,
+      onProgress,
+      userId,
+    );
+  const combinations = pipeline().validate();
+
+  return await chargePerBacktest(
+    context,
+    combinations,
+    "sweep",
+    () =>
+      RunProgressRegistry.shared.track(userId, runId, (onProgress) =>
+        pipeline(onProgress).run(),
+      ),
+    // combinations that failed, or never ran (soft deadline, lost worker)
+    (result) =>
+      result.rows.length === 0
+        ? combinations
+        : result.rows.filter((row) => row.statistics === null).length,
+  );
+};
+
+export const runBatch: RunBatch<
+  {
+    formInputs: FormInput;
+    code: string;
+    symbols?: string[];
+    windows?: BatchWindow[];
+    runId?: string;
+  },
+  BatchResult
+> = async ({ formInputs, code, symbols, windows, runId }, context) => {
   if (!context.user) throw new HttpError(401);
   const user = context.user;
 
+  const userId = user.id;
+  const pipeline = (onProgress?: (progress: RunProgress) => void) =>
+    new BatchPipeline(formInputs, code, symbols, windows, onProgress, userId);
+  // every slice is its own backtest, held to the same plan checks
+  const slices = pipeline().sliceInputs();
+  for (const sliceInputs of slices) assertCanBacktest(user, sliceInputs);
+
+  return await chargePerBacktest(
+    context,
+    slices.length,
+    "batch",
+    () =>
+      RunProgressRegistry.shared.track(userId, runId, (onProgress) =>
+        pipeline(onProgress).run(),
+      ),
+    (result) => result.rows.filter((row) => row.statistics === null).length,
+  );
+};
+
+// The latest heartbeat of one of the user's runs; null before the first one
+// and after the run finished.
+export const getRunProgress: GetRunProgress<
+  { runId: string },
+  RunProgress | null
+> = async ({ runId }, context) => {
+  if (!context.user) throw new HttpError(401);
+
+  return RunProgressRegistry.shared.get(context.user.id, runId);
+};
+
+// Prices the signal of a saved result (own or public) or of one of the
+// user's recent runs (the runId it ran under) again; the signal itself never
+// comes from the client.
+export const repriceSignals: RepriceSignals<
+  {
+    resultId?: string;
+    runId?: string;
+    costs: number[];
+    leverages?: number[];
+  },
+  RepricingResult
+> = async ({ resultId, runId, costs, leverages }, context) => {
+  if (!context.user) throw new HttpError(401);
+
+  let series: PricedSeries | null = null;
+  if (resultId) {
+    const result = await context.entities.Result.findFirst({
+      where: {
+        id: resultId,
+        OR: [{ userId: context.user.id }, { public: true }],
+      },
+      select: { formInputs: true, timestamp: true, close: true, signal: true },
+    });
+    if (!result) throw new HttpError(404, "Result not found.");
+    series = {
+      ...result,
+      formInputs: result.formInputs as unknown as FormInput,
+    };
+  } else if (runId) {
+    series = SignalRegistry.shared.get(context.user.id, runId);
+    if (!series) {
+      throw new HttpError(
+        404,
+        "This run is no longer available for repricing. Run the strategy again.",
+      );
+    }
+  } else {
+    throw new HttpError(400, "Provide a resultId or a runId to reprice.");
+  }
+  assertCanBacktest(context.user, series.formInputs);
+
+  const started = performance.now();
+  const repricer = new SignalRepricer(
+    series.timestamp,
+    series.close,
+    series.signal,
+  );
+  const rows = repricer.reprice(costs, leverages);
+
+  return { rows, elapsedMs: performance.now() - started };
+};
+
+export const getResultCacheStats: GetResultCacheStats<
+  void,
+  ResultCacheStats
+> = async (_args, context) => {
+  if (!context.user?.isAdmin) throw new HttpError(403);
+
+  return ResultCache.shared.stats();
+};
+
+// Plan, credit and subscription checks shared by every backtest operation.
+function assertCanBacktest(user: User, formInputs: FormInput): void {
   if (!user.isAdmin) {
     const isProUser = user.subscriptionPlan === "pro";
 
@@ -178,10 +378,51 @@ export const runStrategy: RunStrategy<
       }
     }
   }
+}
 
-  const strategyInstance = new StrategyPipeline(formInputs, code);
-  return await strategyInstance.run();
-};
+// Sweeps and batches are charged on the server, one credit for every
+// backtest they evaluate (combination or symbol/window slice), before they
+// run; credits come back for a run that fails, and for what unevaluated()
+// counts as never evaluated. Subscribers and admins are not charged;
+// SWEEP_MAX_COMBINATIONS and BATCH_MAX_SLICES bound their runs instead.
+async function chargePerBacktest<T>(
+  context: Parameters<RunSweep>[1],
+  backtests: number,
+  kind: string,
+  run: () => Promise<T>,
+  unevaluated: (result: T) => number,
+): Promise<T> {
+  const user = context.user as User;
+  if (user.isAdmin || user.subscriptionPlan) return await run();
+
+  // conditional, so concurrent runs cannot spend the same credits twice
+  const { count } = await context.entities.User.updateMany({
+    where: { id: user.id, credits: { gte: backtests } },
+    data: { credits: { decrement: backtests } },
+  });
+  if (count === 0) {
+    throw new HttpError(
+      402,
+      `This ${kind} runs ${backtests} backtests at one credit each, and you have ${user.credits} credits left. Consider purchasing a subscription.`,
+    );
+  }
+
+  const refund = (credits: number) =>
+    context.entities.User.update({
+      where: { id: user.id },
+      data: { credits: { increment: credits } },
+    });
+  let result: T;
+  try {
+    result = await run();
+  } catch (error) {
+    await refund(backtests);
+    throw error;
+  }
+  const unused = Math.min(unevaluated(result), backtests);
+  if (unused > 0) await refund(unused);
+  return result;
+}
 
 export const charge: Charge<void, void> = async (_args, context) => {
   if (!context.user) throw new HttpError(401);
@@ -0,0 +1,71 @@
+import { type NightlyQuotePrefetch } from "wasp/server/jobs";
+import { FormInput } from "../../../shared/sharedTypes";
+import OhlcvStore from "../OhlcvStore";
+import StockDataConnection from "../StockDataConnection";
+
+// Brings SPY and the most backtested symbols of the last month up to date in
+// the local quote store, so daytime backtests rarely need to call Tiingo.
+export const nightlyQuotePrefetch: NightlyQuotePrefetch<{}, string[]> = async (
+  _args,
+  context
+) => {
+  if (!OhlcvStore.enabled()) return [];
+
+  const topN = parseInt(process.env.OHLCV_PREFETCH_TOP || "25");
+  const years = parseInt(process.env.OHLCV_PREFETCH_YEARS || "10");
+
+  const since = new Date();
+  since.setUTCDate(since.getUTCDate() - 30);
+  const recentResults = await context.entities.Result.findMany({
+    where: { createdAt: { gte: since } },
+    select: { formInputs: true },
+  });
+
+  const counts = new Map<string, number>();
+  for (const { formInputs } of recentResults) {
+    const symbol = (formInputs as FormInput | null)?.symbol?.toUpperCase();
+    if (symbol) counts.set(symbol, (counts.get(symbol) ?? 0) + 1);
+  }
+  const popular = [...counts.entries()]
+    .sort((a, b) => b[1] - a[1])
+    .slice(0, topN)
+    .map(([symbol]) => symbol);
+  const extra = (process.env.OHLCV_PREFETCH_SYMBOLS || "")
+    .split(",")
+    .map((symbol) => symbol.trim().toUpperCase())
+    .filter(Boolean);
+  const symbols = [...new Set(["SPY", ...extra, ...popular])].filter(
+    OhlcvStore.storable
+  );
+
+  const endDate = new Date().toISOString().slice(0, 10);
+  const startDate = new Date(
+    Date.UTC(new Date().getUTCFullYear() - years, 0, 1)
+  )
+    .toISOString()
+    .slice(0, 10);
+
+  const prefetched: string[] = [];
+  for (const symbol of symbols) {
+    const connection = new StockDataConnection({
+      symbol,
+      startDate,
+      endDate,
+      intval: "daily",
+      timeout: 0,
+      costPerTrade: 0,
+      useWarmupDate: false,
+      warmupDate: "",
+      useAdjClose: true,
+    });
+    try {
+      await connection.prefetch(symbol);
+      prefetched.push(symbol);
+    } catch (error: any) {
+      console.warn(`Could not prefetch ${symbol}: ${error?.message}`);
+    }
+  }
+
+  console.log(`Prefetched daily quotes for ${prefetched.join(", ")}`);
+  return prefetched;
+};
@@ -9,23 +9,10 @@ Learn more @ docs.ubacktest.com/examples/rsi/adaptiversi
 
 import pandas as pd
 import numpy as np
-
-def calculate_rsi(series, window):
-    delta = series.diff()
-
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=window).mean()
-    avg_loss = loss.rolling(window=window).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi
+from ubacktest.indicators import rsi
 
 def strategy(data):
-    data['RSI'] = calculate_rsi(data['close'], window=14)
+    data['RSI'] = rsi(data['close'], window=14)
     
     # Compute adaptive thresholds
     rsi_mean = data['RSI'].rolling(window=50).mean()
@@ -8,14 +8,12 @@ Learn more @ docs.ubacktest.com/examples/moving-averages/emacrossover
 '''
 
 import pandas as pd
-
-def calculate_ema(series, window):
-    return series.ewm(span=window, adjust=False).mean()
+from ubacktest.indicators import ema
 
 def strategy(data):
     # generate two distinct exponential MAs
-    data['EMA_12'] = calculate_ema(data['close'], window=12)
-    data['EMA_26'] = calculate_ema(data['close'], window=26)
+    data['EMA_12'] = ema(data['close'], span=12)
+    data['EMA_26'] = ema(data['close'], span=26)
 
     # Generate crossover signals
     data['signal'] = 0
@@ -6,33 +6,19 @@ Learn more @ docs.ubacktest.com/examples/regression/lassoreg
 '''
 
 import pandas as pd
-from sklearn.linear_model import Lasso
+from ubacktest.regression import rolling_regression
 import numpy as np
 
 def lasso_regression(data, window=14, alpha=1.0):
 
-    signals = np.zeros(len(data))  # Initialize signals array
-    predictions = np.zeros(len(data)) # Initialize predictions array
-    
-    # Iterate over the data starting from the window index
-    for i in range(window, len(data)):
-        # Prepare the features (X) and target (y) for the regression model
-        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
-        y = data['close'][i-window:i].values  # Last window closing prices
-        
-        # Fit the Lasso regression model (using L1 regularization)
-        model = Lasso(alpha=alpha)  # 'alpha' is the regularization strength
-        model.fit(X, y)
-        
-        # Predict the next value (for the current time period)
-        prediction = model.predict(np.array([[i]]))  # Predict the next point (i.e., the 6th day)
-        predictions[i] = prediction[0]
-
-        # Signal generation based on prediction (uptrend or downtrend)
-        if prediction > data['close'][i-1]:
-            signals[i] = 1  # Buy signal
-        else:
-            signals[i] = -1  # Sell signal
+    # Fit a Lasso line (L1 regularization, strength 'alpha') to the window
+    # closes before every bar and extend it to that bar (every bar at once;
+    # see ubacktest.regression)
+    predictions, _ = rolling_regression(data['close'], window, method='lasso', alpha=alpha)
+
+    # Signal generation based on prediction (uptrend or downtrend)
+    signals = np.where(predictions > data['close'].shift(1).to_numpy(), 1, -1)  # Buy / Sell signal
+    signals[:window] = 0  # No prediction for the first window bars
     
     return signals, predictions
 
@@ -14,6 +14,8 @@ import torch
 from torch import nn
 from sklearn.preprocessing import MinMaxScaler
 from torch.utils.data import Dataset, DataLoader
+from ubacktest.modelcache import cached_fit
+from ubacktest.sequences import configure_threads, predict, windows
 
 # ---- LSTM Model ----
 class LSTMModel(nn.Module):
@@ -31,69 +33,63 @@ class LSTMModel(nn.Module):
 # ---- Dataset Loader ----
 class StockDataset(Dataset):
     def __init__(self, data, seq_length=60):
-        self.seq_length = seq_length
-        self.x = []
-        self.y = []
-
-        for i in range(len(data) - seq_length - 1):
-            seq_x = data[i:i+seq_length]
-            seq_y = data[i+seq_length][3]  # 3 = index of 'close'
-            self.x.append(seq_x)
-            self.y.append(seq_y)
+        self.y = torch.tensor(data[seq_length:-1, 3], dtype=torch.float32)  # 3 = index of 'close'
+        self.x = torch.from_numpy(windows(data, seq_length)[:len(self.y)])  # Views of data, no copies
 
     def __len__(self):
         return len(self.x)
 
     def __getitem__(self, idx):
-        return (
-            torch.tensor(self.x[idx], dtype=torch.float32),
-            torch.tensor(self.y[idx], dtype=torch.float32)
-        )
+        return self.x[idx], self.y[idx]
 
 
 # ---- Strategy Function Entry Point ----
 def strategy(data):
+    configure_threads()  # Use the CPUs the sandbox allows
+
     # Normalize all features: open, high, low, close
     scaler = MinMaxScaler()
     features = ['open', 'high', 'low', 'close']
     scaled = scaler.fit_transform(data[features].values)
 
-    # Create dataset and dataloader
     seq_length = 60
-    dataset = StockDataset(scaled, seq_length)
-    dataloader = DataLoader(dataset, batch_size=64, shuffle=True)
-
-    # Initialize model
-    model = LSTMModel(input_size=4)
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
-    criterion = nn.MSELoss()
-
-    # Train model
-    model.train()
-    for epoch in range(10):
-        for x_batch, y_batch in dataloader:
-            output = model(x_batch).squeeze()
-            loss = criterion(output, y_batch)
-
-            optimizer.zero_grad()
-            loss.backward()
-            optimizer.step()
-
-    # Make predictions across the whole dataset
+
+    def train():
+        # Create dataset and dataloader
+        dataloader = DataLoader(StockDataset(scaled, seq_length), batch_size=64, shuffle=True)
+
+        # Initialize model
+        model = LSTMModel(input_size=4)
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+        criterion = nn.MSELoss()
+
+        # Train model
+        model.train()
+        for epoch in range(10):
+            for x_batch, y_batch in dataloader:
+                output = model(x_batch).squeeze()
+                loss = criterion(output, y_batch)
+
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+        return model
+
+    # Reuse the model trained on the same data and code in an earlier run, if there is one
+    model = cached_fit(lambda: scaled, train, build=lambda: LSTMModel(input_size=4))
+
+    # Predict every day's next close in batches; window i ends the day before day i + seq_length
     model.eval()
-    signals = [None] * len(data)  # default None for first seq_length rows
-
-    with torch.no_grad():
-        for i in range(seq_length, len(data) - 1):
-            seq_input = scaled[i - seq_length:i]
-            seq_tensor = torch.tensor(seq_input, dtype=torch.float32).unsqueeze(0)  # shape (1, seq_len, input_size)
-            predicted_scaled = model(seq_tensor).item()
-            
-            # Inverse transform to get actual price
-            predicted_close = scaler.inverse_transform([[0, 0, 0, predicted_scaled]])[0][3]
-            today_close = data.iloc[i]['close']
-            signal = 1 if predicted_close > today_close else -1
-            signals[i + 1] = signal  # signal for next day
+    predicted_scaled = predict(model, StockDataset(scaled, seq_length).x)
+
+    # Inverse transform to get actual prices
+    unscaled = np.zeros((len(predicted_scaled), 4))
+    unscaled[:, 3] = predicted_scaled
+    predicted_close = scaler.inverse_transform(unscaled)[:, 3]
+
+    signals = np.full(len(data), np.nan)  # NaN for the first seq_length + 1 rows
+    today_close = data['close'].to_numpy()[seq_length:-1]
+    signals[seq_length + 1:] = np.where(predicted_close > today_close, 1, -1)  # signal for next day
 
     data['signal'] = signals
     return data
\ No newline at end of file
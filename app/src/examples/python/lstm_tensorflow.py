@@ -12,52 +12,58 @@ import pandas as pd
 import numpy as np
 import tensorflow as tf
 from sklearn.preprocessing import MinMaxScaler
+from ubacktest.modelcache import cached_fit
+from ubacktest.sequences import configure_threads, predict, windows
 
 # ---- Prepare Dataset ----
 def create_sequences(data, seq_length):
-    x, y = [], []
-    for i in range(len(data) - seq_length - 1):
-        x.append(data[i:i + seq_length])
-        y.append(data[i + seq_length][3])  # predict 'close' price
-    return np.array(x), np.array(y)
+    y = data[seq_length:-1, 3]  # predict 'close' price
+    x = windows(data, seq_length)[:len(y)]  # Views of data, no copies
+    return x, y
 
 
 # ---- Strategy Function Entry Point ----
 def strategy(data):
+    configure_threads()  # Use the CPUs the sandbox allows
+
     features = ['open', 'high', 'low', 'close']
     scaler = MinMaxScaler()
     scaled = scaler.fit_transform(data[features].values)
 
     seq_length = 60
-    x, y = create_sequences(scaled, seq_length)
 
     # ---- Define LSTM model ----
-    model = tf.keras.Sequential([
-        tf.keras.layers.Input(shape=(seq_length, 4)),
-        tf.keras.layers.LSTM(64, return_sequences=False),
-        tf.keras.layers.Dense(1)
-    ])
-
-    model.compile(optimizer='adam', loss='mse')
-    model.fit(x, y, epochs=10, batch_size=64, verbose=0)
+    def build():
+        return tf.keras.Sequential([
+            tf.keras.layers.Input(shape=(seq_length, 4)),
+            tf.keras.layers.LSTM(64, return_sequences=False),
+            tf.keras.layers.Dense(1)
+        ])
 
-    # ---- Predict and compute signals ----
-    signals = [np.nan] * len(data)
+    def train():
+        x, y = create_sequences(scaled, seq_length)
+        model = build()
+        model.compile(optimizer='adam', loss='mse')
+        model.fit(x, y, epochs=10, batch_size=64, verbose=0)
+        return model
 
-    for i in range(seq_length, len(data) - 1):
-        # Prepare input window
-        window = scaled[i - seq_length:i].reshape(1, seq_length, 4)
-        window_tensor = tf.convert_to_tensor(window, dtype=tf.float32)
+    # Reuse the model trained on the same data and code in an earlier run, if there is one
+    model = cached_fit(lambda: scaled, train, build=build)
 
-        # Predict next-day scaled close
-        pred_scaled = float(model(window_tensor, training=False).numpy().squeeze())
+    # ---- Predict and compute signals ----
+    # Window i ends the day before day i + seq_length; predict them all in batches
+    x, _ = create_sequences(scaled, seq_length)
+    pred_scaled = predict(model, x)
 
-        # Inverse-transform just the close value
-        predicted_close = scaler.inverse_transform([[0, 0, 0, pred_scaled]])[0, 3]
+    # Inverse-transform just the close value
+    unscaled = np.zeros((len(pred_scaled), 4))
+    unscaled[:, 3] = pred_scaled
+    predicted_close = scaler.inverse_transform(unscaled)[:, 3]
 
-        # Compare with today's close to generate signal
-        today_close = data.iloc[i]['close']
-        signals[i + 1] = 1 if predicted_close > today_close else -1
+    # Compare with today's close to generate signals
+    signals = np.full(len(data), np.nan)
+    today_close = data['close'].to_numpy()[seq_length:-1]
+    signals[seq_length + 1:] = np.where(predicted_close > today_close, 1, -1)
 
     data['signal'] = signals
     return data
\ No newline at end of file
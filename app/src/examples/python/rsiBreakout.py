@@ -10,23 +10,10 @@ Learn more @ docs.ubacktest.com/examples/rsi/rsibreakout
 
 import pandas as pd
 import numpy as np
-
-def calculate_rsi(series, window):
-    delta = series.diff()
-
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=window).mean()
-    avg_loss = loss.rolling(window=window).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi
+from ubacktest.indicators import rsi
 
 def strategy(data):
-    data['RSI'] = calculate_rsi(data['close'], window=14)
+    data['RSI'] = rsi(data['close'], window=14)
 
     # Initialize 'signal' column
     data['signal'] = np.nan  
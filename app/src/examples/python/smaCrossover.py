@@ -8,13 +8,11 @@ Learn more @ docs.ubacktest.com/examples/moving-averages/smacrossover
 '''
 
 import pandas as pd
-
-def calculate_sma(series, window):
-    return series.rolling(window=window).mean()
+from ubacktest.indicators import sma
 
 def strategy(data):
-    data['SMA_10'] = calculate_sma(data['close'], window=10)
-    data['SMA_50'] = calculate_sma(data['close'], window=50)
+    data['SMA_10'] = sma(data['close'], window=10)
+    data['SMA_50'] = sma(data['close'], window=50)
 
     # Generate crossover signals
     data['signal'] = 0
@@ -9,24 +9,11 @@ Learn more @ docs.ubacktest.com/examples/rsi/rsisma
 
 import pandas as pd
 import numpy as np
-
-def calculate_rsi(series, window):
-    delta = series.diff()
-
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=window).mean()
-    avg_loss = loss.rolling(window=window).mean()
-
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi
+from ubacktest.indicators import rsi, sma
 
 def strategy(data):
-    data['RSI'] = calculate_rsi(data['close'], window=14)
-    data['SMA_50'] = data['close'].rolling(window=50).mean()
+    data['RSI'] = rsi(data['close'], window=14)
+    data['SMA_50'] = sma(data['close'], window=50)
 
     # Initialize 'signal' column
     data['signal'] = np.nan  # Start with NaN
@@ -9,24 +9,11 @@ Learn more @ docs.ubacktest.com/examples/bollinger-bands/bollingersma
 
 import pandas as pd
 import numpy as np
-
-def calculate_bollinger_bands(series, window=20, num_std=2):
-
-    # construct bollinger bands (moving avg +/- std)
-    sma = series.rolling(window=window).mean()
-    std = series.rolling(window=window).std()
-    
-    upper_band = sma + (std * num_std)
-    lower_band = sma - (std * num_std)
-
-    return upper_band, lower_band
-
-def calculate_sma(series, window=12):
-    return series.rolling(window=window).mean()
+from ubacktest.indicators import bollinger_bands, sma
 
 def strategy(data):
-    data['Upper_Band'], data['Lower_Band'] = calculate_bollinger_bands(data['close'], window=20)
-    data['SMA_50'] = calculate_sma(data['close'], window=50)
+    data['Upper_Band'], data['Lower_Band'] = bollinger_bands(data['close'], window=20)
+    data['SMA_50'] = sma(data['close'], window=50)
 
     # Initialize 'signal' column
     data['signal'] = np.nan  # Start with NaN
@@ -9,7 +9,7 @@ Learn more @ docs.ubacktest.com/examples/machine-learning/svmclassifier
 import pandas as pd
 import numpy as np
 from sklearn.svm import SVC
-from sklearn.preprocessing import StandardScaler
+from ubacktest.walkforward import walk_forward
 
 def create_features(data, indicator_window=14):
 
@@ -50,30 +50,16 @@ def svm_classifier(data, training_window=30, indicator_window=14, kernel='linear
         'bollinger_lower', 
     ]
             
-    scaler = StandardScaler()  # Standardize features for better SVM performance
-    predictions = []
-
-    for i in range(training_window+indicator_window, len(data)):
-        train_data = data.iloc[i-training_window:i]  # Rolling window for training
-        test_data = data.iloc[[i]]  # Single test point (next day)
-
-        X_train, y_train = train_data[features], train_data['target']
-        X_test = test_data[features]
-
-        # Scale the data
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-
-        # Train the model
-        model = SVC(kernel=kernel)
-        model.fit(X_train_scaled, y_train)
-
-        # Make prediction
-        pred = model.predict(X_test_scaled)[0]
-        predictions.append(pred)
+    # A scaler and model refitted on the training_window bars before every
+    # bar, predicting that bar (the fits run in parallel; see ubacktest.walkforward)
+    start = training_window + indicator_window
+    predictions = walk_forward(
+        lambda: SVC(kernel=kernel),
+        data[features], data['target'], training_window, start=start,
+    )
 
     # Assign predictions back to the data
-    data.loc[data.index[training_window+indicator_window:], 'signal'] = predictions
+    data.loc[data.index[start:], 'signal'] = predictions
 
     return data
 
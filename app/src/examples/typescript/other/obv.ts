@@ -7,25 +7,11 @@ OBV helps to capture momentum with volume as a leading indicator.
 Learn more @ docs.ubacktest.com/examples/other-indicators/obv
 '''
 
-import pandas as pd
-
-def calculate_obv(data):
-    obv = [0]
-    for i in range(1, len(data)):
-        if data['close'].iloc[i] > data['close'].iloc[i-1]:
-            obv.append(obv[-1] + data['volume'].iloc[i])
-        elif data['close'].iloc[i] < data['close'].iloc[i-1]:
-            obv.append(obv[-1] - data['volume'].iloc[i])
-        else:
-            obv.append(obv[-1])
-    return pd.Series(obv, index=data.index)
-
-def calculate_sma(series, window=20):
-    return series.rolling(window=window).mean()
+from ubacktest.indicators import obv, sma
 
 def strategy(data):
-    data['OBV'] = calculate_obv(data)
-    data['SMA_20'] = calculate_sma(data['OBV'])
+    data['OBV'] = obv(data)
+    data['SMA_20'] = sma(data['OBV'], window=20)
 
     # Generate signals based on OBV crossover
     data['signal'] = 0
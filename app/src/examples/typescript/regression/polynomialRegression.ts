@@ -6,38 +6,19 @@ Learn more @ docs.ubacktest.com/examples/regression/polyreg
 '''
 
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
+from ubacktest.regression import rolling_regression
 import numpy as np
 
 def polynomial_regression(data, window=14, degree=2):
 
-    signals = np.zeros(len(data))  # Initialize signals array
-    predictions = np.zeros(len(data)) # Initialize predictions array
-    
-    # Iterate over the data starting from the window index
-    for i in range(window, len(data)):
-        # Prepare the features (X) and target (y) for the regression model
-        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
-        y = data['close'][i-window:i].values  # Last window closing prices
-        
-        # Transform the features into polynomial features (degree=2 for quadratic)
-        poly = PolynomialFeatures(degree)
-        X_poly = poly.fit_transform(X)  # Transform the data to polynomial features
-        
-        # Fit the polynomial model (using LinearRegression)
-        model = LinearRegression()
-        model.fit(X_poly, y)
-        
-        # Predict the next value (for the current time period)
-        prediction = model.predict(poly.transform(np.array([[i]])))  # Predict the next point (i.e., the 6th day)
-        predictions[i] = prediction[0]
-
-        # Signal generation based on prediction (uptrend or downtrend)
-        if prediction > data['close'][i-1]:
-            signals[i] = 1  # Buy signal
-        else:
-            signals[i] = -1  # Sell signal
+    # Fit a polynomial (degree=2 for quadratic) to the window closes before
+    # every bar and extend it to that bar (every bar at once; see
+    # ubacktest.regression)
+    predictions, _ = rolling_regression(data['close'], window, degree=degree)
+
+    # Signal generation based on prediction (uptrend or downtrend)
+    signals = np.where(predictions > data['close'].shift(1).to_numpy(), 1, -1)  # Buy / Sell signal
+    signals[:window] = 0  # No prediction for the first window bars
     
     return signals, predictions
 
@@ -47,7 +28,7 @@ def strategy(data):
     degree = 2
 
     # Call the polynomial_regression function to get the signals
-    data['signal'], data['prediction'] = polynomial_regression(data, degree)
+    data['signal'], data['prediction'] = polynomial_regression(data, degree=degree)
 
     return data
 `;
@@ -74,6 +74,26 @@ export type Stat = Serializable<{
   stddevReturn: number | null;
   maxReturn: number | null;
   minReturn: number | null;
+  robustness?: Robustness | null;
+}>;
+
+// Percentiles of a statistic over resampled paths (see
+// ubacktest/robustness.py), and the share of randomly timed copies of the
+// strategy that did at least as well. Each entry is null when it could not
+// be computed.
+export type RobustnessMetric =
+  | "sharpeRatio"
+  | "sortinoRatio"
+  | "maxDrawdown"
+  | "cagr";
+
+export type Robustness = Serializable<{
+  paths: number;
+  blockLength: number;
+  percentiles: number[];
+  bootstrap: Record<RobustnessMetric, number[] | null>;
+  null: Record<RobustnessMetric, number[] | null>;
+  pValue: Record<RobustnessMetric, number | null>;
 }>;
 
 export type ShareResultT = {
@@ -87,12 +107,97 @@ export type GetSharedT = Result & {
   accepted: boolean;
 };
 
+// A run the strategy cut short at the soft deadline (see
+// ubacktest/progress.py): signals are flat from `from` on.
+export type PartialRun = Serializable<{
+  reason: string;
+  after: number | null; // seconds used when the soft deadline was reached
+  from: string | null; // timestamp of the first bar without a signal
+}>;
+
 export type BacktestResult = Serializable<{
   strategyResult: StrategyResult;
   statistics: Stat;
   debugOutput: string;
   stderr: string;
   warnings: string[];
+  partial: PartialRun | null;
+}>;
+
+// Heartbeat of a run in progress, relayed from the harness while the
+// client waits (getRunProgress).
+export type RunProgress = Serializable<{
+  state: "queued" | "running";
+  elapsed: number | null; // wall seconds
+  cpu: number | null; // CPU seconds
+  done: number | null;
+  total: number | null;
+  message: string | null;
+  stopping: boolean; // past the soft deadline
+}>;
+
+// Parameter sweeps: each grid entry lists the values to try for one keyword
+// argument of strategy(data, **params).
+export type SweepGrid = Record<string, (number | string | boolean)[]>;
+export type SweepParams = Record<string, number | string | boolean>;
+
+export type SweepRow = Serializable<{
+  params: SweepParams;
+  statistics: Stat | null;
+  error: string | null;
+}>;
+
+export type SweepBest = Serializable<{
+  params: SweepParams;
+  strategyResult: StrategyResult;
+  statistics: Stat;
+}>;
+
+export type SweepResult = Serializable<{
+  rows: SweepRow[];
+  best: SweepBest[];
+  workers: number;
+  debugOutput: string;
+  stderr: string;
+  warnings: string[];
+}>;
+
+// Batches: one strategy over several symbols and/or date windows, each
+// combination ("slice") priced on its own.
+export type BatchWindow = {
+  startDate: string;
+  endDate: string;
+  warmupDate?: string;
+};
+
+export type BatchRow = Serializable<{
+  symbol: string;
+  startDate: string;
+  endDate: string;
+  statistics: Stat | null;
+  error: string | null;
+}>;
+
+export type BatchResult = Serializable<{
+  rows: BatchRow[];
+  workers: number;
+  debugOutput: string;
+  stderr: string;
+  warnings: string[];
+}>;
+
+// Repricing: a finished signal priced again under other costs and leverage
+// scalings, without re-running the strategy.
+export type RepricingRow = Serializable<{
+  costPerTrade: number;
+  leverage: number;
+  statistics: Stat | null;
+  error: string | null;
+}>;
+
+export type RepricingResult = Serializable<{
+  rows: RepricingRow[];
+  elapsedMs: number;
 }>;
 
 export type ResultWithStrategyName = Result & {
@@ -1,3 +1,66 @@
+import { indicatorsModule } from "../../editor/server/sandbox/indicatorsModule";
+import { modelcacheModule } from "../../editor/server/sandbox/modelcacheModule";
+import { poolModule } from "../../editor/server/sandbox/poolModule";
+import { profilingModule } from "../../editor/server/sandbox/profilingModule";
+import { progressModule } from "../../editor/server/sandbox/progressModule";
+import { regressionModule } from "../../editor/server/sandbox/regressionModule";
+import { sequencesModule } from "../../editor/server/sandbox/sequencesModule";
+import { walkforwardModule } from "../../editor/server/sandbox/walkforwardModule";
+
+// Strategies may import ubacktest modules, which are preinstalled in the
+// backtest sandbox but not wherever this script is deployed, so the ones
+// used (and the modules they import) are bundled into the script.
+const bundleable: Record<string, { source: string; needs: string[] }> = {
+  indicators: { source: indicatorsModule, needs: [] },
+  modelcache: { source: modelcacheModule, needs: [] },
+  pool: { source: poolModule, needs: [] },
+  profiling: { source: profilingModule, needs: [] },
+  progress: { source: progressModule, needs: [] },
+  regression: { source: regressionModule, needs: [] },
+  sequences: { source: sequencesModule, needs: ["pool"] },
+  walkforward: { source: walkforwardModule, needs: ["pool", "profiling", "progress"] },
+};
+
+const bundledModules = (strategyFcn: string): string => {
+  const names: string[] = [];
+  const add = (name: string) => {
+    if (names.includes(name)) return;
+    bundleable[name].needs.forEach(add);
+    names.push(name);
+  };
+  for (const name of Object.keys(bundleable)) {
+    const used = new RegExp(
+      `ubacktest\\.${name}\\b|from\\s+ubacktest\\s+import\\s+[^\\n]*\\b${name}\\b`,
+    );
+    if (used.test(strategyFcn)) add(name);
+  }
+  if (names.length === 0) return "";
+
+  const modules = names
+    .map((name) => `    ("${name}", ${JSON.stringify(bundleable[name].source.trimStart())}),`)
+    .join("\n");
+  return `# ---------------------------------
+# ubacktest.${names.join(", ubacktest.")} (bundled for the strategy below)
+# ---------------------------------
+
+import sys
+import types
+
+ubacktest = types.ModuleType("ubacktest")
+ubacktest.__path__ = []
+sys.modules["ubacktest"] = ubacktest
+for name, source in [
+${modules}
+]:
+    module = types.ModuleType(f"ubacktest.{name}")
+    module.__package__ = "ubacktest"
+    sys.modules[module.__name__] = module
+    setattr(ubacktest, name, module)
+    exec(source, module.__dict__)
+
+`;
+};
+
 export const alpacaCode = (
   strategyFcn: string,
   symbol: string,
@@ -14,6 +77,7 @@ and executes market orders based on the strategy's signals.
 Key Features:
 - Fetches historical stock data from Alpaca
 - Implements a simple buy-and-hold strategy
+- Optionally updates an on_bar(state, bar) strategy with only the newest bars
 - Manages trades and portfolio positions dynamically
 - Logs key actions for easier debugging and tracking
 
@@ -24,16 +88,21 @@ Requirements:
 
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.enums import OrderSide, OrderStatus, TimeInForce
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest, StockQuotesRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 import pandas as pd
 import math
+import pickle
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
+import os
+
 # ---------------------------------
 # Configuration & API Credentials
 # ---------------------------------
@@ -43,6 +112,7 @@ API_SECRET = <place_your_secret_here!>  # EDIT THIS LINE!
 SYMBOL = "${symbol}"  # Stock symbol to trade
 TIMEPOINTS = ${lookback}  # Number of historical data points to fetch
 TRADING_FREQUENCY = ${timeUnit}  # Trading frequency (e.g., minutes, hours, days)
+FLIP_TIMEOUT = 20  # Seconds to wait for a closing order to fill when switching long <-> short
 
 # Alpaca API Clients
 trading_client = TradingClient(API_KEY, API_SECRET, paper=True)  # Paper trading client
@@ -59,7 +129,7 @@ def log(message, level="INFO"):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] [{level}] {message}")
 
-# ---------------------------------
+${bundledModules(strategyFcn)}# ---------------------------------
 # Trading Strategy
 # ---------------------------------
 
@@ -95,6 +165,30 @@ def get_historical_data(symbol: str) -> pd.DataFrame:
     log(f"Retrieved {len(bars)} bars for {symbol}.")
     return bars[["timestamp", "open", "high", "low", "close", "volume"]]  # Keep relevant columns
 
+def get_bars_since(symbol: str, since) -> pd.DataFrame:
+    """
+    Fetches the bars that closed after since (the last bar already seen).
+    
+    Parameters:
+    - symbol (str): Stock symbol to retrieve data for
+    - since (Timestamp): Timestamp of the last bar already processed
+    
+    Returns:
+    - pd.DataFrame: The new bars, oldest first (possibly empty)
+    """
+    request_params = StockBarsRequest(
+        symbol_or_symbols=[symbol],
+        timeframe=TimeFrame(amount=${amount}, unit=TRADING_FREQUENCY),
+        start=since,
+    )
+
+    bars = historical_client.get_stock_bars(request_params).df
+    if bars.empty:
+        return pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])
+    bars = bars.reset_index()
+    bars = bars[bars["timestamp"] > since]
+    return bars[["timestamp", "open", "high", "low", "close", "volume"]].reset_index(drop=True)
+
 def get_position_value(symbol: str) -> float:
     """
     Retrieves the current market value of an open position.
@@ -114,10 +208,217 @@ def get_position_value(symbol: str) -> float:
         log(f"No open position found for {symbol}.", level="WARNING")
         return 0  # No position found
 
+# ---------------------------------
+# Incremental (Bar-by-Bar) Strategies
+# ---------------------------------
+
+'''
+Optional: next to strategy(data), define on_bar(state, bar) -> signal.
+
+When on_bar exists, each run only fetches the bars that closed since the last
+run and feeds them to on_bar one at a time, instead of refetching TIMEPOINTS
+bars and rerunning strategy() on all of them. bar is a dict with timestamp,
+open, high, low, close and volume; state is a dict that persists between
+runs (in STATE_FILE), so keep your indicators in it. Returning None carries
+the previous signal forward, like a NaN signal does in a backtest.
+
+The indicators below update in constant time and match the pandas versions
+used in the examples. Run check_on_bar(data) on some history to confirm
+on_bar reproduces strategy(data) before trading with it.
+'''
+
+STATE_FILE = os.getenv("STATE_FILE", "/tmp/ubacktest_state.pkl")
+
+
+class SMA:
+    """series.rolling(window).mean()"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.updates = 0
+        self.value = math.nan
+
+    def update(self, x):
+        self.values.append(x)
+        self.total += x
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)  # stop rounding drift building up
+        self.value = self.total / self.window if len(self.values) == self.window else math.nan
+        return self.value
+
+
+class EMA:
+    """series.ewm(span=span, adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = math.nan
+
+    def update(self, x):
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class RSI:
+    """RSI over rolling-mean gains and losses, as in the RSI examples."""
+
+    def __init__(self, window=14):
+        self.gains = SMA(window)
+        self.losses = SMA(window)
+        self.previous = math.nan
+        self.value = math.nan
+
+    def update(self, x):
+        delta = x - self.previous  # nan on the first bar, which counts as no change
+        avg_gain = self.gains.update(delta if delta > 0 else 0.0)
+        avg_loss = self.losses.update(-delta if delta < 0 else 0.0)
+        self.previous = x
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or avg_gain == avg_loss == 0:
+            self.value = math.nan
+        elif avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+
+class MACD:
+    """MACD line and its signal line, as in the MACD example."""
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.short = EMA(short_window)
+        self.long = EMA(long_window)
+        self.signal_line = EMA(signal_window)
+        self.value = math.nan
+        self.signal = math.nan
+
+    def update(self, x):
+        self.value = self.short.update(x) - self.long.update(x)
+        self.signal = self.signal_line.update(self.value)
+        return self.value, self.signal
+
+
+def run_on_bar(state, bars, signal=0.0):
+    """
+    Feeds bars to on_bar and returns the signal after each one (None and NaN
+    carry the previous signal forward).
+    """
+    signals = []
+    for bar in bars:
+        new_signal = on_bar(state, bar)
+        if new_signal is not None and not math.isnan(new_signal):
+            signal = float(new_signal)
+        signals.append(signal)
+    return signals
+
+
+def check_on_bar(data: pd.DataFrame, tolerance: float = 1e-9) -> bool:
+    """
+    Checks that on_bar reproduces the signals of strategy(data) on every bar
+    of data (historical bars, e.g. from get_historical_data).
+    """
+    expected = strategy(data.copy())["signal"].ffill().fillna(0).tolist()
+    actual = run_on_bar({}, data.to_dict("records"))
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, actual)) if abs(a - b) > tolerance]
+    if mismatches:
+        i = mismatches[0]
+        log(f"on_bar differs from strategy on {len(mismatches)} of {len(data)} bars; first at {data['timestamp'].iloc[i]} ({actual[i]} vs {expected[i]}).", level="ERROR")
+        return False
+    log(f"on_bar matches strategy on all {len(data)} bars.", level="SUCCESS")
+    return True
+
+
+def load_state(symbol: str):
+    try:
+        with open(STATE_FILE, "rb") as f:
+            saved = pickle.load(f)
+        if saved["symbol"] == symbol and saved["frequency"] == str(TRADING_FREQUENCY):
+            return saved
+        log("Saved state is for another symbol or frequency. Starting fresh.", level="WARNING")
+    except FileNotFoundError:
+        log("No saved state found. Starting fresh.")
+    except Exception as e:
+        log(f"Could not read saved state ({e}). Starting fresh.", level="WARNING")
+    return None
+
+
+def save_state(saved):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(saved, f)
+    os.replace(tmp, STATE_FILE)
+
+
+def incremental_signals(symbol: str):
+    """
+    Returns (new_signal, prev_signal) for the latest two bars, updating the
+    saved on_bar state with only the bars that closed since the last run.
+    """
+    saved = load_state(symbol)
+    if saved is None:
+        # warm the indicators up on the same history strategy() would see
+        bars = get_historical_data(symbol)
+        saved = {"symbol": symbol, "frequency": str(TRADING_FREQUENCY), "state": {}, "signals": [0.0, 0.0], "last_timestamp": None}
+    else:
+        bars = get_bars_since(symbol, saved["last_timestamp"])
+
+    if len(bars) > 0:
+        signals = run_on_bar(saved["state"], bars.to_dict("records"), saved["signals"][-1])
+        saved["signals"] = (saved["signals"] + signals)[-2:]
+        saved["last_timestamp"] = bars["timestamp"].iloc[-1]
+        save_state(saved)
+    log(f"Processed {len(bars)} new bars for {symbol}.")
+
+    return saved["signals"][-1], saved["signals"][-2]
+
 # ---------------------------------
 # Trade Execution Functions
 # ---------------------------------
 
+# Order states after which a closing order will never fill
+CLOSE_FAILED = {OrderStatus.CANCELED, OrderStatus.EXPIRED, OrderStatus.REJECTED, OrderStatus.DONE_FOR_DAY}
+
+def close_and_wait(symbol: str, timeout: float = FLIP_TIMEOUT) -> float:
+    """
+    Closes the position in symbol and waits until the closing order has
+    filled, checking its status with exponential backoff (50ms up to 1s).
+    Alpaca will not take an order that crosses a position through zero, so
+    a long <-> short switch has to wait for this before placing the new side.
+    
+    Parameters:
+    - symbol (str): Stock symbol to close
+    - timeout (float): Seconds to wait before giving up
+    
+    Returns:
+    - float: Seconds until the position was flat
+    """
+    started = time.perf_counter()
+    order = trading_client.close_position(symbol)
+    delay, checks = 0.05, 0
+    while True:
+        status = trading_client.get_order_by_id(order.id).status
+        checks += 1
+        if status == OrderStatus.FILLED:
+            elapsed = time.perf_counter() - started
+            log(f"{symbol}: position flat after {elapsed:.2f}s ({checks} status checks).")
+            return elapsed
+        if status in CLOSE_FAILED:
+            raise Exception(f"Closing order for {symbol} ended {status.value}")
+        remaining = started + timeout - time.perf_counter()
+        if remaining <= 0:
+            raise Exception(f"Position in {symbol} did not close within {timeout:g} seconds (last status {status.value})")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+
 def execute_trade(symbol: str):
     """
     Executes a trade based on the latest strategy signal.
@@ -127,14 +428,18 @@ def execute_trade(symbol: str):
     """
     log(f"Executing trade for {symbol}...")
 
-    # Fetch historical data and apply strategy
-    historical_data = get_historical_data(symbol)
-    df = strategy(historical_data)
-    
-    df["signal"] = df["signal"].ffill().fillna(0)  # Ensure signal is always defined
+    if "on_bar" in globals():
+        # Only the bars since the last run, through the saved on_bar state
+        new_signal, prev_signal = incremental_signals(symbol)
+    else:
+        # Fetch historical data and apply strategy
+        historical_data = get_historical_data(symbol)
+        df = strategy(historical_data)
 
-    new_signal = df["signal"].iloc[-1]
-    prev_signal = df["signal"].iloc[-2]
+        df["signal"] = df["signal"].ffill().fillna(0)  # Ensure signal is always defined
+
+        new_signal = df["signal"].iloc[-1]
+        prev_signal = df["signal"].iloc[-2]
     log(f"New signal: {new_signal}, Previous signal: {prev_signal}")
 
     if new_signal == prev_signal:
@@ -153,12 +458,14 @@ def execute_trade(symbol: str):
     portfolio_value = float(trading_client.get_account().portfolio_value)
     target_equity = portfolio_value * new_signal
     money_to_move = current_equity - target_equity
+    flip_started = None
     log(f"Portfolio Value: \${portfolio_value:.2f}, Target Equity: \${target_equity:.2f}, Money to Move: \${money_to_move:.2f}")
 
     # If switching from long to short or vice versa, close existing position first
     if (current_equity > 0 and target_equity < 0) or (current_equity < 0 and target_equity > 0):
         log(f"Switching from long to short (or vice versa), closing existing position in {symbol}.")
-        trading_client.close_position(symbol)
+        flip_started = time.perf_counter()
+        close_and_wait(symbol)
         money_to_move += current_equity
         log(f"Money to Move (updated): \${money_to_move:.2f}")
 
@@ -188,6 +495,8 @@ def execute_trade(symbol: str):
     try:
         trading_client.submit_order(order_details)
         log("Order submitted successfully.", level="SUCCESS")
+        if flip_started is not None:
+            log(f"Flip latency (close to new order submitted): {time.perf_counter() - flip_started:.2f}s")
     except Exception as e:
         log(f"Failed to submit order: {e}", level="ERROR")
 
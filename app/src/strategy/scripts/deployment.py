@@ -6,8 +6,9 @@ and executes market orders based on the strategy's signals.
 
 Key Features:
 - Fetches historical stock data from Alpaca
-- Implements a custom strategy
+- Implements a custom strategy, optionally updated bar by bar (on_bar)
 - Manages trades and portfolio positions dynamically
+- Optionally trades one strategy across several symbols (SYMBOLS)
 - Logs key actions for easier debugging and tracking
 
 Requirements:
@@ -17,13 +18,18 @@ Requirements:
 
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.enums import OrderSide, OrderStatus, TimeInForce
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest, StockQuotesRequest
+from alpaca.data.requests import StockBarsRequest, StockLatestBarRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 import pandas as pd
 import math
+import multiprocessing
+import pickle
+import requests
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
@@ -41,6 +47,16 @@ SYMBOL = "F"  # Stock symbol to trade
 TIMEPOINTS = 100  # Number of historical data points to fetch
 TRADING_FREQUENCY = TimeFrameUnit.Minute  # Trading frequency (e.g., minutes, hours, days)
 
+# Multi-symbol mode (see "Multi-Symbol Portfolio Mode" below): set SYMBOLS,
+# e.g. SYMBOLS="F,GM,TSLA", to trade the strategy on all of them at once
+SYMBOLS = [symbol.strip() for symbol in os.getenv("SYMBOLS", "").upper().split(",") if symbol.strip()]
+WEIGHTING = os.getenv("WEIGHTING", "equal")  # "equal" or "normalized"
+MAX_CONNECTIONS = int(os.getenv("MAX_CONNECTIONS", "16"))  # concurrent API requests
+EVALUATION_PROCESSES = int(os.getenv("EVALUATION_PROCESSES", str(os.cpu_count() or 1)))
+
+# Seconds to wait for a closing order to fill when switching long <-> short
+FLIP_TIMEOUT = float(os.getenv("FLIP_TIMEOUT", "20"))
+
 # Alpaca API Clients
 trading_client = TradingClient(API_KEY, API_SECRET, paper=True)  # Paper trading client
 historical_client = StockHistoricalDataClient(API_KEY, API_SECRET)  # Historical data client
@@ -75,6 +91,22 @@ def strategy(data, short_window=10, long_window=50):
 
     return data
 
+# The same strategy, one bar at a time (see "Incremental Strategies" below).
+# Remove on_bar to go back to rerunning strategy() on TIMEPOINTS bars.
+def on_bar(state, bar, short_window=10, long_window=50):
+    if not state:
+        state['SMA_short'] = SMA(short_window)
+        state['SMA_long'] = SMA(long_window)
+
+    sma_short = state['SMA_short'].update(bar['close'])
+    sma_long = state['SMA_long'].update(bar['close'])
+
+    if sma_short > sma_long:
+        return 1  # Buy
+    if sma_short < sma_long:
+        return -1  # Short
+    return 0
+
 # ---------------------------------
 # Data Retrieval Functions
 # ---------------------------------
@@ -105,6 +137,30 @@ def get_historical_data(symbol: str) -> pd.DataFrame:
     log(f"Retrieved {len(bars)} bars for {symbol}.")
     return bars[["timestamp", "open", "high", "low", "close", "volume"]]  # Keep relevant columns
 
+def get_bars_since(symbol: str, since) -> pd.DataFrame:
+    """
+    Fetches the bars that closed after since (the last bar already seen).
+    
+    Parameters:
+    - symbol (str): Stock symbol to retrieve data for
+    - since (Timestamp): Timestamp of the last bar already processed
+    
+    Returns:
+    - pd.DataFrame: The new bars, oldest first (possibly empty)
+    """
+    request_params = StockBarsRequest(
+        symbol_or_symbols=[symbol],
+        timeframe=TimeFrame(amount=1, unit=TRADING_FREQUENCY),
+        start=since,
+    )
+
+    bars = historical_client.get_stock_bars(request_params).df
+    if bars.empty:
+        return pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])
+    bars = bars.reset_index()
+    bars = bars[bars["timestamp"] > since]
+    return bars[["timestamp", "open", "high", "low", "close", "volume"]].reset_index(drop=True)
+
 def get_position_value(symbol: str) -> float:
     """
     Retrieves the current market value of an open position.
@@ -124,10 +180,217 @@ def get_position_value(symbol: str) -> float:
         log(f"No open position found for {symbol}.")
         return 0  # No position found
 
+# ---------------------------------
+# Incremental (Bar-by-Bar) Strategies
+# ---------------------------------
+
+'''
+Optional: next to strategy(data), define on_bar(state, bar) -> signal.
+
+When on_bar exists, each run only fetches the bars that closed since the last
+run and feeds them to on_bar one at a time, instead of refetching TIMEPOINTS
+bars and rerunning strategy() on all of them. bar is a dict with timestamp,
+open, high, low, close and volume; state is a dict that persists between
+runs (in STATE_FILE), so keep your indicators in it. Returning None carries
+the previous signal forward, like a NaN signal does in a backtest.
+
+The indicators below update in constant time and match the pandas versions
+used in the examples. Run check_on_bar(data) on some history to confirm
+on_bar reproduces strategy(data) before trading with it.
+'''
+
+STATE_FILE = os.getenv("STATE_FILE", "/tmp/ubacktest_state.pkl")
+
+
+class SMA:
+    """series.rolling(window).mean()"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.updates = 0
+        self.value = math.nan
+
+    def update(self, x):
+        self.values.append(x)
+        self.total += x
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)  # stop rounding drift building up
+        self.value = self.total / self.window if len(self.values) == self.window else math.nan
+        return self.value
+
+
+class EMA:
+    """series.ewm(span=span, adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = math.nan
+
+    def update(self, x):
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class RSI:
+    """RSI over rolling-mean gains and losses, as in the RSI examples."""
+
+    def __init__(self, window=14):
+        self.gains = SMA(window)
+        self.losses = SMA(window)
+        self.previous = math.nan
+        self.value = math.nan
+
+    def update(self, x):
+        delta = x - self.previous  # nan on the first bar, which counts as no change
+        avg_gain = self.gains.update(delta if delta > 0 else 0.0)
+        avg_loss = self.losses.update(-delta if delta < 0 else 0.0)
+        self.previous = x
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or avg_gain == avg_loss == 0:
+            self.value = math.nan
+        elif avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+
+class MACD:
+    """MACD line and its signal line, as in the MACD example."""
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.short = EMA(short_window)
+        self.long = EMA(long_window)
+        self.signal_line = EMA(signal_window)
+        self.value = math.nan
+        self.signal = math.nan
+
+    def update(self, x):
+        self.value = self.short.update(x) - self.long.update(x)
+        self.signal = self.signal_line.update(self.value)
+        return self.value, self.signal
+
+
+def run_on_bar(state, bars, signal=0.0):
+    """
+    Feeds bars to on_bar and returns the signal after each one (None and NaN
+    carry the previous signal forward).
+    """
+    signals = []
+    for bar in bars:
+        new_signal = on_bar(state, bar)
+        if new_signal is not None and not math.isnan(new_signal):
+            signal = float(new_signal)
+        signals.append(signal)
+    return signals
+
+
+def check_on_bar(data: pd.DataFrame, tolerance: float = 1e-9) -> bool:
+    """
+    Checks that on_bar reproduces the signals of strategy(data) on every bar
+    of data (historical bars, e.g. from get_historical_data).
+    """
+    expected = strategy(data.copy())["signal"].ffill().fillna(0).tolist()
+    actual = run_on_bar({}, data.to_dict("records"))
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, actual)) if abs(a - b) > tolerance]
+    if mismatches:
+        i = mismatches[0]
+        log(f"on_bar differs from strategy on {len(mismatches)} of {len(data)} bars; first at {data['timestamp'].iloc[i]} ({actual[i]} vs {expected[i]}).", level="ERROR")
+        return False
+    log(f"on_bar matches strategy on all {len(data)} bars.", level="SUCCESS")
+    return True
+
+
+def load_state(symbol: str):
+    try:
+        with open(STATE_FILE, "rb") as f:
+            saved = pickle.load(f)
+        if saved["symbol"] == symbol and saved["frequency"] == str(TRADING_FREQUENCY):
+            return saved
+        log("Saved state is for another symbol or frequency. Starting fresh.", level="WARNING")
+    except FileNotFoundError:
+        log("No saved state found. Starting fresh.")
+    except Exception as e:
+        log(f"Could not read saved state ({e}). Starting fresh.", level="WARNING")
+    return None
+
+
+def save_state(saved, path=STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(saved, f)
+    os.replace(tmp, path)
+
+
+def incremental_signals(symbol: str):
+    """
+    Returns (new_signal, prev_signal) for the latest two bars, updating the
+    saved on_bar state with only the bars that closed since the last run.
+    """
+    saved = load_state(symbol)
+    if saved is None:
+        # warm the indicators up on the same history strategy() would see
+        bars = get_historical_data(symbol)
+        saved = {"symbol": symbol, "frequency": str(TRADING_FREQUENCY), "state": {}, "signals": [0.0, 0.0], "last_timestamp": None}
+    else:
+        bars = get_bars_since(symbol, saved["last_timestamp"])
+
+    if len(bars) > 0:
+        signals = run_on_bar(saved["state"], bars.to_dict("records"), saved["signals"][-1])
+        saved["signals"] = (saved["signals"] + signals)[-2:]
+        saved["last_timestamp"] = bars["timestamp"].iloc[-1]
+        save_state(saved)
+    log(f"Processed {len(bars)} new bars for {symbol}.")
+
+    return saved["signals"][-1], saved["signals"][-2]
+
 # ---------------------------------
 # Trade Execution Functions
 # ---------------------------------
 
+# Order states after which a closing order will never fill
+CLOSE_FAILED = {OrderStatus.CANCELED, OrderStatus.EXPIRED, OrderStatus.REJECTED, OrderStatus.DONE_FOR_DAY}
+
+def close_and_wait(symbol: str, timeout: float = FLIP_TIMEOUT) -> float:
+    """
+    Closes the position in symbol and waits until the closing order has
+    filled, checking its status with exponential backoff (50ms up to 1s).
+    Alpaca will not take an order that crosses a position through zero, so
+    a long <-> short switch has to wait for this before placing the new side.
+    
+    Parameters:
+    - symbol (str): Stock symbol to close
+    - timeout (float): Seconds to wait before giving up
+    
+    Returns:
+    - float: Seconds until the position was flat
+    """
+    started = time.perf_counter()
+    order = trading_client.close_position(symbol)
+    delay, checks = 0.05, 0
+    while True:
+        status = trading_client.get_order_by_id(order.id).status
+        checks += 1
+        if status == OrderStatus.FILLED:
+            elapsed = time.perf_counter() - started
+            log(f"{symbol}: position flat after {elapsed:.2f}s ({checks} status checks).")
+            return elapsed
+        if status in CLOSE_FAILED:
+            raise Exception(f"Closing order for {symbol} ended {status.value}")
+        remaining = started + timeout - time.perf_counter()
+        if remaining <= 0:
+            raise Exception(f"Position in {symbol} did not close within {timeout:g} seconds (last status {status.value})")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+
 def execute_trade(symbol: str):
     """
     Executes a trade based on the latest strategy signal.
@@ -137,14 +400,18 @@ def execute_trade(symbol: str):
     """
     log(f"Executing trade for {symbol}...")
 
-    # Fetch historical data and apply strategy
-    historical_data = get_historical_data(symbol)
-    df = strategy(historical_data)
-    
-    df["signal"] = df["signal"].ffill().fillna(0)  # Ensure signal is always defined
+    if "on_bar" in globals():
+        # Only the bars since the last run, through the saved on_bar state
+        new_signal, prev_signal = incremental_signals(symbol)
+    else:
+        # Fetch historical data and apply strategy
+        historical_data = get_historical_data(symbol)
+        df = strategy(historical_data)
 
-    new_signal = df["signal"].iloc[-1]
-    prev_signal = df["signal"].iloc[-2]
+        df["signal"] = df["signal"].ffill().fillna(0)  # Ensure signal is always defined
+
+        new_signal = df["signal"].iloc[-1]
+        prev_signal = df["signal"].iloc[-2]
 
     log(f"New signal: {new_signal}, Previous signal: {prev_signal}")
 
@@ -164,23 +431,14 @@ def execute_trade(symbol: str):
     portfolio_value = float(trading_client.get_account().portfolio_value)
     target_equity = portfolio_value * new_signal
     money_to_move = target_equity - current_equity
+    flip_started = None
     log(f"Portfolio Value: ${portfolio_value:.2f}, Target Equity: ${target_equity:.2f}, Money to Move: ${money_to_move:.2f}")
 
     # If switching from long to short or vice versa, close existing position first
     if (current_equity > 0 and target_equity < 0) or (current_equity < 0 and target_equity > 0):
         log(f"Switching from long to short (or vice versa), closing existing position in {symbol}.")
-        trading_client.close_position(symbol)
-        while True:
-            log("Validating the position has gone to 0...")
-            try:
-                pos = get_position_value(symbol)
-                if pos == 0:
-                    log("Position successfully @ 0.")
-                    break
-            except:
-                break
-            time.sleep(.5)  # Small delay            
-
+        flip_started = time.perf_counter()
+        close_and_wait(symbol)
         money_to_move += current_equity
         log(f"Money to Move (updated): ${money_to_move:.2f}")
 
@@ -195,7 +453,7 @@ def execute_trade(symbol: str):
     elif money_to_move < 0:
         log(f"Placing SELL order for ${abs(money_to_move):.2f} of {symbol}.")
 
-        latest_bar_details = StockQuotesRequest(symbol_or_symbols=symbol)
+        latest_bar_details = StockLatestBarRequest(symbol_or_symbols=symbol)
         latest_price = float(historical_client.get_stock_latest_bar(latest_bar_details)[symbol].close)
         shares_to_sell = math.floor(abs(money_to_move)/latest_price)
         shares_to_sell_value = shares_to_sell*latest_price
@@ -219,9 +477,318 @@ def execute_trade(symbol: str):
     try:
         trading_client.submit_order(order_details)
         log("Order submitted successfully.", level="SUCCESS")
+        if flip_started is not None:
+            log(f"Flip latency (close to new order submitted): {time.perf_counter() - flip_started:.2f}s")
     except Exception as e:
         log(f"Failed to submit order: {e}", level="ERROR")
 
+# ---------------------------------
+# Multi-Symbol Portfolio Mode
+# ---------------------------------
+
+'''
+With SYMBOLS set, every run trades the strategy on all of those symbols from
+one account, instead of SYMBOL alone:
+
+- the bars for every symbol come from a single StockBarsRequest
+- strategy() (or on_bar) runs for each symbol in EVALUATION_PROCESSES
+  parallel processes
+- each symbol's signal becomes a weight of the whole portfolio:
+  WEIGHTING="equal" gives every symbol 1/len(SYMBOLS) of it (times its
+  signal), WEIGHTING="normalized" splits all of it between the symbols with
+  a non-zero signal, in proportion to their signals
+- orders for every symbol whose weight changed go out concurrently, over a
+  pool of up to MAX_CONNECTIONS connections
+
+Each run logs how long every stage took, and warns when a run takes more
+than half a bar, so you can tell how many symbols fit in one bar.
+Positions in symbols outside SYMBOLS are left alone.
+'''
+
+PORTFOLIO_STATE_FILE = os.getenv("PORTFOLIO_STATE_FILE", "/tmp/ubacktest_portfolio_state.pkl")
+
+# Rough number of bars per trading day, to size the history request
+BARS_PER_DAY = {
+    TimeFrameUnit.Minute: 390,
+    TimeFrameUnit.Hour: 7,
+    TimeFrameUnit.Day: 1,
+    TimeFrameUnit.Week: 1 / 5,
+    TimeFrameUnit.Month: 1 / 21,
+}
+BAR_SECONDS = {
+    TimeFrameUnit.Minute: 60,
+    TimeFrameUnit.Hour: 60 * 60,
+    TimeFrameUnit.Day: 24 * 60 * 60,
+    TimeFrameUnit.Week: 7 * 24 * 60 * 60,
+    TimeFrameUnit.Month: 30 * 24 * 60 * 60,
+}
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+tradable_assets = set()  # symbols already checked, kept while the instance is warm
+
+
+def pool_connections(client, size: int):
+    """
+    Lets up to size requests through a client at once, reusing connections
+    (alpaca-py clients share one requests session, which keeps 10 by default).
+    """
+    session = getattr(client, "_session", None)
+    if isinstance(session, requests.Session):
+        adapter = requests.adapters.HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        session.mount("https://", adapter)
+
+
+def history_start(now):
+    """
+    A start date far enough back for TIMEPOINTS bars, with room for weekends
+    and holidays.
+    """
+    trading_days = TIMEPOINTS / BARS_PER_DAY[TRADING_FREQUENCY]
+    return now - timedelta(days=math.ceil(trading_days * 7 / 5) + 7)
+
+
+def get_portfolio_bars(symbols: list, start) -> dict:
+    """
+    Fetches the bars of every symbol since start in one request.
+
+    Returns:
+    - dict: symbol -> pd.DataFrame of its bars, oldest first (possibly empty)
+    """
+    request_params = StockBarsRequest(
+        symbol_or_symbols=symbols,
+        timeframe=TimeFrame(amount=1, unit=TRADING_FREQUENCY),
+        start=start,
+    )
+
+    bars = historical_client.get_stock_bars(request_params).df
+    by_symbol = {symbol: pd.DataFrame(columns=BAR_COLUMNS) for symbol in symbols}
+    if bars.empty:
+        return by_symbol
+    bars = bars.reset_index()
+    for symbol, group in bars.groupby("symbol"):
+        by_symbol[symbol] = group[BAR_COLUMNS].reset_index(drop=True)
+    return by_symbol
+
+
+def evaluate_symbol(symbol: str, bars: pd.DataFrame, saved):
+    """
+    Runs the strategy for one symbol (in a worker process).
+
+    Returns:
+    - tuple: (new_signal, prev_signal, saved on_bar state or None)
+    """
+    if "on_bar" in globals():
+        if saved is None:
+            # warm the indicators up on the same history strategy() would see
+            saved = {"symbol": symbol, "frequency": str(TRADING_FREQUENCY), "state": {}, "signals": [0.0, 0.0], "last_timestamp": None}
+            bars = bars.tail(TIMEPOINTS)
+        else:
+            bars = bars[bars["timestamp"] > saved["last_timestamp"]]
+        if len(bars) > 0:
+            signals = run_on_bar(saved["state"], bars.to_dict("records"), saved["signals"][-1])
+            saved["signals"] = (saved["signals"] + signals)[-2:]
+            saved["last_timestamp"] = bars["timestamp"].iloc[-1]
+        return saved["signals"][-1], saved["signals"][-2], saved
+
+    bars = bars.tail(TIMEPOINTS).reset_index(drop=True)
+    if len(bars) < 2:
+        return 0.0, 0.0, None
+    df = strategy(bars)
+    signal = df["signal"].ffill().fillna(0)  # Ensure signal is always defined
+    return float(signal.iloc[-1]), float(signal.iloc[-2]), None
+
+
+def evaluate_all(jobs: list) -> list:
+    """
+    evaluate_symbol for each (symbol, bars, saved) job, in parallel processes
+    where the platform can fork them.
+    """
+    processes = min(EVALUATION_PROCESSES, len(jobs))
+    if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+        # forked workers see strategy, on_bar and everything else defined here
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("fork")) as pool:
+            return list(pool.map(evaluate_symbol, *zip(*jobs)))
+    return [evaluate_symbol(*job) for job in jobs]
+
+
+def target_weights(signals: dict) -> dict:
+    """
+    Share of the portfolio value to hold in each symbol (negative for short).
+    """
+    if WEIGHTING == "normalized":
+        gross = sum(abs(signal) for signal in signals.values())
+        return {symbol: signal / gross if gross else 0.0 for symbol, signal in signals.items()}
+    return {symbol: signal / len(signals) for symbol, signal in signals.items()}
+
+
+def rebalance_symbol(symbol: str, target_equity: float, current_equity: float, latest_price: float):
+    """
+    Moves one symbol's position to target_equity, as execute_trade does for a
+    single symbol. Returns the seconds it took.
+    """
+    started = time.perf_counter()
+
+    if current_equity != 0 and target_equity == 0:
+        log(f"{symbol}: target is 0. Closing position.")
+        trading_client.close_position(symbol)
+        return time.perf_counter() - started
+
+    # If switching from long to short or vice versa, close existing position first
+    if (current_equity > 0 and target_equity < 0) or (current_equity < 0 and target_equity > 0):
+        log(f"{symbol}: switching sides, closing existing position first.")
+        close_and_wait(symbol)
+        current_equity = 0
+
+    money_to_move = target_equity - current_equity
+    if money_to_move > 0:
+        log(f"{symbol}: placing BUY order for ${money_to_move:.2f}.")
+        order_details = MarketOrderRequest(
+            symbol=symbol,
+            notional=math.floor(money_to_move * 100) / 100,
+            side=OrderSide.BUY,
+            time_in_force=TimeInForce.DAY
+        )
+    elif money_to_move < 0:
+        shares_to_sell = math.floor(abs(money_to_move) / latest_price)
+        if shares_to_sell == 0:
+            log(f"{symbol}: SELL order requires 0 shares be sold. No trade will be placed.")
+            return time.perf_counter() - started
+        log(f"{symbol}: placing SELL order for {shares_to_sell} shares (${shares_to_sell * latest_price:.2f}).")
+        order_details = MarketOrderRequest(
+            symbol=symbol,
+            qty=shares_to_sell,
+            side=OrderSide.SELL,
+            time_in_force=TimeInForce.DAY
+        )
+    else:
+        return time.perf_counter() - started
+
+    trading_client.submit_order(order_details)
+    log(f"{symbol}: order submitted successfully.", level="SUCCESS")
+    return time.perf_counter() - started
+
+
+def load_portfolio_state() -> dict:
+    try:
+        with open(PORTFOLIO_STATE_FILE, "rb") as f:
+            saved = pickle.load(f)
+        return {symbol: state for symbol, state in saved.items() if state["frequency"] == str(TRADING_FREQUENCY)}
+    except FileNotFoundError:
+        log("No saved portfolio state found. Starting fresh.")
+    except Exception as e:
+        log(f"Could not read saved portfolio state ({e}). Starting fresh.", level="WARNING")
+    return {}
+
+
+def trade_portfolio(symbols: list):
+    """
+    One run of multi-symbol mode: check the account, fetch every symbol's
+    bars, evaluate, and rebalance the symbols whose weight changed.
+    """
+    timings = {}
+    started = stage = time.perf_counter()
+
+    def lap(name):
+        nonlocal stage
+        now = time.perf_counter()
+        timings[name] = now - stage
+        stage = now
+
+    with ThreadPoolExecutor(MAX_CONNECTIONS) as pool:
+        clock = pool.submit(trading_client.get_clock)
+        account = pool.submit(trading_client.get_account)
+        positions = pool.submit(trading_client.get_all_positions)
+        unchecked = [symbol for symbol in symbols if symbol not in tradable_assets]
+        assets = dict(zip(unchecked, pool.map(trading_client.get_asset, unchecked)))
+        clock, account, positions = clock.result(), account.result(), positions.result()
+    lap("account")
+
+    for symbol, asset in assets.items():
+        if asset.tradable and asset.fractionable:
+            tradable_assets.add(symbol)
+        else:
+            log(f"{symbol} is not tradable or fractionable. It will be skipped.", level="ERROR")
+    symbols = [symbol for symbol in symbols if symbol in tradable_assets]
+
+    if not clock.is_open:
+        log("Market is CLOSED. No trade will be placed.", level="WARNING")
+        return
+    if not symbols:
+        log("None of SYMBOLS can be traded. No trade will be placed.", level="ERROR")
+        return
+
+    # One bars request for every symbol, from the earliest bar any of them needs
+    saved_states = load_portfolio_state() if "on_bar" in globals() else {}
+    now = datetime.now(ZoneInfo("America/New_York"))
+    fresh_start = history_start(now)
+    starts = [
+        saved_states[symbol]["last_timestamp"] if symbol in saved_states else fresh_start
+        for symbol in symbols
+    ]
+    bars = get_portfolio_bars(symbols, min(starts))
+    lap("bars")
+
+    results = evaluate_all([(symbol, bars[symbol], saved_states.get(symbol)) for symbol in symbols])
+    new_signals = {symbol: new for symbol, (new, _, _) in zip(symbols, results)}
+    prev_signals = {symbol: prev for symbol, (_, prev, _) in zip(symbols, results)}
+    if "on_bar" in globals():
+        # symbols that have not had a bar yet start fresh again next run
+        saved_states.update({
+            symbol: saved for symbol, (_, _, saved) in zip(symbols, results)
+            if saved["last_timestamp"] is not None
+        })
+        save_state(saved_states, PORTFOLIO_STATE_FILE)
+    lap("evaluate")
+
+    new_weights = target_weights(new_signals)
+    prev_weights = target_weights(prev_signals)
+    to_trade = [symbol for symbol in symbols if new_weights[symbol] != prev_weights[symbol]]
+    log("Signals: " + ", ".join(f"{symbol} {prev_signals[symbol]:g}->{new_signals[symbol]:g}" for symbol in symbols))
+
+    held = {position.symbol: float(position.market_value) for position in positions}
+    portfolio_value = float(account.portfolio_value)
+    order_times = []
+    if to_trade:
+        sells = [
+            symbol for symbol in to_trade
+            if portfolio_value * new_weights[symbol] < held.get(symbol, 0)
+        ]
+        latest = historical_client.get_stock_latest_bar(StockLatestBarRequest(symbol_or_symbols=sells)) if sells else {}
+
+        with ThreadPoolExecutor(MAX_CONNECTIONS) as pool:
+            orders = {
+                symbol: pool.submit(
+                    rebalance_symbol,
+                    symbol,
+                    portfolio_value * new_weights[symbol],
+                    held.get(symbol, 0.0),
+                    float(latest[symbol].close) if symbol in latest else None,
+                )
+                for symbol in to_trade
+            }
+            for symbol, order in orders.items():
+                try:
+                    order_times.append(order.result())
+                except Exception as e:
+                    log(f"{symbol}: failed to rebalance: {e}", level="ERROR")
+    else:
+        log("No change in target weights. Skipping trades.")
+    lap("orders")
+
+    total = time.perf_counter() - started
+    log(
+        f"Latency for {len(symbols)} symbols: "
+        + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings.items())
+        + f", total {total:.3f}s; {len(order_times)} orders"
+        + (f", slowest {max(order_times):.3f}s" if order_times else "")
+    )
+    if total > BAR_SECONDS[TRADING_FREQUENCY] / 2:
+        log(f"This run took more than half a bar ({total:.1f}s). Consider fewer SYMBOLS.", level="WARNING")
+
+
+pool_connections(trading_client, MAX_CONNECTIONS)
+pool_connections(historical_client, MAX_CONNECTIONS)
+
 # ---------------------------------
 # Main Trading Execution
 # ---------------------------------
@@ -231,6 +798,10 @@ def trade():
     Checks market status and executes a trade if the market is open.
     """
     try:
+        if SYMBOLS:
+            trade_portfolio(SYMBOLS)
+            return
+
         log("Checking market status and trade viability...")
 
         symbol = SYMBOL.upper()
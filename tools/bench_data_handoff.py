@@ -0,0 +1,129 @@
+"""
+Compares the two ways ScriptBuilder can hand a quote to the Python harness:
+
+- json:   the quote inlined as a JSON string literal, parsed with json.loads
+- binary: raw little-endian column files shipped in the additional_files zip
+          and memory-mapped into df_init
+
+For each size it reports the submission payload (base64, as sent to Judge0),
+the time to build df_init and the peak Python heap used while doing so.
+
+usage: python tools/bench_data_handoff.py [--sizes 1500 20000 200000] [--json out.json]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+def make_quote(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(np.exp(np.cumsum(rng.normal(0, 0.01, n))), 4)
+    spread = np.abs(rng.normal(0, 0.005, n))
+    timestamps = pd.date_range("2020-01-01 14:30", periods=n, freq="min", tz="UTC")
+    return {
+        "high": np.round(close * (1 + spread), 4).tolist(),
+        "low": np.round(close * (1 - spread), 4).tolist(),
+        "open": np.round(close * (1 + rng.normal(0, 0.002, n)), 4).tolist(),
+        "close": close.tolist(),
+        "volume": rng.integers(1_000, 5_000_000, n).tolist(),
+        "timestamp": timestamps.strftime("%Y-%m-%dT%H:%M:%S.000Z").tolist(),
+    }
+
+
+def json_payload(quote):
+    # mirrors JSON.stringify(...) inside the generated script
+    literal = json.dumps(quote, separators=(",", ":"))
+    return literal, len(base64.b64encode(f"jsonCodeUnformatted = '{literal}'".encode()))
+
+
+def binary_payload(quote, directory):
+    manifest = {}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for column, values in quote.items():
+            if isinstance(values[0], str):
+                width = max(len(v) for v in values)
+                raw = np.array(values, dtype=f"S{width}")
+            elif all(float(v).is_integer() for v in values):
+                raw = np.asarray(values, dtype="<i8")
+            else:
+                raw = np.asarray(values, dtype="<f8")
+            name = f"data/{column}.bin"
+            archive.writestr(name, raw.tobytes())
+            manifest[column] = {"file": name, "dtype": raw.dtype.str.lstrip("|"), "length": len(values)}
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as archive:
+        archive.extractall(directory)
+    return manifest, len(base64.b64encode(buffer.getvalue()))
+
+
+def load_json(literal):
+    return pd.DataFrame(json.loads(literal))
+
+
+def load_binary(manifest, directory):
+    arrays = {}
+    for column, spec in manifest.items():
+        arrays[column] = np.memmap(
+            os.path.join(directory, spec["file"]), dtype=spec["dtype"], mode="c", shape=(spec["length"],)
+        )
+        if arrays[column].dtype.kind == "S":
+            arrays[column] = arrays[column].astype(str)
+    return pd.DataFrame(arrays, copy=False)
+
+
+def measure(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1500, 20000, 200000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", help="write machine-readable results to this path")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'bars':>8} {'mode':>7} {'payload KB':>11} {'to df ms':>9} {'peak MB':>8}")
+    for n in args.sizes:
+        quote = make_quote(n)
+        literal, json_size = json_payload(quote)
+        with tempfile.TemporaryDirectory() as directory:
+            manifest, binary_size = binary_payload(quote, directory)
+            expected, actual = load_json(literal), load_binary(manifest, directory)
+            for column in quote:
+                np.testing.assert_array_equal(np.asarray(expected[column]), np.asarray(actual[column]))
+            runs = {
+                "json": (json_size, *measure(lambda: load_json(literal), args.repeats)),
+                "binary": (binary_size, *measure(lambda: load_binary(manifest, directory), args.repeats)),
+            }
+        for mode, (size, seconds, peak) in runs.items():
+            print(f"{n:>8} {mode:>7} {size / 1024:>11.1f} {seconds * 1000:>9.2f} {peak / 2**20:>8.2f}")
+            results.append({"bars": n, "mode": mode, "payload_bytes": size, "seconds": seconds, "peak_bytes": peak})
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmarks every example strategy in app/src/examples/python through the
+exact script ScriptBuilder.build() generates, on deterministic synthetic
+quotes of several sizes (one-minute bars from synthetic_data.py).
+
+Per example and size it records:
+
+- import:   seconds to run the example's top level (its imports and
+            definitions) in a fresh interpreter
+- wall:     seconds for the whole generated script
+- strategy: seconds inside strategy(df_init), from the harness's own stage
+            timings (HARNESS_PROFILE=time)
+- peak_kb:  peak RSS of the script
+
+Results are written as JSON (--out). Given --baseline (an earlier --out),
+every example/size that got slower or bigger than the baseline by more than
+--tolerance, or stopped running, is listed and the exit status is 1.
+
+ScriptBuilder.ts is transpiled with the `typescript` package from the app's
+node_modules (run `npm install` in app/ first), or any typescript.js passed
+with --typescript. Examples whose packages are not installed (torch,
+tensorflow, ...) are reported as missing rather than failed.
+
+usage: python tools/bench_examples.py [--sizes 250 1500 20000 200000]
+           [--examples macd obv] [--handoff json|binary] [--timeout 60]
+           [--out results.json] [--baseline baseline.json] [--tolerance 0.25]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate, to_quote
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SERVER = os.path.join(ROOT, "app", "src", "editor", "server")
+EXAMPLES = os.path.join(ROOT, "app", "src", "examples", "python")
+DEFAULT_TYPESCRIPT = os.path.join(ROOT, "app", "node_modules", "typescript")
+
+KEY = "BENCHKEY"
+CODE_MARKER = "# <example code>"
+# below this, a slower run is noise rather than a regression
+MIN_DELTA = {"import": 0.05, "wall": 0.05, "strategy": 0.02, "peak_kb": 8 * 1024}
+
+# Builds the harness script for one quote with the example code left as a
+# marker, so each size is transpiled and encoded once for every example.
+NODE_RUNNER = r"""
+const fs = require("fs");
+const path = require("path");
+const ts = require(process.argv[1]);
+require.extensions[".ts"] = (module, filename) => {
+  const js = ts.transpileModule(fs.readFileSync(filename, "utf-8"), {
+    compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+  }).outputText;
+  module._compile(js, filename);
+};
+const ScriptBuilder = require(path.join(process.argv[2], "ScriptBuilder.ts")).default;
+const SandboxArchive = require(path.join(process.argv[2], "SandboxArchive.ts")).default;
+
+const { code, quote, key, binary } = JSON.parse(fs.readFileSync(0, "utf-8"));
+const archive = new SandboxArchive();
+const script = ScriptBuilder.build(
+  code,
+  quote,
+  quote.timestamp[0],
+  key,
+  archive,
+  { close: quote.close, timestamp: quote.timestamp, costPerTrade: 0.1 },
+  binary,
+);
+process.stdout.write(JSON.stringify({ script, files: archive.toBase64() }));
+"""
+
+# Times the example's top level on its own.
+IMPORT_TIMER = r"""
+import sys, time
+source = sys.stdin.read()
+started = time.perf_counter()
+exec(compile(source, "example.py", "exec"), {"__name__": "example"})
+print(time.perf_counter() - started)
+"""
+
+
+def make_quote(n, seed=0):
+    # normalized to a first close of 1, like StockDataConnection's quotes
+    return to_quote(generate(n, "1min", "regime", seed, normalize=True))
+
+
+def build_harness(quote, binary, typescript):
+    proc = subprocess.run(
+        ["node", "-e", NODE_RUNNER, typescript, SERVER],
+        input=json.dumps({"code": CODE_MARKER, "quote": quote, "key": KEY, "binary": binary}),
+        capture_output=True,
+        text=True,
+        env={**os.environ, "HARNESS_PROFILE": "time"},
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    built = json.loads(proc.stdout)
+    if not built["script"].startswith(CODE_MARKER):
+        sys.exit("ScriptBuilder no longer puts the user's code first; update bench_examples.py")
+    return built["script"][len(CODE_MARKER):], base64.b64decode(built["files"])
+
+
+def run_script(directory, script, timeout):
+    # Popen + wait4 rather than subprocess.run, to get this child's own rusage
+    path = os.path.join(directory, "script.py")
+    with open(path, "w") as f:
+        f.write(script)
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, path], cwd=directory, stdout=out, stderr=err)
+        timer = threading.Timer(timeout, lambda: os.kill(proc.pid, signal.SIGKILL))
+        timer.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        wall = time.perf_counter() - started
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        out.seek(0)
+        err.seek(0)
+        return wall, usage.ru_maxrss, proc.returncode, out.read().decode(errors="replace"), err.read().decode(errors="replace")
+
+
+def result_frame(stdout):
+    # the same trailer STDParser reads: "<payload>\n<key><payload length>"
+    trailer = stdout.rfind(KEY)
+    if trailer == -1:
+        return None
+    length = int(stdout[trailer + len(KEY):].strip())
+    return json.loads(stdout[trailer - 1 - length:trailer - 1])
+
+
+def failure(stderr):
+    last = (stderr.strip().splitlines() or ["no output"])[-1]
+    status = "missing" if last.startswith(("ModuleNotFoundError", "ImportError")) else "error"
+    return {"status": status, "message": last[:200]}
+
+
+def bench_example(directory, harness, code, timeout):
+    timer = subprocess.run(
+        [sys.executable, "-c", IMPORT_TIMER], input=code, cwd=directory, capture_output=True, text=True
+    )
+    if timer.returncode != 0:
+        return failure(timer.stderr)
+
+    wall, peak_kb, returncode, stdout, stderr = run_script(directory, code + harness, timeout)
+    if returncode == -signal.SIGKILL and wall >= timeout:
+        return {"status": "timeout", "wall": round(wall, 4)}
+    frame = result_frame(stdout)
+    if frame is None:
+        return failure(stderr)
+
+    stages = {stage["stage"]: stage["wall"] for stage in frame.get("stages", [])}
+    return {
+        "status": "ok",
+        "import": round(float(timer.stdout.strip()), 4),
+        "wall": round(wall, 4),
+        "strategy": round(stages.get("strategy", float("nan")), 4),
+        "peak_kb": peak_kb,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, sizes in results.items():
+        for size, current in sizes.items():
+            before = baseline.get(name, {}).get(size)
+            if not before or before.get("status") != "ok":
+                continue
+            if current.get("status") != "ok":
+                found.append(f"{name} @ {size}: was ok, now {current.get('status')}")
+                continue
+            for metric, min_delta in MIN_DELTA.items():
+                old, new = before.get(metric), current.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > min_delta:
+                    found.append(f"{name} @ {size}: {metric} {old:g} -> {new:g} (+{100 * (new / old - 1):.0f}%)")
+    return found
+
+
+def print_table(results, sizes):
+    print(f"{'example':<24}" + "".join(f"{size:>16}" for size in sizes) + "   (wall s / strategy s)")
+    for name, by_size in results.items():
+        cells = []
+        for size in sizes:
+            entry = by_size.get(str(size), {"status": "-"})
+            if entry["status"] == "ok":
+                cells.append(f"{entry['wall']:.2f}/{entry['strategy']:.3f}")
+            else:
+                cells.append(entry["status"])
+        print(f"{name:<24}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1500, 20000, 200000])
+    parser.add_argument("--examples", nargs="+", help="example names (default: all)")
+    parser.add_argument("--handoff", choices=["json", "binary"], default="json")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds per run (the app's limit is 60)")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against an earlier --out")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--typescript", default=DEFAULT_TYPESCRIPT)
+    args = parser.parse_args()
+
+    names = args.examples or sorted(file[:-3] for file in os.listdir(EXAMPLES) if file.endswith(".py"))
+    codes = {}
+    for name in names:
+        with open(os.path.join(EXAMPLES, f"{name}.py")) as f:
+            codes[name] = f.read()
+
+    results = {name: {} for name in names}
+    for size in args.sizes:
+        harness, files = build_harness(make_quote(size), args.handoff == "binary", args.typescript)
+        with tempfile.TemporaryDirectory() as directory:
+            zipfile.ZipFile(io.BytesIO(files)).extractall(directory)
+            for name in names:
+                # a larger quote won't finish where a smaller one didn't
+                if any(entry["status"] == "timeout" for entry in results[name].values()):
+                    results[name][str(size)] = {"status": "skipped"}
+                    continue
+                results[name][str(size)] = bench_example(directory, harness, codes[name], args.timeout)
+                print(f"{name} @ {size}: {results[name][str(size)]}", file=sys.stderr)
+
+    print_table(results, args.sizes)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "handoff": args.handoff,
+        "sizes": args.sizes,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline["results"], args.tolerance)
+        for line in found:
+            print(line)
+        print(f"{len(found)} regressions against {args.baseline}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Times the harness portfolio engine (ubacktest/portfolio.py) against the
+scalar PortfolioCalculator.ts loop it replaced, at 10k to 1M bars.
+
+Python is timed over simulate + statistics, and separately over encoding
+the series into the result frame (the server used to pay a similar cost
+sending them to the browser); TypeScript over calculate() + statistics().
+Uses the same TypeScript runner as check_portfolio_engine.py.
+
+usage: python tools/bench_portfolio_engine.py [--sizes 10000 100000 1000000] [--json out.json]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from check_portfolio_engine import DEFAULT_TYPESCRIPT, load_engine, make_case, run_typescript
+
+
+def time_python(engine, case, repeats):
+    best_engine = best_encode = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        series = engine.simulate(case["close"], case["signal"], case["costPerTrade"])
+        engine.statistics(series, case["signal"], case["timestamp"])
+        computed = time.perf_counter()
+        json.dumps(engine.encode(series))
+        best_engine = min(best_engine, computed - started)
+        best_encode = min(best_encode, time.perf_counter() - computed)
+    return best_engine, best_encode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--typescript", default=DEFAULT_TYPESCRIPT)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    engine = load_engine()
+    rng = np.random.default_rng(0)
+    rows = []
+
+    print(f"{'bars':>9} {'engine (ms)':>12} {'encode (ms)':>12} {'typescript (ms)':>16}")
+    for size in args.sizes:
+        case = make_case(rng, size, volatility=0.01)
+        engine_seconds, encode_seconds = time_python(engine, case, args.repeats)
+        reference = run_typescript([case], args.typescript)[0]
+        typescript = reference.get("seconds")
+
+        rows.append({
+            "bars": size,
+            "engine_seconds": engine_seconds,
+            "encode_seconds": encode_seconds,
+            "typescript_seconds": typescript,
+            "typescript_error": reference.get("error"),
+        })
+        shown = f"{typescript * 1000:16.1f}" if typescript is not None else f"{'failed':>16}"
+        print(f"{size:>9} {engine_seconds * 1000:12.1f} {encode_seconds * 1000:12.1f} {shown}")
+        if reference.get("error"):
+            print(f"          PortfolioCalculator: {reference['error']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark of ubacktest/sequences.py (embedded in sequencesModule.ts) in the
+deep learning examples: building the training sequences, and predicting
+every bar, both as the examples did before (kept below) and as they do now.
+For PyTorch, building the sequences includes one epoch of DataLoader batches.
+
+Each example runs on seeded synthetic quotes. Its predict() call is
+intercepted and also answered by the old per-bar loop on the same trained
+model and scaler, so the two sets of signals can be compared. Batched and
+one-at-a-time forward passes may round differently in the last float32
+bits, so signals may only differ where the prediction is that close to
+today's close.
+
+Examples whose framework (torch, tensorflow) is not installed are skipped.
+
+usage: python tools/bench_sequences.py [--bars 2000] [--seed 0]
+           [--examples lstm_pytorch lstm_tensorflow]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from check_portfolio_engine import ROOT, SERVER, template
+from synthetic_data import generate
+
+EXAMPLES = {"lstm_pytorch": "torch", "lstm_tensorflow": "tensorflow"}
+PACKAGE = {
+    "modelcache.py": ("modelcacheModule.ts", "modelcacheModule"),
+    "pool.py": ("poolModule.ts", "poolModule"),
+    "sequences.py": ("sequencesModule.ts", "sequencesModule"),
+}
+FEATURES = ['open', 'high', 'low', 'close']
+SEQ_LENGTH = 60
+
+
+# ---- reference implementation, as it was in app/src/examples/python ----
+
+class StockDataset:
+    def __init__(self, data, seq_length=60):
+        self.seq_length = seq_length
+        self.x = []
+        self.y = []
+
+        for i in range(len(data) - seq_length - 1):
+            seq_x = data[i:i+seq_length]
+            seq_y = data[i+seq_length][3]  # 3 = index of 'close'
+            self.x.append(seq_x)
+            self.y.append(seq_y)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, idx):
+        import torch
+
+        return (
+            torch.tensor(self.x[idx], dtype=torch.float32),
+            torch.tensor(self.y[idx], dtype=torch.float32)
+        )
+
+
+def torch_signals(model, data, scaled, scaler, seq_length=60):
+    import torch
+
+    signals = [None] * len(data)  # default None for first seq_length rows
+
+    with torch.no_grad():
+        for i in range(seq_length, len(data) - 1):
+            seq_input = scaled[i - seq_length:i]
+            seq_tensor = torch.tensor(seq_input, dtype=torch.float32).unsqueeze(0)  # shape (1, seq_len, input_size)
+            predicted_scaled = model(seq_tensor).item()
+
+            # Inverse transform to get actual price
+            predicted_close = scaler.inverse_transform([[0, 0, 0, predicted_scaled]])[0][3]
+            today_close = data.iloc[i]['close']
+            signal = 1 if predicted_close > today_close else -1
+            signals[i + 1] = signal  # signal for next day
+
+    return signals
+
+
+def tensorflow_sequences(data, seq_length=60):
+    x, y = [], []
+    for i in range(len(data) - seq_length - 1):
+        x.append(data[i:i + seq_length])
+        y.append(data[i + seq_length][3])  # predict 'close' price
+    return np.array(x), np.array(y)
+
+
+def tensorflow_signals(model, data, scaled, scaler, seq_length=60):
+    import tensorflow as tf
+
+    signals = [np.nan] * len(data)
+
+    for i in range(seq_length, len(data) - 1):
+        # Prepare input window
+        window = scaled[i - seq_length:i].reshape(1, seq_length, 4)
+        window_tensor = tf.convert_to_tensor(window, dtype=tf.float32)
+
+        # Predict next-day scaled close
+        pred_scaled = float(model(window_tensor, training=False).numpy().squeeze())
+
+        # Inverse-transform just the close value
+        predicted_close = scaler.inverse_transform([[0, 0, 0, pred_scaled]])[0, 3]
+
+        # Compare with today's close to generate signal
+        today_close = data.iloc[i]['close']
+        signals[i + 1] = 1 if predicted_close > today_close else -1
+
+    return signals
+
+
+REFERENCE = {
+    "lstm_pytorch": (StockDataset, torch_signals),
+    "lstm_tensorflow": (tensorflow_sequences, tensorflow_signals),
+}
+
+
+# ---- harness ----
+
+def install_package(directory):
+    # the sandbox's ubacktest package, as far as sequences needs it
+    os.makedirs(os.path.join(directory, "ubacktest"))
+    open(os.path.join(directory, "ubacktest", "__init__.py"), "w").close()
+    for file, (module, export) in PACKAGE.items():
+        source = template(os.path.join(SERVER, "sandbox", module), export)
+        with open(os.path.join(directory, "ubacktest", file), "w") as f:
+            f.write(source.lstrip())
+    sys.path.insert(0, directory)
+
+
+def load_example(name):
+    path = os.path.join(ROOT, "app", "src", "examples", "python", f"{name}.py")
+    namespace = {"__name__": f"example_{name}"}
+    with open(path) as f:
+        exec(compile(f.read(), path, "exec"), namespace)
+    return namespace
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def build_sequences(build, scaled):
+    # create_sequences(), or a StockDataset and one epoch of batches from it
+    sequences = build(scaled, SEQ_LENGTH)
+    if isinstance(sequences, tuple):
+        return sequences
+    from torch.utils.data import DataLoader
+
+    return sum(len(x) for x, _ in DataLoader(sequences, batch_size=64))
+
+
+def run(name, data):
+    example = load_example(name)
+    old_sequences, old_signals = REFERENCE[name]
+    library = example["predict"]
+    scalers = []
+    result = {}
+
+    class RecordingScaler(MinMaxScaler):
+        def fit_transform(self, X, y=None):
+            scalers.append(self)
+            return super().fit_transform(X, y)
+
+    def intercept(model, inputs, *args, **kwargs):
+        predictions, result["predict"] = timed(library, model, inputs, *args, **kwargs)
+        scaled = scalers[-1].transform(data[FEATURES].values)
+        result["expected"], result["loop"] = timed(old_signals, model, data, scaled, scalers[-1], SEQ_LENGTH)
+        result["predictions"] = predictions
+        return predictions
+
+    example["MinMaxScaler"] = RecordingScaler
+    example["predict"] = intercept
+    signals = example["strategy"](data.copy())["signal"].to_numpy()
+
+    scaled = MinMaxScaler().fit_transform(data[FEATURES].values)
+    _, result["old_sequences"] = timed(build_sequences, old_sequences, scaled)
+    _, result["sequences"] = timed(build_sequences, example.get("create_sequences") or example["StockDataset"], scaled)
+
+    # where the old loop and predict() disagree, the prediction must be a
+    # near-tie with today's close (within float32 rounding of the scaled close)
+    expected = np.array(result["expected"], dtype=np.float64)
+    close = data["close"].to_numpy()
+    scaler = scalers[-1]
+    predicted_close = (result["predictions"] - scaler.min_[3]) / scaler.scale_[3]
+    today = close[SEQ_LENGTH:-1]
+    tie = np.abs(predicted_close - today) <= 1e-5 / scaler.scale_[3]
+    differ = ~((signals == expected) | (np.isnan(signals) & np.isnan(expected)))
+    result["flipped"] = int(differ.sum())
+    result["ok"] = not (differ[SEQ_LENGTH + 1:] & ~tie).any() and not differ[:SEQ_LENGTH + 1].any()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--examples", nargs="+", choices=EXAMPLES, default=list(EXAMPLES))
+    args = parser.parse_args()
+
+    install_package(tempfile.mkdtemp(prefix="ubacktest_sequences_"))
+    failures = 0
+    for name in args.examples:
+        if importlib.util.find_spec(EXAMPLES[name]) is None:
+            print(f"{name:>15}: skipped, {EXAMPLES[name]} is not installed")
+            continue
+        data = generate(args.bars, "daily", seed=args.seed, normalize=True)
+        result = run(name, data)
+        failures += not result["ok"]
+        print(
+            f"{name:>15} {args.bars} bars: "
+            f"sequences {result['old_sequences']:7.3f}s -> {result['sequences']:7.3f}s  "
+            f"predictions {result['loop']:7.2f}s -> {result['predict']:7.2f}s "
+            f"({result['loop'] / result['predict']:.0f}x)  "
+            f"{result['flipped']} near-tie signals differ  {'ok' if result['ok'] else 'DIFFERENT'}"
+        )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
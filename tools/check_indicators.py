@@ -0,0 +1,257 @@
+"""
+Parity check of ubacktest/indicators.py (embedded in indicatorsModule.ts)
+against the example code it replaced, which is kept below verbatim.
+
+Random OHLCV paths (with flat stretches, integer and float volumes) are run
+through both. Outputs must be identical, NaNs included, not merely close:
+strategies compare indicators with > and <, so any last-bit difference could
+flip a signal.
+
+The one intended difference is the Parabolic SAR when the second close is not
+above the first. The example set sar[2] instead of sar[1] there, which left
+its SAR NaN for the whole series; the library starts it at sar[1]. Those
+cases are only checked to produce a SAR at all.
+
+With --bench, the example and library versions are also timed.
+
+usage: python tools/check_indicators.py [--cases 300] [--seed 0] [--bench 10000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+from check_portfolio_engine import SERVER, template
+
+
+# ---- reference implementations, as they were in app/src/examples/python ----
+
+def calculate_sma(series, window):
+    return series.rolling(window=window).mean()
+
+
+def calculate_ema(series, window):
+    return series.ewm(span=window, adjust=False).mean()
+
+
+def calculate_rsi(series, window):
+    delta = series.diff()
+
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    avg_gain = gain.rolling(window=window).mean()
+    avg_loss = loss.rolling(window=window).mean()
+
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+
+    return rsi
+
+
+def calculate_bollinger_bands(series, window=20, num_std=2):
+    sma = series.rolling(window=window).mean()
+    std = series.rolling(window=window).std()
+
+    upper_band = sma + (std * num_std)
+    lower_band = sma - (std * num_std)
+
+    return upper_band, lower_band
+
+
+def calculate_macd(series, short_window=12, long_window=26, signal_window=9):
+    short_ema = series.ewm(span=short_window, adjust=False).mean()
+    long_ema = series.ewm(span=long_window, adjust=False).mean()
+    macd = short_ema - long_ema
+
+    signal = macd.ewm(span=signal_window, adjust=False).mean()
+    return macd, signal
+
+
+def calculate_obv(data):
+    obv = [0]
+    for i in range(1, len(data)):
+        if data['close'].iloc[i] > data['close'].iloc[i-1]:
+            obv.append(obv[-1] + data['volume'].iloc[i])
+        elif data['close'].iloc[i] < data['close'].iloc[i-1]:
+            obv.append(obv[-1] - data['volume'].iloc[i])
+        else:
+            obv.append(obv[-1])
+    return pd.Series(obv, index=data.index)
+
+
+def calculate_ama(series, window=10, fast_ema=2, slow_ema=30):
+    price_change = abs(series.diff(window))
+    volatility = series.diff().abs().rolling(window=window).sum()
+
+    efficiency_ratio = price_change / volatility.replace(0, np.nan)
+    efficiency_ratio.fillna(0, inplace=True)
+
+    smoothing_constant = (efficiency_ratio * (2 / (fast_ema + 1) - 2 / (slow_ema + 1)) + 2 / (slow_ema + 1)) ** 2
+    ama = series.copy()
+
+    for i in range(1, len(series)):
+        ama.iloc[i] = ama.iloc[i - 1] + smoothing_constant.iloc[i] * (series.iloc[i] - ama.iloc[i - 1])
+
+    return ama
+
+
+def calculate_parabolic_sar(data, step=0.02, max_step=0.2):
+    sar = np.full(len(data), np.nan)
+    af = step
+
+    sar[0] = np.nan
+
+    uptrend = data['close'][1] > data['close'][0]
+
+    if uptrend:
+        sar[1] = data['low'][0]
+        ep = data['high'][0]
+    else:
+        sar[2] = data['high'][0]
+        ep = data['low'][0]
+
+    for i in range(2, len(data)):
+        sar[i] = sar[i - 1] + af * (ep - sar[i - 1])
+
+        if uptrend:
+            sar[i] = min(sar[i], data['low'][i - 1], data['low'][i - 2])
+        else:
+            sar[i] = max(sar[i], data['high'][i - 1], data['high'][i - 2])
+
+        if uptrend:
+            if data['high'][i] > ep:
+                ep = data['high'][i]
+                af = min(af + step, max_step)
+        else:
+            if data['low'][i] < ep:
+                ep = data['low'][i]
+                af = min(af + step, max_step)
+
+        if uptrend and data['low'][i] < sar[i]:
+            uptrend = False
+            sar[i] = ep
+            ep = data['low'][i]
+            af = step
+        elif not uptrend and data['high'][i] > sar[i]:
+            uptrend = True
+            sar[i] = ep
+            ep = data['high'][i]
+            af = step
+
+    return sar
+
+
+# ---- harness ----
+
+def load_indicators():
+    indicators = types.ModuleType("ubacktest_indicators")
+    source = template(os.path.join(SERVER, "sandbox", "indicatorsModule.ts"), "indicatorsModule")
+    exec(compile(source, "ubacktest/indicators.py", "exec"), indicators.__dict__)
+    return indicators
+
+
+def make_case(rng, n=None):
+    n = n or int(rng.integers(3, 600))
+    close = np.round(100 * np.cumprod(1 + rng.normal(0, rng.uniform(0.002, 0.03), n)), 2)
+    if n > 20 and rng.random() < 0.5:
+        start = int(rng.integers(0, n - 10))
+        close[start:start + int(rng.integers(2, 15))] = close[start]  # flat stretch
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    volume = rng.integers(0, 1_000_000, n)
+    if rng.random() < 0.5:
+        volume = volume * rng.uniform(0.5, 1.5)
+    return pd.DataFrame({
+        "open": close,
+        "high": np.round(close + spread, 2),
+        "low": np.round(close - spread, 2),
+        "close": close,
+        "volume": volume,
+    })
+
+
+def identical(expected, actual):
+    expected, actual = np.asarray(expected), np.asarray(actual)
+    return expected.shape == actual.shape and np.array_equal(expected, actual, equal_nan=True)
+
+
+def pairs(ind, data):
+    close = data["close"]
+    window = 14
+    yield "sma", calculate_sma(close, window), ind.sma(close, window)
+    yield "ema", calculate_ema(close, window), ind.ema(close, window)
+    yield "rsi", calculate_rsi(close, window), ind.rsi(close, window)
+    for name, expected, actual in zip(("bollinger upper", "bollinger lower"),
+                                      calculate_bollinger_bands(close), ind.bollinger_bands(close)):
+        yield name, expected, actual
+    for name, expected, actual in zip(("macd", "macd signal"), calculate_macd(close), ind.macd(close)):
+        yield name, expected, actual
+    yield "obv", calculate_obv(data), ind.obv(data)
+    yield "ama", calculate_ama(close), ind.ama(close)
+
+
+def check(ind, cases, rng):
+    failures = []
+    sar_fixed = 0
+    for index in range(cases):
+        data = make_case(rng)
+        for name, expected, actual in pairs(ind, data):
+            if not identical(expected, actual):
+                failures.append(f"case {index}: {name} differs")
+        actual = ind.parabolic_sar(data)
+        if data["close"][1] > data["close"][0]:
+            if not identical(calculate_parabolic_sar(data), actual):
+                failures.append(f"case {index}: parabolic_sar differs")
+        else:
+            sar_fixed += 1
+            if len(data) > 2 and np.isnan(actual[2:]).any():
+                failures.append(f"case {index}: parabolic_sar has gaps after a down start")
+    return failures, sar_fixed
+
+
+def bench(ind, sizes, rng):
+    timed = [
+        ("obv", calculate_obv, ind.obv, lambda d: (d,)),
+        ("ama", calculate_ama, ind.ama, lambda d: (d["close"],)),
+        ("parabolic_sar", calculate_parabolic_sar, ind.parabolic_sar, lambda d: (d,)),
+    ]
+    for n in sizes:
+        data = make_case(rng, n)
+        data.loc[1, "close"] = data["close"][0] + 1  # uptrend start, so both SARs do the full work
+        for name, example, library, args in timed:
+            started = time.perf_counter()
+            example(*args(data))
+            middle = time.perf_counter()
+            library(*args(data))
+            done = time.perf_counter()
+            print(f"{name:>14} {n:>8} bars: example {middle - started:8.3f}s  library {done - middle:8.4f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", type=int, nargs="*", help="also time the loop indicators at these sizes")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ind = load_indicators()
+
+    failures, sar_fixed = check(ind, args.cases, rng)
+    for failure in failures[:20]:
+        print(failure)
+    print(f"{args.cases} cases ({sar_fixed} with a down start for the SAR), {len(failures)} mismatches")
+
+    if args.bench is not None:
+        bench(ind, args.bench or [10_000, 100_000], rng)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Property-based equivalence check between the harness portfolio engine
+(ubacktest/portfolio.py, embedded in portfolioModule.ts) and the reference
+PortfolioCalculator.ts it replaced.
+
+Random price paths, signals (long/short/fractional, sparse and noisy changes)
+and trading costs are generated and both implementations run on each case.
+Series may differ by one rounding unit where a value sits exactly on a
+rounding boundary (the two sum in a different order), so statistics are
+checked separately, on the TypeScript series, to a relative 1e-9. Cases whose
+portfolio hits zero are skipped: ResultValidator rejects them either way.
+statistics_batch() is checked to give each row exactly what statistics()
+gives it alone, on stacks of signals over shared prices.
+
+The TypeScript side is transpiled with the `typescript` package from the
+app's node_modules (run `npm install` in app/ first), or any typescript.js
+passed with --typescript.
+
+usage: python tools/check_portfolio_engine.py [--cases 500] [--seed 0]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SERVER = os.path.join(ROOT, "app", "src", "editor", "server")
+DEFAULT_TYPESCRIPT = os.path.join(ROOT, "app", "node_modules", "typescript")
+
+SERIES = ("returns", "portfolio", "portfolioWithCosts", "cash", "equity", "cashWithCosts", "equityWithCosts")
+ROUNDING_UNIT = 1e-4
+
+# Runs PortfolioCalculator.ts over the cases read from stdin.
+NODE_RUNNER = r"""
+const fs = require("fs");
+const ts = require(process.argv[1]);
+const source = fs.readFileSync(process.argv[2], "utf-8");
+const js = ts.transpileModule(source, {
+  compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+}).outputText;
+const mod = { exports: {} };
+new Function("module", "exports", "require", js)(mod, mod.exports, require);
+const PortfolioCalculator = mod.exports.default;
+
+const cases = JSON.parse(fs.readFileSync(0, "utf-8"));
+const results = cases.map(({ close, signal, timestamp, costPerTrade }) => {
+  const strategyResult = {
+    timestamp, close, signal,
+    portfolio: [], portfolioWithCosts: [], returns: [],
+    equity: [], cash: [], equityWithCosts: [], cashWithCosts: [],
+  };
+  const started = performance.now();
+  try {
+    const calc = new PortfolioCalculator(costPerTrade, strategyResult);
+    const series = calc.calculate();
+    const statistics = calc.statistics();
+    const seconds = (performance.now() - started) / 1000;
+    const out = { seconds, statistics };
+    for (const name of process.argv[3].split(",")) out[name] = series[name];
+    return out;
+  } catch (error) {
+    return { error: String(error) };
+  }
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+def template(path, export):
+    with open(path) as f:
+        source = f.read()
+    match = re.search(r"export const " + export + r" = String\.raw`(.*?)`;", source, re.S)
+    if not match:
+        sys.exit(f"could not find {export} in {path}")
+    return match.group(1)
+
+
+def load_engine():
+    engine = types.ModuleType("ubacktest_portfolio")
+    source = template(os.path.join(SERVER, "sandbox", "portfolioModule.ts"), "portfolioModule")
+    exec(compile(source, "ubacktest/portfolio.py", "exec"), engine.__dict__)
+    return engine
+
+
+def run_typescript(cases, typescript=DEFAULT_TYPESCRIPT):
+    proc = subprocess.run(
+        ["node", "-e", NODE_RUNNER, typescript, os.path.join(SERVER, "PortfolioCalculator.ts"), ",".join(SERIES)],
+        input=json.dumps(cases),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    return json.loads(proc.stdout)
+
+
+def run_python(engine, case):
+    series = engine.simulate(case["close"], case["signal"], case["costPerTrade"])
+    return decode(json.loads(json.dumps(engine.encode(series))))
+
+
+def decode(encoded):
+    # what STDParser.decodePortfolio does on the server
+    series = dict(encoded["values"])
+    for name, units in encoded["rounded"].items():
+        series[name] = [unit / encoded["scale"] for unit in units]
+    return series
+
+
+def make_case(rng, n=None, volatility=None):
+    n = n or int(rng.integers(2, 400))
+    volatility = volatility or rng.choice([0.001, 0.01, 0.05, 0.2])
+    close = np.round(np.exp(np.cumsum(rng.normal(0, volatility, n))), 4)
+    close = np.maximum(close, 1e-4)
+
+    levels = [
+        np.array([-1.0, 0.0, 1.0]),
+        np.array([0.0, 1.0]),
+        np.round(rng.uniform(-1, 1, 5), 3),
+    ][rng.integers(3)]
+    change_rate = rng.choice([0.01, 0.1, 0.5, 1.0])
+    signal = pd.Series(np.where(rng.random(n) < change_rate, rng.choice(levels, n), np.nan))
+    signal = signal.ffill().fillna(float(rng.choice(levels))).round(3)
+
+    timestamp = pd.date_range("2020-01-02", periods=n, freq=rng.choice(["D", "h", "min"]), tz="UTC")
+    return {
+        "close": close.tolist(),
+        "signal": signal.tolist(),
+        "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%S.000Z").tolist(),
+        "costPerTrade": float(rng.choice([0, 0.01, 0.1, 1, 5])),
+    }
+
+
+def close_enough(expected, actual, rel=1e-9):
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    return abs(expected - actual) <= rel * max(1.0, abs(expected))
+
+
+def compare(engine, case_index, case, expected, series):
+    failures = []
+    flips = 0
+    for name in SERIES:
+        diff = np.abs(np.asarray(expected[name], dtype=float) - np.asarray(series[name], dtype=float))
+        if diff.max() > ROUNDING_UNIT + 1e-12:
+            failures.append(f"case {case_index}: {name} differs by {diff.max():g}")
+        flips += int(np.count_nonzero(diff > 1e-12))
+
+    reference = {name: np.asarray(expected[name], dtype=float) for name in SERIES}
+    statistics = engine.statistics(reference, case["signal"], case["timestamp"])
+    for name, value in expected["statistics"].items():
+        if not close_enough(value, statistics[name]):
+            failures.append(f"case {case_index}: {name} expected {value}, got {statistics[name]}")
+    return failures, flips
+
+
+def check_batch(engine, rng, stacks):
+    failures = []
+    for stack in range(stacks):
+        n = int(rng.integers(2, 400))
+        cases = [make_case(rng, n=n) for _ in range(int(rng.integers(1, 16)))]
+        close, timestamp = cases[0]["close"], cases[0]["timestamp"]
+        signals = np.array([case["signal"] for case in cases])
+        rows = [engine.simulate(close, signal, case["costPerTrade"]) for signal, case in zip(signals, cases)]
+        stacked = {name: np.stack([row[name] for row in rows]) for name in engine.STATISTICS_SERIES}
+        batch = engine.statistics_batch(stacked, signals, timestamp)
+        for index, (row, signal) in enumerate(zip(rows, signals)):
+            single = engine.statistics(row, signal, timestamp)
+            if single != batch[index]:
+                failures.append(f"stack {stack} row {index}: batch {batch[index]} != single {single}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--typescript", default=DEFAULT_TYPESCRIPT)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    cases = [make_case(rng) for _ in range(args.cases)]
+    engine = load_engine()
+
+    failures = []
+    flips = skipped = 0
+    for index, (case, expected) in enumerate(zip(cases, run_typescript(cases, args.typescript))):
+        if "error" in expected:
+            failures.append(f"case {index}: PortfolioCalculator failed: {expected['error']}")
+            continue
+        series = run_python(engine, case)
+        if None in expected["returns"]:
+            skipped += 1
+            if None not in series["returns"]:
+                failures.append(f"case {index}: invalid TypeScript portfolio came back valid")
+            continue
+        case_failures, case_flips = compare(engine, index, case, expected, series)
+        failures += case_failures
+        flips += case_flips
+
+    failures += check_batch(engine, rng, max(1, args.cases // 10))
+
+    for failure in failures[:20]:
+        print(failure)
+    print(f"{len(cases)} cases ({skipped} rejected by both), {flips} values one rounding unit apart, {len(failures)} mismatches")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
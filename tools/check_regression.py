@@ -0,0 +1,307 @@
+"""
+Parity check of ubacktest/regression.py (embedded in regressionModule.ts):
+the regression examples ported to rolling_regression() must match the
+per-bar sklearn loops they replaced, which are kept below verbatim.
+
+Each example runs both ways on seeded synthetic quotes over a range of
+windows, alphas and degrees. Predictions must agree to a relative 1e-9 and
+signals exactly, apart from bars where the prediction and the previous close
+are within that tolerance (a coin flip for either implementation; counted
+separately). With --bench, both are timed.
+
+Lasso is the exact minimizer. sklearn's coordinate descent first checks
+whether a zero slope is already within its tolerance (a duality gap under
+tol * |y|^2), and stops there: for slopes whose correlation is within about
+1.4% above alpha, sklearn says 0 where the minimizer is a tiny non-zero
+slope. Bars that differ by no more than that are counted separately too.
+
+The polynomial example used to pass its degree as the window (fitting
+quadratics to 2 bars); the ported example passes degree=degree, and it is
+compared with the loop called the same way. Above degree 2, sklearn's fit on
+raw bar numbers loses precision once they reach the hundreds, so only
+degrees 1 and 2 are checked against it.
+
+usage: python tools/check_regression.py [--cases 40] [--seed 0] [--bench 10000 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.preprocessing import PolynomialFeatures
+
+from check_portfolio_engine import ROOT, SERVER, template
+from synthetic_data import generate
+
+TOLERANCE = 1e-9
+
+
+# ---- reference implementations, as they were in app/src/examples/python ----
+
+def linear_regression(data, window=14):
+
+    signals = np.zeros(len(data))  # Initialize signals array
+    predictions = np.zeros(len(data)) # Initialize predictions array
+    
+    # Iterate over the data starting from the window index
+    for i in range(window, len(data)):
+        # Prepare the features (X) and target (y) for the regression model
+        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
+        y = data['close'][i-window:i]  # Last window closing prices
+        
+        # Fit the model
+        model = LinearRegression()
+        model.fit(X, y)
+        
+        # Predict the next value (for the current time period)
+        prediction = model.predict(np.array([[i]]))  # Predict the next point (i.e., the 15th day)
+        predictions[i] = prediction[0]
+        
+        # Signal generation based on prediction (uptrend or downtrend)
+        if prediction > data['close'][i-1]:
+            signals[i] = 1  # Buy signal
+        else:
+            signals[i] = -1  # Sell signal
+    
+    return signals, predictions
+
+
+def ridge_regression(data, window=14, alpha=1.0):
+
+    signals = np.zeros(len(data))  # Initialize signals array
+    predictions = np.zeros(len(data)) # Initialize predictions array
+    
+    # Iterate over the data starting from the window index
+    for i in range(window, len(data)):
+        # Prepare the features (X) and target (y) for the regression model
+        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
+        y = data['close'][i-window:i].values  # Last window closing prices
+        
+        # Fit the Ridge regression model (using L2 regularization)
+        model = Ridge(alpha=alpha)  # 'alpha' is the regularization strength
+        model.fit(X, y)
+        
+        # Predict the next value (for the current time period)
+        prediction = model.predict(np.array([[i]]))  # Predict the next point (i.e., the 6th day)
+        predictions[i] = prediction[0]
+
+        # Signal generation based on prediction (uptrend or downtrend)
+        if prediction > data['close'][i-1]:
+            signals[i] = 1  # Buy signal
+        else:
+            signals[i] = -1  # Sell signal
+    
+    return signals, predictions
+
+
+def lasso_regression(data, window=14, alpha=1.0):
+
+    signals = np.zeros(len(data))  # Initialize signals array
+    predictions = np.zeros(len(data)) # Initialize predictions array
+    
+    # Iterate over the data starting from the window index
+    for i in range(window, len(data)):
+        # Prepare the features (X) and target (y) for the regression model
+        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
+        y = data['close'][i-window:i].values  # Last window closing prices
+        
+        # Fit the Lasso regression model (using L1 regularization)
+        model = Lasso(alpha=alpha)  # 'alpha' is the regularization strength
+        model.fit(X, y)
+        
+        # Predict the next value (for the current time period)
+        prediction = model.predict(np.array([[i]]))  # Predict the next point (i.e., the 6th day)
+        predictions[i] = prediction[0]
+
+        # Signal generation based on prediction (uptrend or downtrend)
+        if prediction > data['close'][i-1]:
+            signals[i] = 1  # Buy signal
+        else:
+            signals[i] = -1  # Sell signal
+    
+    return signals, predictions
+
+
+def polynomial_regression(data, window=14, degree=2):
+
+    signals = np.zeros(len(data))  # Initialize signals array
+    predictions = np.zeros(len(data)) # Initialize predictions array
+    
+    # Iterate over the data starting from the window index
+    for i in range(window, len(data)):
+        # Prepare the features (X) and target (y) for the regression model
+        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
+        y = data['close'][i-window:i].values  # Last window closing prices
+        
+        # Transform the features into polynomial features (degree=2 for quadratic)
+        poly = PolynomialFeatures(degree)
+        X_poly = poly.fit_transform(X)  # Transform the data to polynomial features
+        
+        # Fit the polynomial model (using LinearRegression)
+        model = LinearRegression()
+        model.fit(X_poly, y)
+        
+        # Predict the next value (for the current time period)
+        prediction = model.predict(poly.transform(np.array([[i]])))  # Predict the next point (i.e., the 6th day)
+        predictions[i] = prediction[0]
+
+        # Signal generation based on prediction (uptrend or downtrend)
+        if prediction > data['close'][i-1]:
+            signals[i] = 1  # Buy signal
+        else:
+            signals[i] = -1  # Sell signal
+    
+    return signals, predictions
+
+
+def exponential_regression(data, window=5):
+
+    signals = np.zeros(len(data))  # Initialize signals array
+    predictions = np.zeros(len(data)) # Initialize predictions array
+    
+    # Iterate over the data starting from the window index
+    for i in range(window, len(data)):
+        # Prepare the features (X) and target (y) for the regression model
+        X = np.array(range(i-window, i)).reshape(-1, 1)  # Time index for the last window days
+        y = np.log(data['close'][i-window:i].values)  # Apply log transformation to the closing prices
+        
+        # Fit the model
+        model = LinearRegression()
+        model.fit(X, y)
+        
+        # Predict the next value (for the current time period) in the transformed space
+        prediction_log = model.predict(np.array([[i]]))  # Predict the next point (i.e., the 6th day)
+        
+        # Transform the prediction back to the original space
+        prediction = np.exp(prediction_log[0])  # Apply exponential to get back to the original scale
+        predictions[i] = prediction
+
+        # Signal generation based on prediction (uptrend or downtrend)
+        if prediction > data['close'][i-1]:
+            signals[i] = 1  # Buy signal
+        else:
+            signals[i] = -1  # Sell signal
+    
+    return signals, predictions
+
+
+# ---- harness ----
+
+def load_examples():
+    # the ported examples, with ubacktest.regression importable
+    import types
+    package = types.ModuleType("ubacktest")
+    package.__path__ = []
+    regression = types.ModuleType("ubacktest.regression")
+    source = template(os.path.join(SERVER, "sandbox", "regressionModule.ts"), "regressionModule")
+    exec(compile(source, "ubacktest/regression.py", "exec"), regression.__dict__)
+    package.regression = regression
+    sys.modules["ubacktest"] = package
+    sys.modules["ubacktest.regression"] = regression
+
+    examples = {}
+    for name in ("linearRegression", "ridgeRegression", "lassoRegression", "polynomialRegression", "exponentialRegression"):
+        path = os.path.join(ROOT, "app", "src", "examples", "python", f"{name}.py")
+        namespace = {"__name__": f"example_{name}"}
+        with open(path) as f:
+            exec(compile(f.read(), path, "exec"), namespace)
+        examples[name] = namespace
+    return examples
+
+
+def pairs(examples, rng):
+    # (label, reference function, ported function, keyword arguments)
+    window = int(rng.integers(3, 60))
+    alpha = float(10.0 ** rng.uniform(-6, 0.5))
+    yield "linear", linear_regression, examples["linearRegression"]["linear_regression"], {"window": window}
+    yield "ridge", ridge_regression, examples["ridgeRegression"]["ridge_regression"], {"window": window, "alpha": alpha}
+    yield "lasso", lasso_regression, examples["lassoRegression"]["lasso_regression"], {"window": window, "alpha": alpha}
+    for degree in (1, 2):
+        yield (f"polynomial {degree}", polynomial_regression, examples["polynomialRegression"]["polynomial_regression"],
+               {"window": max(window, degree + 1), "degree": degree})
+    yield "exponential", exponential_regression, examples["exponentialRegression"]["exponential_regression"], {"window": window}
+
+
+def early_stop_band(label, options):
+    # how far a lasso prediction can be from sklearn's when sklearn stopped
+    # at a zero slope: the slope is under 0.015 * alpha / var(x), extended
+    # (window + 1) / 2 bars past the window's mean
+    if label != "lasso":
+        return 0.0
+    window = options["window"]
+    return 0.015 * options["alpha"] / ((window * window - 1) / 12) * (window + 1) / 2
+
+
+def compare(label, data, reference, ported, options):
+    window = options["window"]
+    expected_signals, expected = reference(data.copy(), **options)
+    signals, predictions = ported(data.copy(), **options)
+    expected, predictions = expected[window:], np.asarray(predictions)[window:]
+    previous = data["close"].to_numpy()[window - 1:-1]
+
+    difference = np.abs(predictions - expected)
+    close = difference <= TOLERANCE * np.maximum(np.abs(expected), 1e-12)
+    early = ~close & (difference <= early_stop_band(label, options))
+    ties = (np.abs(expected - previous) <= TOLERANCE * np.abs(previous)) | early
+    same = np.asarray(signals)[window:] == expected_signals[window:]
+    first = np.asarray(signals)[:window]
+    ok = (close | early).all() and (same | ties).all() and not first.any()
+    return ok, int((~same & ties).sum()), int(early.sum())
+
+
+def check(examples, cases, rng):
+    failures = []
+    ties = early = 0
+    for index in range(cases):
+        bars = int(rng.integers(70, 700))
+        interval = "daily" if index % 2 else "5min"
+        data = generate(bars, interval, seed=int(rng.integers(1 << 31)), normalize=True)
+        for label, reference, ported, options in pairs(examples, rng):
+            ok, flipped, stopped = compare(label, data, reference, ported, options)
+            ties += flipped
+            early += stopped
+            if not ok:
+                failures.append(f"case {index}: {label} {options} differs")
+    return failures, ties, early
+
+
+def bench(examples, sizes):
+    for n in sizes:
+        data = generate(n, "daily", seed=n, normalize=True)
+        for label, reference, ported, options in pairs(examples, np.random.default_rng(0)):
+            options["window"] = 14
+            started = time.perf_counter()
+            reference(data.copy(), **options)
+            middle = time.perf_counter()
+            ported(data.copy(), **options)
+            done = time.perf_counter()
+            print(f"{label:>13} {n:>8} bars: sklearn loop {middle - started:8.2f}s  rolling_regression {done - middle:8.4f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", type=int, nargs="*", help="also time both at these sizes")
+    args = parser.parse_args()
+
+    examples = load_examples()
+    failures, ties, early = check(examples, args.cases, np.random.default_rng(args.seed))
+    for failure in failures[:20]:
+        print(failure)
+    print(
+        f"{args.cases} cases x 6 fits, {len(failures)} mismatches "
+        f"({ties} near-tie signals flipped, {early} lasso bars where sklearn stopped at zero)"
+    )
+
+    if args.bench is not None:
+        bench(examples, args.bench or [10_000, 100_000])
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Parity check of ubacktest/walkforward.py (embedded in walkforwardModule.ts):
+every machine learning example ported to walk_forward() must produce the same
+signal as the per-bar loop it replaced, which is kept below verbatim.
+
+Each example runs on seeded synthetic quotes; its walk_forward() call is
+intercepted and also answered by the old loop, on the same features, target
+and model. The predictions must be identical, not merely close. Both are
+timed, so the output doubles as a benchmark (walk_forward uses every CPU
+available here unless --workers is given).
+
+usage: python tools/check_walkforward.py [--bars 300] [--seeds 0 1 2]
+           [--examples knn svm ...] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from check_portfolio_engine import ROOT, SERVER, template
+from synthetic_data import generate
+
+EXAMPLES = ("knn", "randomForest", "svm", "gradBoosting", "neuralNet")
+PACKAGE = {
+    "pool.py": ("poolModule.ts", "poolModule"),
+    "profiling.py": ("profilingModule.ts", "profilingModule"),
+    "progress.py": ("progressModule.ts", "progressModule"),
+    "walkforward.py": ("walkforwardModule.ts", "walkforwardModule"),
+}
+
+
+# ---- reference implementation, as it was in app/src/examples/python ----
+
+def rolling_predictions(make_model, data, features, training_window, start):
+    scaler = StandardScaler()
+    predictions = []
+
+    for i in range(start, len(data)):
+        train_data = data.iloc[i-training_window:i]  # Rolling window for training
+        test_data = data.iloc[[i]]  # Single test point (next day)
+
+        X_train, y_train = train_data[features], train_data['target']
+        X_test = test_data[features]
+
+        # Scale the data
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+        # Train the model
+        model = make_model()
+        model.fit(X_train_scaled, y_train)
+
+        # Make prediction
+        pred = model.predict(X_test_scaled)[0]
+        predictions.append(pred)
+
+    return predictions
+
+
+# ---- harness ----
+
+def install_package(directory):
+    # the sandbox's ubacktest package, as far as walkforward needs it
+    os.makedirs(os.path.join(directory, "ubacktest"))
+    open(os.path.join(directory, "ubacktest", "__init__.py"), "w").close()
+    for file, (module, export) in PACKAGE.items():
+        source = template(os.path.join(SERVER, "sandbox", module), export)
+        with open(os.path.join(directory, "ubacktest", file), "w") as f:
+            f.write(source.lstrip())
+    sys.path.insert(0, directory)
+
+
+def load_example(name):
+    path = os.path.join(ROOT, "app", "src", "examples", "python", f"{name}.py")
+    namespace = {"__name__": f"example_{name}"}
+    with open(path) as f:
+        exec(compile(f.read(), path, "exec"), namespace)
+    return namespace
+
+
+def check(name, data, workers):
+    example = load_example(name)
+    library = example["walk_forward"]
+    calls = []
+
+    def intercept(make_model, X, y, training_window, start=None, **options):
+        started = time.perf_counter()
+        actual = library(make_model, X, y, training_window, start=start, workers=workers, **options)
+        middle = time.perf_counter()
+        frame = X.assign(target=y)
+        expected = rolling_predictions(make_model, frame, list(X.columns), training_window, start)
+        done = time.perf_counter()
+        calls.append((np.array_equal(np.asarray(expected), actual), len(actual), done - middle, middle - started))
+        return actual
+
+    example["walk_forward"] = intercept
+    example["strategy"](data.copy())
+    if len(calls) != 1:
+        raise SystemExit(f"{name} called walk_forward {len(calls)} times; expected once")
+    return calls[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=300)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--examples", nargs="+", choices=EXAMPLES, default=list(EXAMPLES))
+    parser.add_argument("--workers", type=int, help="pool workers (default: as the sandbox would size it)")
+    args = parser.parse_args()
+
+    install_package(tempfile.mkdtemp(prefix="ubacktest_walkforward_"))
+    mismatches = 0
+    for name in args.examples:
+        for seed in args.seeds:
+            data = generate(args.bars, "daily", seed=seed, normalize=True)
+            same, windows, loop, library = check(name, data, args.workers)
+            mismatches += not same
+            print(
+                f"{name:>13} seed {seed}: {windows} windows, "
+                f"loop {loop:7.2f}s  walk_forward {library:7.2f}s  "
+                f"{'identical' if same else 'DIFFERENT'}"
+            )
+    print(f"{len(args.examples) * len(args.seeds)} runs, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+A Judge0-compatible stand-in for running the app offline.
+
+Implements just enough of `POST /submissions?base64_encoded=true&wait=true`
+for Judge0Executor: the submission runs through the same sandbox launcher
+SubprocessExecutor uses (extracted from sandboxLauncher.ts), under the same
+rlimits, and the reply has Judge0's shape (base64 stdout/stderr/message,
+status, time, memory). With wait=false the reply is a token instead, and
+`GET /submissions/<token>` reports the submission as queued, processing or
+finished, as Judge0Executor polls it when JUDGE0_POLL_MS is set.
+
+usage: python tools/judge0_standin.py [--port 2358]
+       JUDGE0_URL="http://localhost:2358/submissions?base64_encoded=true&wait=true" wasp start
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EXECUTORS = os.path.join(
+    os.path.dirname(__file__), "..", "app", "src", "editor", "server", "executors"
+)
+
+STATUS = {
+    1: "In Queue",
+    2: "Processing",
+    3: "Accepted",
+    5: "Time Limit Exceeded",
+    11: "Runtime Error (NZEC)",
+    12: "Runtime Error (Other)",
+}
+SIGXCPU = 24
+ALLOWED_ENV = ("PATH", "LANG", "PYTHONPATH", "EXECUTOR_CGROUP")
+
+
+def sandbox_env(**extra):
+    # as sandboxEnv.ts: never hand a submission this process's environment
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name in ALLOWED_ENV or name.startswith("UBACKTEST_")
+    }
+    return {**env, **extra}
+
+
+def sandbox_user():
+    uid = os.environ.get("EXECUTOR_UID")
+    if not uid:
+        print("EXECUTOR_UID is not set: submissions are NOT ISOLATED (dev only)", file=sys.stderr)
+        return None, None
+    return int(uid), int(os.environ.get("EXECUTOR_GID") or uid)
+
+
+def template(name, export):
+    with open(os.path.join(EXECUTORS, name)) as f:
+        source = f.read()
+    match = re.search(r"export const " + export + r" = String\.raw`(.*?)`;", source, re.S)
+    if not match:
+        sys.exit(f"could not find {export} in {name}")
+    return match.group(1)
+
+
+def launcher_source():
+    limits = template("sandboxLimits.ts", "sandboxLimits")
+    return template("sandboxLauncher.ts", "sandboxLauncher").replace("${sandboxLimits}", limits)
+
+
+def run_submission(launcher, submission, user):
+    cpu_limit = float(submission.get("cpu_time_limit") or 5)
+    wall_limit = float(submission.get("wall_time_limit") or 10)
+    spec = json.dumps({
+        "cpu_time_limit": cpu_limit,
+        "memory_limit": int(submission.get("memory_limit") or 256000),
+        "max_threads": int(submission.get("max_processes_and_or_threads") or 60),
+        "uid": user[0],
+        "gid": user[1],
+    })
+
+    workdir = tempfile.mkdtemp(prefix="judge0-standin-")
+    try:
+        with open(os.path.join(workdir, "script.py"), "wb") as f:
+            f.write(base64.b64decode(submission.get("source_code") or ""))
+        if submission.get("additional_files"):
+            with open(os.path.join(workdir, "files.zip"), "wb") as f:
+                f.write(base64.b64decode(submission["additional_files"]))
+
+        read_fd, write_fd = os.pipe()
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            [sys.executable, "-c", launcher, spec],
+            cwd=workdir,
+            env=sandbox_env(UBACKTEST_STATS_FD=str(write_fd)),
+            pass_fds=(write_fd,),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        os.close(write_fd)
+
+        timed_out = False
+        try:
+            stdout, stderr = proc.communicate(timeout=wall_limit)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            os.killpg(proc.pid, signal.SIGKILL)
+            stdout, stderr = proc.communicate()
+        wall_time = time.monotonic() - started
+
+        with os.fdopen(read_fd) as f:
+            report = f.read().strip()
+        try:
+            stats = json.loads(report)
+        except ValueError:
+            stats = {}  # killed before (or while) the launcher reported
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    exit_code = stats.get("exit_code", proc.returncode)
+    exit_signal = stats.get("exit_signal")
+    cpu_time = stats.get("time", wall_time)
+
+    message = None
+    if timed_out or exit_signal == SIGXCPU or cpu_time >= cpu_limit:
+        status_id, message = 5, "Time limit exceeded"
+    elif exit_signal is not None:
+        status_id, message = 12, f"Exited with signal {exit_signal}"
+    elif exit_code != 0:
+        status_id, message = 11, f"Exited with error status {exit_code}"
+    else:
+        status_id = 3
+
+    encode = lambda value: base64.b64encode(value).decode() if value else None
+    return {
+        "stdout": encode(stdout),
+        "stderr": encode(stderr),
+        "message": encode(message.encode()) if message else None,
+        "exit_code": exit_code,
+        "exit_signal": exit_signal,
+        "time": f"{cpu_time:.3f}",
+        "wall_time": f"{wall_time:.3f}",
+        "memory": stats.get("memory"),
+        "status": {"id": status_id, "description": STATUS[status_id]},
+    }
+
+
+def status(status_id):
+    return {"status": {"id": status_id, "description": STATUS[status_id]}}
+
+
+class Handler(BaseHTTPRequestHandler):
+    launcher = None
+    user = (None, None)
+    # wait=false submissions by token, until their result is fetched
+    submissions = {}
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/submissions":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            submission = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400, "body is not JSON")
+            return
+
+        if parse_qs(url.query).get("wait") == ["false"]:
+            token = uuid.uuid4().hex
+            self.submissions[token] = status(1)
+            threading.Thread(target=self.run_later, args=(token, submission), daemon=True).start()
+            self.reply(201, {"token": token})
+        else:
+            self.reply(201, run_submission(self.launcher, submission, self.user))
+
+    def do_GET(self):
+        token = urlparse(self.path).path.rstrip("/").rpartition("/submissions/")[2]
+        result = self.submissions.get(token)
+        if not token or result is None:
+            self.send_error(404)
+            return
+        if result["status"]["id"] > 2:
+            del self.submissions[token]
+        self.reply(200, {**result, "token": token})
+
+    def run_later(self, token, submission):
+        self.submissions[token] = status(2)
+        self.submissions[token] = run_submission(self.launcher, submission, self.user)
+
+    def reply(self, code, result):
+        body = json.dumps(result).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2358)
+    args = parser.parse_args()
+
+    Handler.launcher = launcher_source()
+    Handler.user = sandbox_user()
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Judge0 stand-in listening on http://{args.host}:{args.port}/submissions")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Deterministic synthetic OHLCV quotes in the PythonData shape the harness
+receives (timestamp, open, high, low, close, volume), for tests and load runs
+that should not depend on Tiingo.
+
+Models (all seeded and vectorized; about two million bars per second, most of
+it spent formatting the ISO timestamps):
+
+- gbm:    geometric Brownian motion
+- jump:   GBM plus Merton jumps
+- regime: calm/turbulent spells of geometric length, with jumps
+
+Intraday intervals fill the regular session (09:30-16:00 New York time, DST
+included) with U-shaped volatility and volume and an overnight gap at each
+open; daily/weekly/monthly bars are dated at midnight UTC like Tiingo's.
+Weekends are skipped; market holidays are not modelled. With splits=True the
+raw price splits 2:1 to 4:1 at the next session after it gets expensive, and
+the splits are listed in df.attrs["splits"].
+
+The app's offline data source (STOCK_DATA_SOURCE=synthetic, SyntheticQuotes.ts)
+uses the same models, but not the same random streams: the two do not
+produce identical prices for a seed.
+
+usage: python tools/synthetic_data.py [--bars 100000] [--interval 1min]
+           [--model regime] [--seed 0] [--splits] [--normalize]
+           [--out quote.json|quote.csv] [--bench]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+SESSION_MINUTES = 390
+TRADING_DAYS = 252
+EOD_DAYS = {"daily": 1, "weekly": 5, "monthly": 21}
+EOD_FREQ = {"daily": "B", "weekly": "W-FRI", "monthly": "BME"}
+MODELS = ("gbm", "jump", "regime")
+
+
+def minutes_per_bar(interval):
+    if interval in EOD_DAYS:
+        return None
+    if interval.endswith("min"):
+        return int(interval[:-3])
+    if interval.endswith("hour"):
+        return 60 * int(interval[:-4])
+    raise ValueError(f"unknown interval {interval!r}")
+
+
+def generate(
+    bars,
+    interval="1min",
+    model="regime",
+    seed=0,
+    start="2000-01-03",
+    price=100.0,
+    drift=0.08,
+    volatility=0.2,
+    splits=False,
+    normalize=False,
+):
+    # One quote of `bars` bars; the same arguments always give the same quote.
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {MODELS}")
+    rng = np.random.default_rng(seed)
+    minutes = minutes_per_bar(interval)
+
+    if minutes is None:
+        timestamps = pd.date_range(start, periods=bars, freq=EOD_FREQ[interval]).values
+        session_start = np.ones(bars, dtype=bool)
+        shape = np.ones(bars)
+        dt = EOD_DAYS[interval] / TRADING_DAYS
+    else:
+        timestamps, session_start, shape = _sessions(bars, minutes, start)
+        dt = minutes / SESSION_MINUTES / TRADING_DAYS
+
+    # per-bar drift and volatility, by regime
+    mu = np.full(bars, drift)
+    sigma = np.full(bars, volatility)
+    if model == "regime":
+        turbulent = _regimes(rng, bars, dt)
+        mu[turbulent] = -0.05
+        sigma[turbulent] *= 2
+    sigma_bar = sigma * np.sqrt(dt) * shape
+
+    body = (mu * dt - sigma_bar**2 / 2) + sigma_bar * rng.standard_normal(bars)
+    if model != "gbm":
+        # about 2.5 jumps a year
+        jumps = rng.random(bars) < 2.5 * dt
+        body[jumps] += rng.normal(-0.005, 0.04, jumps.sum())
+
+    # overnight gaps: between bars for EOD data, at each open for intraday
+    night = volatility * np.sqrt(1 / TRADING_DAYS)
+    gap = np.where(session_start, 0.3 * night * rng.standard_normal(bars), 0.0)
+    gap[0] = 0.0
+
+    log_close = np.log(price) + np.cumsum(gap + body)
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - body)
+
+    split_list = []
+    if splits:
+        split_list = _apply_splits(rng, timestamps, session_start, open_, close)
+
+    wick = 0.5 * sigma_bar
+    high = np.maximum(open_, close) * np.exp(wick * np.abs(rng.standard_normal(bars)))
+    low = np.minimum(open_, close) * np.exp(-wick * np.abs(rng.standard_normal(bars)))
+    volume = np.rint(
+        1e6 * shape * (dt * TRADING_DAYS) * rng.lognormal(0.0, 0.3, bars) * (1 + 2 * np.abs(body) / sigma_bar)
+    ).astype(np.int64)
+
+    if normalize:
+        # a first close of 1, like StockDataConnection's quotes
+        scale = close[0]
+        open_, high, low, close = open_ / scale, high / scale, low / scale, close / scale
+
+    df = pd.DataFrame(
+        {
+            "timestamp": np.datetime_as_string(timestamps.astype("datetime64[ms]"), unit="ms", timezone="UTC"),
+            "open": np.round(open_, 4),
+            "high": np.round(high, 4),
+            "low": np.round(low, 4),
+            "close": np.round(close, 4),
+            "volume": volume,
+        }
+    )
+    df.attrs["splits"] = split_list
+    return df
+
+
+def to_quote(df):
+    # PythonData as the server hands it over: one list per column
+    return {column: df[column].tolist() for column in ("timestamp", "open", "high", "low", "close", "volume")}
+
+
+def _sessions(bars, minutes, start):
+    # Bar open times over as many weekday sessions as needed, whether each
+    # bar opens a session, and the U-shaped volatility/volume multiplier.
+    per_day = -(-SESSION_MINUTES // minutes)
+    days = pd.bdate_range(start, periods=-(-bars // per_day))
+    opens = (
+        pd.DatetimeIndex(days + pd.Timedelta(hours=9, minutes=30))
+        .tz_localize("America/New_York")
+        .tz_convert("UTC")
+        .tz_localize(None)
+        .values
+    )
+    offsets = np.arange(per_day) * minutes
+    timestamps = (opens[:, None] + offsets.astype("timedelta64[m]")).ravel()[:bars]
+
+    position = np.tile(offsets, len(days))[:bars]
+    session_start = position == 0
+    t = (position + minutes / 2) / SESSION_MINUTES
+    shape = (0.6 + 6.4 * (t - 0.5) ** 2) / 1.13
+    return timestamps, session_start, shape
+
+
+def _regimes(rng, bars, dt):
+    # Alternating calm/turbulent spells, ~100 and ~20 trading days long
+    mean_days = np.array([100.0, 20.0])
+    spells = []
+    covered = 0
+    while covered < bars:
+        draw = rng.geometric(np.minimum(1.0, dt * TRADING_DAYS / np.tile(mean_days, 64)))
+        spells.append(draw)
+        covered += draw.sum()
+    lengths = np.concatenate(spells)
+    states = np.arange(len(lengths)) % 2 == 1
+    return np.repeat(states, lengths)[:bars]
+
+
+def _apply_splits(rng, timestamps, session_start, open_, close):
+    # In place: once the close passes split_at, every price from the next
+    # session on is divided by the split factor.
+    split_at = 300 + 400 * rng.random()
+    session_index = np.flatnonzero(session_start)
+    found = []
+    position = 0
+    while True:
+        above = np.flatnonzero(close[position:] > split_at)
+        if not above.size:
+            return found
+        next_session = np.searchsorted(session_index, position + above[0], side="right")
+        if next_session == len(session_index):
+            return found
+        effective = session_index[next_session]
+        factor = int(rng.integers(2, 5))
+        open_[effective:] /= factor
+        close[effective:] /= factor
+        found.append({"timestamp": str(timestamps[effective].astype("datetime64[ms]")) + "Z", "factor": factor})
+        position = effective
+
+
+def bench(bars=2_000_000):
+    for model in MODELS:
+        generate(1000, model=model)
+        started = time.perf_counter()
+        generate(bars, model=model, splits=True)
+        elapsed = time.perf_counter() - started
+        print(f"{model:<7} {bars / elapsed / 1e6:6.2f} M bars/s (1min, {bars} bars)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--interval", default="1min")
+    parser.add_argument("--model", choices=MODELS, default="regime")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2000-01-03")
+    parser.add_argument("--splits", action="store_true")
+    parser.add_argument("--normalize", action="store_true")
+    parser.add_argument("--out", help="write the quote as .json (PythonData) or .csv")
+    parser.add_argument("--bench", action="store_true", help="time 2M one-minute bars per model")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench()
+        return
+
+    df = generate(
+        args.bars, args.interval, args.model, args.seed, args.start, splits=args.splits, normalize=args.normalize
+    )
+    if args.out and args.out.endswith(".csv"):
+        df.to_csv(args.out, index=False)
+    elif args.out:
+        with open(args.out, "w") as f:
+            json.dump(to_quote(df), f)
+    else:
+        print(df)
+    for split in df.attrs["splits"]:
+        print(f"split {split['factor']}:1 at {split['timestamp']}")
+
+
+if __name__ == "__main__":
+    main()